@@ -5,31 +5,34 @@ import numpy as np
 import base64
 from datetime import datetime, date, timedelta
 from zoneinfo import ZoneInfo
-from io import StringIO, BytesIO
+from io import BytesIO
 import streamlit.components.v1 as components
 from PIL import Image
 from urllib.parse import quote
-import json
 import colorsys
-import re
+import logging
 import os
+import threading
+from dataclasses import dataclass, fields, replace
+from types import MappingProxyType
+
+import ingestao
+from ingestao.arquivos import detectar_dialeto_csv, projecao_colunas
+from ingestao.snapshots import ler_snapshot_colunar
+from ingestao import (
+    BACKLOG_15DIAS_FILE, BACKLOG_ATUAL_FILE, COLUNAS_TEXTO_LIVRE, DATA_DIR, GRUPOS_DE_AVISO_TEXTO,
+    GRUPOS_EXCLUSAO_PERMANENTE_TEXTO, HISTORICO_FECHADOS_DIR, ID_COLS, INDICE_AGING_FILE,
+    INDICE_EVOLUCAO_FILE, ORDEM_FAIXAS, SNAPSHOT_DIR, STATE_DB_FILE, STATE_FILE_PREV_CLOSED, STATE_FILE_REF_DATES,
+    CacheQuadros, ErroLeituraCSV, SnapshotCatalog, aplicar_esquema_tipado, atualizacao_completa, atualizacao_fechados,
+    atualizar_indice_aging, atualizar_indice_evolucao, categorizar_idade_vetorizado, chaves_dos_ids, codificar_ids,
+    coluna_data_criacao, contem_caminho, filtrar_historico_encerrados, get_file_mtime, carregar_contatos,
+    carregar_observacoes, iniciar_compactacao_historico, ler_csv_tipado, ler_datas_referencia, ler_exportacao,
+    ler_fechamentos_por_ticket, ler_json, limpar_historico, listar_snapshots, mascara_grupos, meses_no_intervalo,
+    migrar_estado_json_para_sqlite, migrar_historico_fechados_para_particoes, migrar_snapshots_para_parquet,
+    montar_indice_criacao, normalizar_datas, salvar_alteracoes_tickets, versao_estado, versao_historico_fechados,
+)
 
-# --- CONFIGURAÇÕES E CONSTANTES ---
-GRUPOS_EXCLUSAO_PERMANENTE_REGEX = r'RH|Aprovadores GGM|RDM'
-GRUPOS_EXCLUSAO_PERMANENTE_TEXTO = "'RH', 'Aprovadores GGM' ou 'RDM'"
-
-GRUPOS_DE_AVISO_REGEX = r'Service Desk \(L1\)|LIQ-SUTEL'
-GRUPOS_DE_AVISO_TEXTO = "'Service Desk (L1)' ou 'LIQ-SUTEL'"
-
-GRUPOS_EXCLUSAO_TOTAL_REGEX = f"{GRUPOS_EXCLUSAO_PERMANENTE_REGEX}|{GRUPOS_DE_AVISO_REGEX}"
-
-DATA_DIR = "data/"
-STATE_FILE_CONTACTS = "contacted_tickets.json"
-STATE_FILE_OBSERVATIONS = "ticket_observations.json"
-STATE_FILE_REF_DATES = "datas_referencia.txt"
-STATE_FILE_MASTER_CLOSED_CSV = f"{DATA_DIR}historico_fechados_master.csv"
-STATE_FILE_PREV_CLOSED = "previous_closed_ids.json"
-STATE_FILE_METRICS_DB = "metricas_diarias.json"
+logger = logging.getLogger(__name__)
 
 # --- SETUP DA PÁGINA ---
 st.set_page_config(
@@ -105,192 +108,282 @@ a.metric-box:hover {
 """)
 
 # --- FUNÇÕES UTILITÁRIAS ---
-
-def get_file_mtime(file_path):
-    if os.path.exists(file_path):
-        return os.path.getmtime(file_path)
-    return 0
-
-def save_local_file(file_path, file_content, is_binary=False):
-    try:
-        directory = os.path.dirname(file_path)
-        if directory: 
-            os.makedirs(directory, exist_ok=True)
-            
-        mode = 'wb' if is_binary else 'w'
-        encoding = None if is_binary else 'utf-8'
-        
-        with open(file_path, mode, encoding=encoding) as f:
-            f.write(file_content)
-            
-        if file_path not in [STATE_FILE_CONTACTS, STATE_FILE_OBSERVATIONS, STATE_FILE_REF_DATES, STATE_FILE_MASTER_CLOSED_CSV, STATE_FILE_PREV_CLOSED, STATE_FILE_METRICS_DB]:
-            st.sidebar.info(f"Arquivo '{file_path}' salvo localmente.")
-            
-    except Exception as e:
-        st.sidebar.error(f"Falha ao salvar '{file_path}' localmente: {e}")
-        raise
-
-@st.cache_data
-def read_local_csv(file_path, file_mtime):
-    if not os.path.exists(file_path):
-        return pd.DataFrame() 
-    
-    separators = [';', ',']
-    encodings = ['utf-8', 'latin1']
-    
-    for sep in separators:
-        for enc in encodings:
-            try:
-                # Lê como string para não deixar o pandas "pensar" demais
-                df = pd.read_csv(file_path, sep=sep, encoding=enc,
-                                 dtype=str, 
-                                 low_memory=False, on_bad_lines='warn')
-                
-                if df.shape[1] > 1:
-                    df.columns = df.columns.str.strip()
-                    df = df.loc[:, ~df.columns.duplicated()]
-                    df.dropna(how='all', inplace=True)
-                    return df
-            except:
-                continue
-                
-    st.error(f"Não foi possível ler o arquivo '{file_path}'. Verifique se é um CSV válido.")
-    return pd.DataFrame()
-
-@st.cache_data
-def read_local_text_file(file_path):
-    if not os.path.exists(file_path):
-        return {} 
-
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-        dates = {}
-        for line in content.strip().split('\n'):
-            if ':' in line:
-                key, value = line.split(':', 1)
-                dates[key.strip()] = value.strip()
-        return dates
-    except Exception as e:
-        return {}
-
-@st.cache_data
-def read_local_json_file(file_path, default_return_type='dict'): 
-    default_return = (default_return_type == 'dict' and {} or [])
-    if not os.path.exists(file_path):
-        return default_return 
-        
+# A ingestão (leitura, padronização, snapshots, histórico, estado e índices) fica no
+# pacote 'ingestao', sem dependência do Streamlit; aqui ficam só os wrappers em cache
+# usados pela renderização e a exibição de mensagens.
+
+# --- INVALIDAÇÃO POR FONTE ---
+# Cada cache declara, com 'depende_de', os arquivos ou diretórios de onde lê. Uma
+# escrita da ingestão (ou uma mudança vista pelo observador de arquivos) descarta só
+# os caches que dependem dos caminhos alterados; os demais continuam quentes. As
+# chaves já incluem mtimes/versões, então a invalidação libera as versões antigas
+# em vez de ser necessária para a leitura ficar correta.
+
+_dependencias_cache = []
+
+def depende_de(*fontes):
+    def registrar(funcao_cacheada):
+        _dependencias_cache.append((tuple(os.path.normpath(f) for f in fontes), funcao_cacheada))
+        return funcao_cacheada
+    return registrar
+
+def invalidar_fontes(caminhos):
+    """Limpa os caches que dependem de algum dos caminhos (arquivo, ou diretório inteiro) alterados."""
+    caminhos = [os.path.normpath(c) for c in caminhos]
+    for fontes, funcao_cacheada in _dependencias_cache:
+        if any(contem_caminho(fonte, c) or contem_caminho(c, fonte) for fonte in fontes for c in caminhos):
+            funcao_cacheada.clear()
+
+# --- CACHE DE DATAFRAMES COM ORÇAMENTO EM BYTES ---
+# Backlogs, partições do histórico e snapshots ficam em um único 'CacheQuadros' do
+# processo (ver 'ingestao.cache'), limitado pelo tamanho real dos DataFrames.
+
+ORCAMENTO_CACHE_MB = int(st.secrets.get("ORCAMENTO_CACHE_MB", 512))
+
+@st.cache_resource
+def obter_cache_quadros():
+    return CacheQuadros(ORCAMENTO_CACHE_MB * 1024 * 1024)
+
+def _obter_csv_em_cache(artefato, file_path, file_mtime, colunas=None, excluir=()):
+    return obter_cache_quadros().obter(artefato, file_path, file_mtime, (colunas, tuple(excluir)),
+                                       lambda: ler_csv_tipado(file_path, colunas, excluir))
+
+def _ler_csv_em_cache(artefato, file_path, file_mtime, colunas=None, excluir=()):
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            return json.loads(content) if content else default_return
-    except Exception:
-        return default_return
+        return _obter_csv_em_cache(artefato, file_path, file_mtime, colunas, excluir)
+    except ErroLeituraCSV as e:
+        st.error(str(e))
+        return pd.DataFrame()
 
-def update_daily_metrics(date_str, closed_count):
-    """Salva o número de fechados do dia em um JSON persistente."""
-    metrics = read_local_json_file(STATE_FILE_METRICS_DB, 'dict')
-    
-    if not isinstance(metrics, dict):
-        metrics = {}
-    
-    metrics[date_str] = {
-        "fechados_liquido": int(closed_count),
-        "updated_at": datetime.now().isoformat()
-    }
-    
-    try:
-        with open(STATE_FILE_METRICS_DB, 'w', encoding='utf-8') as f:
-            json.dump(metrics, f, indent=4)
-    except Exception as e:
-        print(f"Erro ao salvar métricas: {e}")
+def read_local_csv(file_path, file_mtime, colunas=None, excluir=()):
+    """Lê o CSV tipado; 'colunas'/'excluir' limitam quais colunas o parser materializa."""
+    return _ler_csv_em_cache('csv', file_path, file_mtime, colunas, excluir)
 
-def get_daily_metric(date_str):
-    """Recupera o número salvo para evitar recálculo."""
-    metrics = read_local_json_file(STATE_FILE_METRICS_DB, 'dict')
-    
-    if not isinstance(metrics, dict):
-        return None
-        
-    if date_str in metrics:
-        return metrics[date_str].get("fechados_liquido", 0)
-    return None
+# --- TEXTO LIVRE SOB DEMANDA ---
+# Os caminhos de agregação leem os CSVs sem 'Descrição'/'Detalhes'. Quando uma tabela
+# precisa do texto, só os registros das linhas exibidas são lidos, a partir de um
+# índice de offsets em bytes de cada registro do arquivo.
 
-def force_br_date_parse(series):
+@depende_de(BACKLOG_ATUAL_FILE)
+@st.cache_data(max_entries=4)
+def indice_linhas_csv(file_path, file_mtime):
     """
-    Força a interpretação como Dia/Mês/Ano.
-    Se falhar, retorna NaT.
+    Retorna (cabeçalho em bytes, DataFrame 'inicio'/'fim' indexado pela chave do ticket).
+    Quebras de linha dentro de aspas (texto multilinha) não encerram o registro.
+    None se os registros não baterem com as linhas lidas pelo pandas.
     """
-    return pd.to_datetime(series, dayfirst=True, errors='coerce')
+    dados = np.fromfile(file_path, dtype=np.uint8)
+    if dados.size == 0:
+        return None
+    dentro_de_aspas = (np.cumsum(dados == ord('"')) % 2).astype(bool)
+    quebras = np.flatnonzero((dados == ord('\n')) & ~dentro_de_aspas)
+    inicios = np.concatenate(([0], quebras + 1))
+    fins = np.concatenate((quebras, [dados.size]))
+    # Linhas vazias (ou só '\r') são ignoradas pelo read_csv
+    comprimentos = fins - inicios
+    ultimo_byte = dados[np.maximum(fins - 1, 0)]
+    validos = (comprimentos > 1) | ((comprimentos == 1) & (ultimo_byte != ord('\r')))
+    inicios, fins = inicios[validos], fins[validos]
+    sep, enc = detectar_dialeto_csv(file_path, file_mtime)
+    df_ids = pd.read_csv(file_path, sep=sep, encoding=enc, dtype=str, engine='c',
+                         usecols=projecao_colunas(ID_COLS), on_bad_lines='skip')
+    if df_ids.empty or len(df_ids) != len(inicios) - 1:
+        return None
+    df_ids.columns = df_ids.columns.str.strip()
+    id_col = next(col for col in ID_COLS if col in df_ids.columns)
+    cabecalho = dados[inicios[0]:fins[0]].tobytes()
+    offsets = pd.DataFrame({'inicio': inicios[1:], 'fim': fins[1:]}, index=codificar_ids(df_ids[id_col]))
+    return cabecalho, offsets[~offsets.index.duplicated()]
+
+@depende_de(BACKLOG_ATUAL_FILE)
+@st.cache_data(max_entries=64)
+def ler_textos_tickets(file_path, file_mtime, chaves, colunas=COLUNAS_TEXTO_LIVRE):
+    """Texto livre (indexado pela chave) apenas dos tickets pedidos."""
+    indice = indice_linhas_csv(file_path, file_mtime)
+    if indice is None:
+        # Arquivo fora do padrão: lê as colunas de texto inteiras
+        df_textos = read_local_csv(file_path, file_mtime, colunas=tuple(colunas) + ID_COLS)
+        df_textos = df_textos.set_index(chaves_dos_ids(df_textos))
+        df_textos = df_textos[df_textos.index.isin(chaves) & ~df_textos.index.duplicated()]
+        return df_textos[[col for col in colunas if col in df_textos.columns]]
+    cabecalho, offsets = indice
+    selecionados = offsets[offsets.index.isin(chaves)]
+    registros = [cabecalho]
+    with open(file_path, 'rb') as f:
+        for inicio, fim in zip(selecionados['inicio'], selecionados['fim']):
+            f.seek(inicio)
+            registros.append(f.read(fim - inicio))
+    sep, enc = detectar_dialeto_csv(file_path, file_mtime)
+    df_textos = pd.read_csv(BytesIO(b'\n'.join(registros)), sep=sep, encoding=enc, dtype=str,
+                            engine='c', usecols=projecao_colunas(colunas))
+    df_textos.columns = df_textos.columns.str.strip()
+    df_textos.index = selecionados.index
+    return aplicar_esquema_tipado(df_textos)
+
+def anexar_textos_tickets(df, file_path, colunas=('Descrição',)):
+    """Acrescenta ao DataFrame as colunas de texto livre lidas sob demanda do CSV de origem."""
+    if df.empty or not os.path.exists(file_path):
+        return df
+    chaves = chaves_dos_ids(df)
+    textos = ler_textos_tickets(file_path, get_file_mtime(file_path), tuple(chaves.unique()), tuple(colunas))
+    for col in textos.columns:
+        df[col] = chaves.map(textos[col]).to_numpy()
+    return df
+
+# --- SNAPSHOTS COLUNARES (PARQUET) ---
+
+def read_snapshot_colunar(parquet_path, file_mtime, colunas):
+    return obter_cache_quadros().obter('snapshot', parquet_path, file_mtime, colunas,
+                                       lambda: ler_snapshot_colunar(parquet_path, file_mtime, colunas))
+
+def carregar_snapshot(csv_path, colunas):
+    """Lê apenas as colunas pedidas do snapshot, convertendo o CSV para Parquet se necessário."""
+    return ingestao.carregar_snapshot(csv_path, colunas, leitor=read_snapshot_colunar)
+
+# --- HISTÓRICO DE FECHADOS (PARTIÇÕES MENSAIS) ---
+
+def read_particao_fechados(file_path, file_mtime, excluir=()):
+    # Os erros de leitura sobem: 'ler_historico_fechados' junta os meses afetados em um aviso
+    return _obter_csv_em_cache('historico_fechados', file_path, file_mtime, excluir=excluir)
+
+def ler_historico_fechados(meses=None, excluir=()):
+    """Histórico de fechados com upsert por ID, lendo cada partição pelo cache do dashboard."""
+    falhas = []
+    df_historico = ingestao.ler_historico_fechados(meses, excluir, leitor=read_particao_fechados, falhas=falhas)
+    if falhas:
+        st.warning(f"Não foi possível ler o histórico de fechados de {', '.join(falhas)}: esses meses ficaram de fora.")
+    return df_historico
+
+@depende_de(STATE_FILE_PREV_CLOSED)
+@st.cache_data(max_entries=4)
+def read_local_json_file(file_path, file_mtime, default_return_type='dict'):
+    return ler_json(file_path, default_return_type)
+
+# --- MIGRAÇÕES ---
+# Rodam uma vez por processo do servidor; a linha de comando da ingestão as executa a cada chamada.
+
+@st.cache_resource
+def migrar_dados_legados():
+    migrar_snapshots_para_parquet()
+    migrar_historico_fechados_para_particoes()
+    migrar_estado_json_para_sqlite()
+
+# --- OBSERVADOR DE ARQUIVOS ---
+# Percebe gravações feitas fora do dashboard (ex.: 'python -m ingestao', cópia manual
+# para 'data/') sem reiniciar o servidor. Uma instância por processo.
+
+ARQUIVOS_ESTADO_OBSERVADOS = (STATE_FILE_REF_DATES, STATE_FILE_PREV_CLOSED, STATE_DB_FILE, f"{STATE_DB_FILE}-wal")
+
+def _mtimes_observados():
+    mtimes = {path: get_file_mtime(path) for path in ARQUIVOS_ESTADO_OBSERVADOS}
+    for dirpath, _, arquivos in os.walk(DATA_DIR):
+        for file_name in arquivos:
+            if not file_name.endswith('.tmp'):
+                path = os.path.join(dirpath, file_name)
+                mtimes[path] = get_file_mtime(path)
+    return mtimes
+
+class ObservadorArquivos:
+    """Compara os mtimes periodicamente e invalida os caches dos caminhos alterados."""
+
+    NOME_THREAD = "observador-arquivos"
+
+    def __init__(self, cache_quadros, intervalo=10):
+        self.cache_quadros = cache_quadros
+        self.intervalo = intervalo
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+        self._vistos = _mtimes_observados()
+        # O script recarregado (código alterado) cria outro observador: o anterior deixa de observar
+        for thread in threading.enumerate():
+            if thread.name == self.NOME_THREAD and hasattr(thread, 'parar'):
+                thread.parar.set()
+        thread = threading.Thread(target=self._observar, name=self.NOME_THREAD, daemon=True)
+        thread.parar = self._parar
+        thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+    def _observar(self):
+        ultimo_erro = None
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.sincronizar()
+                ultimo_erro = None
+            except Exception as e:
+                # Um erro que se repete a cada ciclo é registrado uma vez, até o observador se recuperar
+                if repr(e) != ultimo_erro:
+                    logger.exception("Erro no observador de arquivos")
+                    ultimo_erro = repr(e)
+
+    def sincronizar(self, caminhos=()):
+        """Invalida os caminhos informados e os que mudaram desde a última verificação."""
+        with self._trava:
+            atuais = _mtimes_observados()
+            alterados = [path for path in self._vistos.keys() | atuais.keys() if self._vistos.get(path) != atuais.get(path)]
+            self._vistos = atuais
+        if caminhos or alterados:
+            invalidar_fontes(list(caminhos) + alterados)
+            self.cache_quadros.invalidar(list(caminhos) + alterados)
+
+@st.cache_resource(on_release=ObservadorArquivos.parar)
+def obter_observador_arquivos():
+    return ObservadorArquivos(obter_cache_quadros())
+
+# --- ESTADO PERSISTENTE (SQLITE) ---
+
+@depende_de(STATE_DB_FILE, f"{STATE_DB_FILE}-wal")
+@st.cache_data(max_entries=4)
+def ler_metricas_diarias(versao):
+    """Fechados líquidos por dia (índice datetime64), lidos uma vez por versão do banco."""
+    return ingestao.ler_metricas_diarias()
+
+def get_daily_metrics_many(datas):
+    """Valores salvos para cada data pedida (NaN onde não há registro)."""
+    metricas = ler_metricas_diarias(versao_estado())
+    return metricas.reindex(pd.DatetimeIndex(datas).normalize())
 
 def process_uploaded_file(uploaded_file):
     if uploaded_file is None:
         return None
-    try:
-        # Lê tudo como string
-        dtype_spec = str
-        
-        if uploaded_file.name.endswith('.xlsx'):
-            df = pd.read_excel(uploaded_file, dtype=dtype_spec)
+    barra = None
+    def progresso(linhas_lidas, total_estimado):
+        nonlocal barra
+        fracao = min(linhas_lidas / total_estimado, 1.0) if total_estimado else 0.0
+        texto = f"{uploaded_file.name}: {linhas_lidas} linhas lidas"
+        if barra is None:
+            barra = st.sidebar.progress(fracao, text=texto)
         else:
-            try:
-                content = uploaded_file.getvalue().decode('utf-8')
-            except UnicodeDecodeError:
-                content = uploaded_file.getvalue().decode('latin1')
-            
-            try:
-                df = pd.read_csv(StringIO(content), sep=None, engine='python', dtype=dtype_spec)
-            except:
-                if ';' in content.split('\n')[0]:
-                    df = pd.read_csv(StringIO(content), sep=';', dtype=dtype_spec)
-                else:
-                    df = pd.read_csv(StringIO(content), sep=',', dtype=dtype_spec)
-
-        df.columns = df.columns.str.strip()
-        df.dropna(how='all', inplace=True)
-
-        # Padroniza todas as colunas de data possíveis para ISO (YYYY-MM-DD) usando input BR
-        possible_date_cols = [
-            'Data de criação', 'Data de criaÃ§Ã£o', 'Data de Criacao', 'Created', 
-            'Aberto em', 'Criado em', 'Criação', 'Data de Abertura',
-            'Data de Fechamento', 'Data de Resolução', 'Resolved', 'Closed'
-        ]
-        
-        for col in df.columns:
-            if any(p.lower() in col.lower() for p in possible_date_cols):
-                # Força BR na entrada
-                df[col] = pd.to_datetime(df[col], dayfirst=True, errors='coerce')
-
-        output = StringIO()
-        # Salva formatado como ISO para evitar confusão futura ao reler
-        df.to_csv(output, index=False, sep=';', encoding='utf-8', date_format='%Y-%m-%d %H:%M:%S')
-        return output.getvalue().encode('utf-8') 
+            barra.progress(fracao, text=texto)
+    try:
+        return ler_exportacao(uploaded_file.name, uploaded_file.getvalue(), progresso=progresso)
     except Exception as e:
         st.sidebar.error(f"Erro ao ler o arquivo {uploaded_file.name}: {e}")
         return None
+    finally:
+        if barra is not None:
+            barra.empty()
+
+def exibir_resultado_ingestao(resultado):
+    for mensagem in resultado.informacoes:
+        st.sidebar.info(mensagem)
+    if resultado.resumo:
+        st.toast(resultado.resumo)
+    for mensagem in resultado.avisos:
+        st.sidebar.warning(mensagem)
 
 def processar_dados_comparativos(df_atual, df_15dias):
-    contagem_atual = df_atual.groupby('Atribuir a um grupo').size().reset_index(name='Atual')
-    contagem_15dias = df_15dias.groupby('Atribuir a um grupo').size().reset_index(name='15 Dias Atrás')
+    contagem_atual = df_atual.groupby('Atribuir a um grupo', observed=True).size().reset_index(name='Atual')
+    contagem_15dias = df_15dias.groupby('Atribuir a um grupo', observed=True).size().reset_index(name='15 Dias Atrás')
     df_comparativo = pd.merge(contagem_atual, contagem_15dias, on='Atribuir a um grupo', how='outer').fillna(0)
     df_comparativo['Diferença'] = df_comparativo['Atual'] - df_comparativo['15 Dias Atrás']
     df_comparativo[['Atual', '15 Dias Atrás', 'Diferença']] = df_comparativo[['Atual', '15 Dias Atrás', 'Diferença']].astype(int)
     return df_comparativo
 
-@st.cache_data
-def categorizar_idade_vetorizado(dias_series):
-    condicoes = [
-        dias_series >= 30, (dias_series >= 21) & (dias_series <= 29),
-        (dias_series >= 11) & (dias_series <= 20), (dias_series >= 6) & (dias_series <= 10),
-        (dias_series >= 3) & (dias_series <= 5), (dias_series >= 0) & (dias_series <= 2)
-    ]
-    opcoes = ["30+ dias", "21-29 dias", "11-20 dias", "6-10 dias", "3-5 dias", "0-2 dias"]
-    return np.select(condicoes, opcoes, default="Erro de Categoria")
-
-@st.cache_data
-def analisar_aging(_df_atual, reference_date=None):
-    df = _df_atual.copy()
+def analisar_aging(df_atual, reference_date=None):
+    """Sem cache próprio: só é chamada por 'construir_modelo', que já é cacheada pela versão das fontes."""
+    df = df_atual.copy()
     date_col_name = None
     possible_date_cols = ['Data de criação', 'Data de criaÃ§Ã£o', 'Data de Criacao', 'Created', 'Aberto em', 'Criado em', 'Criação', 'Data de Abertura']
     for col in possible_date_cols:
@@ -301,12 +394,8 @@ def analisar_aging(_df_atual, reference_date=None):
     if not date_col_name:
         return pd.DataFrame()
     
-    # Parser: Tenta ISO primeiro (pois salvamos assim), se falhar tenta BR
-    df['temp_date'] = pd.to_datetime(df[date_col_name], errors='coerce')
-    
-    mask_nat = df['temp_date'].isna()
-    if mask_nat.any():
-        df.loc[mask_nat, 'temp_date'] = pd.to_datetime(df.loc[mask_nat, date_col_name], dayfirst=True, errors='coerce')
+    # Parser: formato (ISO, como salvamos, ou BR) detectado uma vez para a coluna
+    df['temp_date'] = normalizar_datas(df[date_col_name])
 
     # Fallback Final: Hoje
     mask_still_nat = df['temp_date'].isna()
@@ -353,11 +442,6 @@ def lighten_color(hex_color, amount=0.2):
         return f"#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}"
     except Exception: return hex_color
 
-def normalize_ids(series):
-    if series.empty:
-        return series
-    return series.astype(str).str.replace(r'\.0$', '', regex=True).str.strip()
-
 def sync_ticket_data():
     editor_key = f'ticket_editor_{st.session_state.editor_key_counter}'
     if editor_key not in st.session_state or not st.session_state[editor_key].get('edited_rows'):
@@ -365,6 +449,7 @@ def sync_ticket_data():
     edited_rows = st.session_state[editor_key]['edited_rows']
     contact_changed = False
     observation_changed = False
+    contatos_marcados, contatos_desmarcados, observacoes_alteradas = [], [], {}
     if 'last_filtered_df' not in st.session_state:
         return
     df_ref = st.session_state.last_filtered_df
@@ -375,14 +460,19 @@ def sync_ticket_data():
                 current_contact_status = ticket_id in st.session_state.contacted_tickets
                 new_contact_status = changes['Contato']
                 if current_contact_status != new_contact_status:
-                    if new_contact_status: st.session_state.contacted_tickets.add(ticket_id)
-                    else: st.session_state.contacted_tickets.discard(ticket_id)
+                    if new_contact_status:
+                        st.session_state.contacted_tickets.add(ticket_id)
+                        contatos_marcados.append(ticket_id)
+                    else:
+                        st.session_state.contacted_tickets.discard(ticket_id)
+                        contatos_desmarcados.append(ticket_id)
                     contact_changed = True
             if 'Observações' in changes:
                 current_observation = st.session_state.observations.get(ticket_id, '')
                 new_observation = changes['Observações']
                 if current_observation != new_observation:
                     st.session_state.observations[ticket_id] = new_observation
+                    observacoes_alteradas[ticket_id] = new_observation
                     observation_changed = True
         except IndexError:
             continue
@@ -390,13 +480,7 @@ def sync_ticket_data():
             continue
     if contact_changed or observation_changed:
         try:
-            if contact_changed:
-                data_to_save = list(st.session_state.contacted_tickets)
-                json_content = json.dumps(data_to_save, indent=4)
-                save_local_file(STATE_FILE_CONTACTS, json_content)
-            if observation_changed:
-                json_content = json.dumps(st.session_state.observations, indent=4, ensure_ascii=False)
-                save_local_file(STATE_FILE_OBSERVATIONS, json_content)
+            salvar_alteracoes_tickets(contatos_marcados, contatos_desmarcados, observacoes_alteradas)
             st.toast("Alterações salvas com sucesso!")
         except Exception as e:
             st.error(f"Erro ao salvar alterações: {e}")
@@ -405,143 +489,260 @@ def sync_ticket_data():
     st.session_state.editor_key_counter += 1
     st.session_state.scroll_to_details = True
 
-@st.cache_data
-def carregar_dados_evolucao(dias_para_analisar, df_historico_fechados): 
+@depende_de(SNAPSHOT_DIR)
+@st.cache_resource(max_entries=1)
+def _catalogo_snapshots(dir_mtime):
+    return SnapshotCatalog(listar_snapshots())
+
+def obter_catalogo_snapshots():
+    """Catálogo do diretório de snapshots, relistado só quando o mtime do diretório muda."""
+    return _catalogo_snapshots(get_file_mtime(SNAPSHOT_DIR))
+
+def versao_snapshots():
+    """Versão do conjunto de snapshots: muda quando um snapshot é criado, apagado ou regravado."""
+    caminhos = obter_catalogo_snapshots().caminhos
+    return max([get_file_mtime(SNAPSHOT_DIR)] + [get_file_mtime(path) for path in caminhos])
+
+def versao_fontes_criacao():
+    """Versão do backlog atual e do conjunto de snapshots, de onde saem as datas de criação."""
+    return get_file_mtime(f"{DATA_DIR}dados_atuais.csv"), versao_snapshots()
+
+@depende_de(BACKLOG_ATUAL_FILE, SNAPSHOT_DIR)
+@st.cache_data(max_entries=2)
+def indice_criacao_por_ticket(versao_fontes):
+    """Mapa chave do ticket -> data de criação, a partir do backlog atual e de todos os snapshots."""
+    df_backlog = read_local_csv(f"{DATA_DIR}dados_atuais.csv", get_file_mtime(f"{DATA_DIR}dados_atuais.csv"), excluir=COLUNAS_TEXTO_LIVRE)
+    return montar_indice_criacao(obter_catalogo_snapshots().caminhos, df_backlog, leitor=read_snapshot_colunar)
+
+def resolver_datas_criacao(df_fechados):
+    """
+    Data de criação de cada chamado fechado: a do próprio histórico e, onde faltar,
+    a do índice de backlog/snapshots. As recuperadas valem só para exibição: quem as
+    grava nas partições é a ingestão ('atualizacao_fechados' e 'python -m ingestao criacao').
+    """
+    col_criacao = coluna_data_criacao(df_fechados)
+    if col_criacao:
+        datas = normalizar_datas(df_fechados[col_criacao]).astype('datetime64[ns]')
+    else:
+        datas = pd.Series(pd.NaT, index=df_fechados.index, dtype='datetime64[ns]')
+    faltando = datas.isna()
+    if not faltando.any():
+        return datas
+    indice_criacao = indice_criacao_por_ticket(versao_fontes_criacao())
+    recuperadas = chaves_dos_ids(df_fechados[faltando]).map(indice_criacao)
+    datas[faltando] = recuperadas
+    return datas
+
+@depende_de(SNAPSHOT_DIR, HISTORICO_FECHADOS_DIR, INDICE_EVOLUCAO_FILE)
+@st.cache_data(max_entries=32)
+def carregar_dados_evolucao(dias_para_analisar, versao_historico, versao_snaps): 
+    """
+    Contagem por grupo dos últimos 'dias_para_analisar' snapshots, lida do índice de evolução.
+    'versao_historico' e 'versao_snaps' só entram na chave do cache: o índice já sabe o que recontar.
+    """
     try:
-        snapshot_dir = f"{DATA_DIR}snapshots"
-        try:
-            local_files = [os.path.join(snapshot_dir, f) for f in os.listdir(snapshot_dir) if f.endswith('.csv')]
-            if not local_files: raise FileNotFoundError
-        except FileNotFoundError: return pd.DataFrame() 
-        df_evolucao_list = []
+        indice = atualizar_indice_evolucao(catalogo=obter_catalogo_snapshots())
+        if indice.empty: return pd.DataFrame()
         end_date = date.today()
         start_date = end_date - timedelta(days=max(dias_para_analisar, 10))
-        processed_dates = []
-        for file_name in local_files:
-            if "backlog_" in file_name:
-                try:
-                    date_str = file_name.split("backlog_")[1].replace(".csv", "")
-                    file_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                    if start_date <= file_date <= end_date:
-                        processed_dates.append((file_date, file_name))
-                except: continue
-        processed_dates.sort(key=lambda x: x[0], reverse=True)
-        files_to_process = [f[1] for f in processed_dates[:dias_para_analisar]]
-        df_hist = df_historico_fechados.copy()
-        id_col_hist = next((col for col in ['ID do ticket', 'ID do Ticket', 'ID'] if col in df_hist.columns), None)
-        if id_col_hist and not df_hist.empty:
-            # Garante que lê a data corretamente do histórico
-            df_hist['Data de Fechamento_dt'] = pd.to_datetime(df_hist['Data de Fechamento'], errors='coerce').dt.normalize()
-            df_hist = df_hist.dropna(subset=['Data de Fechamento_dt', id_col_hist])
-            df_hist['Ticket ID'] = normalize_ids(df_hist[id_col_hist])
-            df_hist = df_hist[['Ticket ID', 'Data de Fechamento_dt']]
-        else:
-            df_hist = pd.DataFrame()
-        for file_name in files_to_process:
-                try:
-                    date_str = file_name.split("backlog_")[1].replace(".csv", "")
-                    file_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                    df_snapshot = read_local_csv(file_name, get_file_mtime(file_name)) 
-                    if not df_snapshot.empty and 'Atribuir a um grupo' in df_snapshot.columns:
-                        df_snapshot_filtrado = df_snapshot[~df_snapshot['Atribuir a um grupo'].str.contains(GRUPOS_EXCLUSAO_TOTAL_REGEX, case=False, na=False, regex=True)].copy()
-                        snap_id_col = next((col for col in ['ID do ticket', 'ID do Ticket', 'ID'] if col in df_snapshot_filtrado.columns), None)
-                        if snap_id_col and not df_hist.empty:
-                            df_snapshot_filtrado['Clean ID'] = normalize_ids(df_snapshot_filtrado[snap_id_col])
-                            closed_up_to_date = df_hist[df_hist['Data de Fechamento_dt'].dt.date <= file_date]['Ticket ID'].unique()
-                            df_snapshot_filtrado = df_snapshot_filtrado[
-                                ~df_snapshot_filtrado['Clean ID'].isin(closed_up_to_date)
-                            ]
-                            df_snapshot_filtrado = df_snapshot_filtrado.drop(columns=['Clean ID'])
-                        contagem_diaria = df_snapshot_filtrado.groupby('Atribuir a um grupo').size().reset_index(name='Total Chamados')
-                        contagem_diaria['Data'] = pd.to_datetime(file_date)
-                        df_evolucao_list.append(contagem_diaria)
-                except Exception: continue
-        if not df_evolucao_list: return pd.DataFrame()
-        df_consolidado = pd.concat(df_evolucao_list, ignore_index=True)
+        datas_janela = [file_date for file_date, _ in obter_catalogo_snapshots().no_intervalo(start_date, end_date)]
+        datas_selecionadas = pd.to_datetime(datas_janela[-dias_para_analisar:])
+        df_consolidado = indice[indice['Data'].isin(datas_selecionadas) & indice['Atribuir a um grupo'].notna()]
+        if df_consolidado.empty: return pd.DataFrame()
+        df_consolidado = df_consolidado[['Atribuir a um grupo', 'Total Chamados', 'Data']]
         return df_consolidado.sort_values(by=['Data', 'Atribuir a um grupo'])
     except Exception as e:
         st.error(f"Erro ao carregar evolução: {e}")
         return pd.DataFrame()
 
-@st.cache_data
-def find_closest_snapshot_before(current_report_date, target_date):
+def find_closest_snapshot_before(target_date):
     try:
-        snapshot_dir = f"{DATA_DIR}snapshots"
-        try:
-            local_files = [os.path.join(snapshot_dir, f) for f in os.listdir(snapshot_dir) if f.endswith('.csv')]
-            if not local_files: raise FileNotFoundError
-        except FileNotFoundError: return None, None 
-        snapshots = []
-        search_start_date = target_date - timedelta(days=10)
-        for file_path in local_files:
-            match = re.search(r"backlog_(\d{4}-\d{2}-\d{2})\.csv", file_path.split('/')[-1])
-            if match:
-                snapshot_date = datetime.strptime(match.group(1), "%Y-%m-%d").date()
-                if search_start_date <= snapshot_date <= target_date:
-                    snapshots.append((snapshot_date, file_path))
-        if not snapshots: return None, None
-        snapshots.sort(key=lambda x: x[0], reverse=True)
-        return snapshots[0]
+        return obter_catalogo_snapshots().mais_proximo_ate(target_date, data_minima=target_date - timedelta(days=10))
     except Exception: return None, None
 
-@st.cache_data
-def carregar_evolucao_aging(dias_para_analisar=90): 
+@depende_de(SNAPSHOT_DIR, INDICE_AGING_FILE)
+@st.cache_data(max_entries=4)
+def carregar_evolucao_aging(versao_snaps, dias_para_analisar=90): 
+    """Faixas de aging dos snapshots da janela, lidas do índice; 'versao_snaps' só entra na chave do cache."""
     try:
-        snapshot_dir = f"{DATA_DIR}snapshots"
-        try:
-            local_files = [os.path.join(snapshot_dir, f) for f in os.listdir(snapshot_dir) if f.endswith('.csv')]
-            if not local_files: raise FileNotFoundError
-        except FileNotFoundError: return pd.DataFrame() 
-        lista_historico = []
+        indice = atualizar_indice_aging(catalogo=obter_catalogo_snapshots())
+        if indice.empty: return pd.DataFrame()
         end_date = date.today() - timedelta(days=1)
         start_date = end_date - timedelta(days=max(dias_para_analisar, 60))
-        processed_files = []
-        for file_name in local_files:
-            if "backlog_" in file_name:
-                try:
-                    date_str = file_name.split("backlog_")[1].replace(".csv", "")
-                    file_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                    if start_date <= file_date <= end_date:
-                        processed_files.append((file_date, file_name))
-                except: continue
-        processed_files.sort(key=lambda x: x[0])
-        for file_date, file_name in processed_files:
-            try:
-                df_snapshot = read_local_csv(file_name, get_file_mtime(file_name)) 
-                if df_snapshot.empty: continue
-                df_filtrado = df_snapshot[~df_snapshot['Atribuir a um grupo'].str.contains(GRUPOS_EXCLUSAO_TOTAL_REGEX, case=False, na=False, regex=True)]
-                df_final = df_filtrado.copy() 
-                date_col_name = next((col for col in ['Data de criação', 'Data de criaÃ§Ã£o', 'Data de Criacao'] if col in df_final.columns), None)
-                if not date_col_name: continue
-                
-                # Tenta ISO primeiro, depois BR
-                df_final['temp_date'] = pd.to_datetime(df_final[date_col_name], errors='coerce')
-                mask_nat = df_final['temp_date'].isna()
-                if mask_nat.any():
-                    df_final.loc[mask_nat, 'temp_date'] = pd.to_datetime(df_final.loc[mask_nat, date_col_name], dayfirst=True, errors='coerce')
-                
-                df_final[date_col_name] = df_final['temp_date']
-                df_final = df_final.dropna(subset=[date_col_name])
-                snapshot_date_dt = pd.to_datetime(file_date)
-                data_criacao_normalizada = df_final[date_col_name].dt.normalize()
-                dias_calculados = (snapshot_date_dt - data_criacao_normalizada).dt.days - 1
-                dias_em_aberto_corrigido = (dias_calculados).clip(lower=0)
-                faixas_antiguidade = categorizar_idade_vetorizado(dias_em_aberto_corrigido)
-                contagem_faixas = pd.Series(faixas_antiguidade).value_counts().reset_index()
-                contagem_faixas.columns = ['Faixa de Antiguidade', 'total']
-                ordem_faixas_scaffold = ["0-2 dias", "3-5 dias", "6-10 dias", "11-20 dias", "21-29 dias", "30+ dias"]
-                df_todas_faixas = pd.DataFrame({'Faixa de Antiguidade': ordem_faixas_scaffold})
-                contagem_completa = pd.merge(df_todas_faixas, contagem_faixas, on='Faixa de Antiguidade', how='left').fillna(0)
-                contagem_completa['total'] = contagem_completa['total'].astype(int)
-                contagem_completa['data'] = snapshot_date_dt
-                lista_historico.append(contagem_completa)
-            except Exception: continue
-        if not lista_historico: return pd.DataFrame()
-        return pd.concat(lista_historico, ignore_index=True)
+        datas_janela = pd.to_datetime([file_date for file_date, _ in obter_catalogo_snapshots().no_intervalo(start_date, end_date)])
+        df_janela = indice[indice['data'].isin(datas_janela) & indice['Faixa de Antiguidade'].notna()]
+        if df_janela.empty: return pd.DataFrame()
+        return df_janela[['Faixa de Antiguidade', 'total', 'data']].reset_index(drop=True)
     except Exception as e:
         st.error(f"Erro ao carregar evolução de aging: {e}")
         return pd.DataFrame()
 
+# --- MODELO DO DASHBOARD ---
+# Tudo o que as abas exibem a partir do backlog, do backlog de 15 dias, do histórico
+# de fechados e das datas de referência é derivado uma única vez por versão desses
+# arquivos. O objeto é compartilhado entre sessões: o código de desenho só lê dele.
+
+@dataclass(frozen=True)
+class DashboardModel:
+    """
+    Modelo compartilhado por todas as sessões ('st.cache_resource'): ninguém o altera.
+    Cada execução do script usa 'para_execucao()', cujos quadros são cópias rasas (com
+    copy-on-write, uma alteração não chega ao cache); arrays de chaves, datas e pareto
+    são somente leitura.
+    """
+    versao: tuple
+    data_atual_str: str
+    data_15dias_str: str
+    hora_atualizacao_str: str
+    df_aging: pd.DataFrame
+    contagem_faixas: pd.DataFrame
+    composicao_grupos: pd.DataFrame
+    totais_grupo: pd.Series
+    pareto: MappingProxyType
+    df_comparativo: pd.DataFrame
+    grupos_aviso: pd.Series
+    chamados_sem_data: int
+    historico_vazio: bool
+    df_encerrados: pd.DataFrame
+    datas_fechamento: tuple
+    data_fechamento_display_str: str
+    chaves_abertas_base: np.ndarray
+    chaves_fechados_recentes: np.ndarray
+
+    def __post_init__(self):
+        self.chaves_abertas_base.setflags(write=False)
+        self.chaves_fechados_recentes.setflags(write=False)
+
+    def para_execucao(self):
+        quadros = {
+            campo.name: getattr(self, campo.name).copy(deep=False) for campo in fields(self)
+            if isinstance(getattr(self, campo.name), (pd.DataFrame, pd.Series))
+        }
+        return replace(self, **quadros)
+
+def calcular_pareto(totais_grupo, limite=0.80):
+    """Quantos grupos somam 80% do backlog e os totais dos grupos SAP, 3N e demais."""
+    df_pareto = totais_grupo.to_frame(name='Total')
+    df_pareto['CumulativePct'] = df_pareto['Total'].cumsum() / df_pareto['Total'].sum()
+    total_grupos = len(df_pareto)
+    num_grupos = 1
+    if df_pareto['CumulativePct'].iloc[0] <= limite:
+        num_grupos = len(df_pareto[df_pareto['CumulativePct'] <= limite]) + 1
+    num_grupos = min(num_grupos, total_grupos)
+    grupos_pareto = df_pareto.head(num_grupos)
+    return {
+        'num_grupos': num_grupos,
+        'total_grupos': total_grupos,
+        'total_chamados': df_pareto['Total'].sum(),
+        'chamados': grupos_pareto['Total'].sum(),
+        'percentual': grupos_pareto.iloc[-1]['CumulativePct'],
+        'total_sap': totais_grupo[totais_grupo.index.str.contains('SAP', case=False, na=False)].sum(),
+        'total_3n': totais_grupo[totais_grupo.index.str.contains('3N', case=False, na=False)].sum(),
+        'total_outros': totais_grupo[~totais_grupo.index.str.contains('SAP|3N', case=False, na=False)].sum(),
+    }
+
+def versao_modelo():
+    """Versão das fontes do modelo: mtimes dos backlogs, versão do histórico e datas de referência."""
+    return (
+        get_file_mtime(f"{DATA_DIR}dados_atuais.csv"),
+        get_file_mtime(f"{DATA_DIR}dados_15_dias.csv"),
+        versao_historico_fechados(),
+        get_file_mtime(STATE_FILE_REF_DATES),
+    )
+
+@depende_de(BACKLOG_ATUAL_FILE, BACKLOG_15DIAS_FILE, HISTORICO_FECHADOS_DIR, STATE_FILE_REF_DATES)
+@st.cache_resource(max_entries=2)
+def construir_modelo(versao, hoje):
+    """Monta o DashboardModel; retorna None enquanto os dois backlogs não foram carregados."""
+    mtime_atual, mtime_15dias, _, _ = versao
+    # 'Descrição' só é lida para as linhas exibidas nas tabelas de detalhe
+    df_atual = read_local_csv(f"{DATA_DIR}dados_atuais.csv", mtime_atual, excluir=COLUNAS_TEXTO_LIVRE)
+    df_15dias = read_local_csv(f"{DATA_DIR}dados_15_dias.csv", mtime_15dias, excluir=COLUNAS_TEXTO_LIVRE)
+    if df_atual.empty or df_15dias.empty:
+        return None
+
+    # Só ID, data e grupo de fechamento: as partições do histórico são lidas mês a mês na aba
+    try:
+        df_fechamentos = ler_fechamentos_por_ticket()
+    except ErroLeituraCSV:
+        # Partição ilegível: o índice não é refeito e o modelo usa o que pôde ser lido
+        df_fechamentos = ler_historico_fechados(excluir=COLUNAS_TEXTO_LIVRE)
+    datas_referencia = ler_datas_referencia(STATE_FILE_REF_DATES)
+    data_atual_str = datas_referencia.get('data_atual', 'N/A')
+
+    # IDs já normalizados e codificados em read_local_csv
+    chaves_fechadas_historico = chaves_dos_ids(df_fechamentos).unique()
+    df_abertos_base_para_reducao = df_atual[~mascara_grupos(df_atual['Atribuir a um grupo'], 'exclusao_permanente')]
+    chaves_abertas_base = chaves_dos_ids(df_abertos_base_para_reducao).unique()
+
+    df_atual_filtrado = df_abertos_base_para_reducao
+    if len(chaves_fechadas_historico):
+        df_atual_filtrado = df_atual_filtrado[~chaves_dos_ids(df_atual_filtrado).isin(chaves_fechadas_historico)]
+    df_15dias_filtrado = df_15dias[~mascara_grupos(df_15dias['Atribuir a um grupo'], 'exclusao_total')]
+
+    try:
+        ref_date_obj = datetime.strptime(data_atual_str, '%d/%m/%Y') if data_atual_str != 'N/A' else None
+    except ValueError:
+        ref_date_obj = None
+    df_aging = analisar_aging(df_atual_filtrado, reference_date=ref_date_obj)
+
+    contagem_faixas = pd.DataFrame({'Faixa de Antiguidade': ORDEM_FAIXAS, 'Quantidade': 0})
+    composicao_grupos = pd.DataFrame(columns=['Atribuir a um grupo', 'Faixa de Antiguidade', 'Quantidade'])
+    totais_grupo = pd.Series(dtype=int)
+    pareto = {}
+    if not df_aging.empty:
+        contagem = df_aging['Faixa de Antiguidade'].value_counts()
+        contagem_faixas['Quantidade'] = contagem.reindex(ORDEM_FAIXAS, fill_value=0).astype(int).to_numpy()
+        composicao_grupos = df_aging.groupby(['Atribuir a um grupo', 'Faixa de Antiguidade'], observed=True).size().reset_index(name='Quantidade')
+        composicao_grupos['Atribuir a um grupo'] = composicao_grupos['Atribuir a um grupo'].astype(str)
+        totais_grupo = composicao_grupos.groupby('Atribuir a um grupo')['Quantidade'].sum().sort_values(ascending=False)
+        if not totais_grupo.empty:
+            pareto = calcular_pareto(totais_grupo)
+
+    df_comparativo = processar_dados_comparativos(df_atual_filtrado, df_15dias_filtrado)
+    df_comparativo['Status'] = df_comparativo.apply(get_status, axis=1)
+    df_comparativo = df_comparativo.rename(columns={'Atribuir a um grupo': 'Grupo'})[['Grupo', '15 Dias Atrás', 'Atual', 'Diferença', 'Status']]
+
+    grupos_aviso = df_atual_filtrado.loc[mascara_grupos(df_atual_filtrado['Atribuir a um grupo'], 'aviso'), 'Atribuir a um grupo'].value_counts()
+    grupos_aviso = grupos_aviso[grupos_aviso > 0]
+
+    # A data de fechamento é tipada uma vez aqui; as abas só leem as datas prontas
+    df_encerrados = filtrar_historico_encerrados(df_fechamentos)
+    datas_fechamento = ()
+    data_fechamento_display_str = "Hoje"
+    chaves_fechados_recentes = np.array([], dtype='int64')
+    if not df_encerrados.empty and 'Data de Fechamento_dt_comp' in df_encerrados.columns:
+        datas_normalizadas = df_encerrados['Data de Fechamento_dt_comp'].dt.normalize()
+        ultima_data_com_dados = datas_normalizadas.max()
+        if pd.notna(ultima_data_com_dados):
+            datas_fechamento = tuple(d.strftime('%d/%m/%Y') for d in datas_normalizadas.dropna().drop_duplicates().sort_values(ascending=False))
+            ultima_data_date = ultima_data_com_dados.date()
+            data_fechamento_display_str = "HOJE" if ultima_data_date == hoje else ultima_data_date.strftime('%d/%m')
+            if any(col in df_encerrados.columns for col in ['ID do ticket', 'ID do Ticket', 'ID']):
+                chaves_fechadas = chaves_dos_ids(df_encerrados[datas_normalizadas == ultima_data_com_dados])
+                chaves_fechados_recentes = chaves_fechadas[chaves_fechadas.isin(chaves_abertas_base)].unique()
+
+    return DashboardModel(
+        versao=versao,
+        data_atual_str=data_atual_str,
+        data_15dias_str=datas_referencia.get('data_15dias', 'N/A'),
+        hora_atualizacao_str=datas_referencia.get('hora_atualizacao', ''),
+        df_aging=df_aging,
+        contagem_faixas=contagem_faixas,
+        composicao_grupos=composicao_grupos,
+        totais_grupo=totais_grupo,
+        pareto=MappingProxyType(pareto),
+        df_comparativo=df_comparativo,
+        grupos_aviso=grupos_aviso,
+        chamados_sem_data=len(df_atual_filtrado) - len(df_aging),
+        historico_vazio=df_fechamentos.empty,
+        df_encerrados=df_encerrados,
+        datas_fechamento=datas_fechamento,
+        data_fechamento_display_str=data_fechamento_display_str,
+        chaves_abertas_base=chaves_abertas_base,
+        chaves_fechados_recentes=chaves_fechados_recentes,
+    )
+
 def formatar_delta_card(delta_abs, delta_perc, valor_comparacao, data_comparacao_str):
     delta_abs = int(delta_abs)
     if valor_comparacao > 0:
@@ -558,6 +759,629 @@ def formatar_delta_card(delta_abs, delta_perc, valor_comparacao, data_comparacao
     else: delta_class = "delta-neutral"
     return delta_text, delta_class
 
+# --- SEÇÕES COM RERUN PRÓPRIO (FRAGMENTS) ---
+# Cada seção interativa é um fragment: um widget dentro dela reexecuta só a seção,
+# com os dados recebidos por parâmetro, sem recalcular as demais abas.
+
+@st.fragment
+def secao_historico_encerrados(modelo, can_edit_table):
+    data_dt_filtro = None 
+    df_encerrados_filtrado = modelo.df_encerrados
+    hoje_sp = datetime.now(ZoneInfo('America/Sao_Paulo')).date()
+
+    if modelo.historico_vazio:
+        st.info("O histórico de chamados encerrados ainda não possui dados. Faça uma 'Atualização Rápida' para começar a popular.")
+    elif not df_encerrados_filtrado.empty:
+
+        try:
+            if not modelo.datas_fechamento:
+                st.warning("Não há datas de fechamento válidas no histórico.")
+                df_encerrados_para_exibir = df_encerrados_filtrado.copy()
+            else:
+                # As datas vêm do modelo em ordem decrescente: a mais recente é o padrão
+                data_selecionada = st.selectbox(
+                    "Filtrar por Data de Fechamento:", 
+                    options=modelo.datas_fechamento, 
+                    key="filtro_data_fechados",
+                    index=0 
+                )
+
+                data_dt_filtro = datetime.strptime(data_selecionada, '%d/%m/%Y').date()
+                # Só a partição do mês da data escolhida é lida para montar a tabela
+                df_encerrados_para_exibir = filtrar_historico_encerrados(ler_historico_fechados(meses=[data_dt_filtro.strftime('%Y-%m')]))
+                df_encerrados_para_exibir = df_encerrados_para_exibir[df_encerrados_para_exibir['Data de Fechamento_dt_comp'].dt.normalize() == pd.Timestamp(data_dt_filtro)].copy()
+
+        except Exception as e:
+            st.error(f"Erro ao processar datas de fechamento: {e}")
+            df_encerrados_para_exibir = df_encerrados_filtrado.copy()
+
+        colunas_para_exibir_fechados = ['Status', 'ID do ticket', 'Descrição']
+
+        analista_col = next((c for c in ['Analista atribuído', 'Analista'] if c in df_encerrados_para_exibir.columns), None)
+        if analista_col: 
+            df_encerrados_para_exibir.rename(columns={analista_col: "Analista de Resolução"}, inplace=True)
+            colunas_para_exibir_fechados.append("Analista de Resolução")
+
+        grupo_col = next((c for c in ['Atribuir a um grupo', 'Grupo Atribuído'] if c in df_encerrados_para_exibir.columns), None)
+        if grupo_col: 
+            df_encerrados_para_exibir.rename(columns={grupo_col: "Grupo Atribuído"}, inplace=True)
+            colunas_para_exibir_fechados.append("Grupo Atribuído")
+
+        # Data de criação do histórico, completada pelo backlog/snapshots
+        df_encerrados_para_exibir['data_criacao_recuperada'] = resolver_datas_criacao(df_encerrados_para_exibir)
+        # ---------------------------------------------------------------
+
+        if 'Data de Fechamento' in df_encerrados_para_exibir.columns:
+            try:
+                dt_inicio = df_encerrados_para_exibir['data_criacao_recuperada'].dt.normalize()
+                dt_fim = normalizar_datas(df_encerrados_para_exibir['Data de Fechamento']).dt.normalize()
+
+                df_encerrados_para_exibir['Dias em Aberto'] = (dt_fim - dt_inicio).dt.days
+
+                df_encerrados_para_exibir['Dias em Aberto'] = (df_encerrados_para_exibir['Dias em Aberto'] - 1).fillna(0).clip(lower=0).astype(int)
+
+            except Exception as e:
+                st.warning(f"Erro ao calcular datas: {e}")
+                df_encerrados_para_exibir['Dias em Aberto'] = 0
+        else:
+            df_encerrados_para_exibir['Dias em Aberto'] = 0
+
+        colunas_para_exibir_fechados.append('Dias em Aberto')
+
+        if 'Data de Fechamento_dt_comp' in df_encerrados_para_exibir.columns:
+            df_encerrados_para_exibir['Data de Fechamento'] = df_encerrados_para_exibir['Data de Fechamento_dt_comp'].dt.strftime('%d/%m/%Y')
+            colunas_para_exibir_fechados.append('Data de Fechamento')
+
+        id_col_encerrados = next((col for col in ['ID do ticket', 'ID do Ticket', 'ID'] if col in df_encerrados_para_exibir.columns), None)
+        chaves_fechadas_anteriores = codificar_ids(read_local_json_file(STATE_FILE_PREV_CLOSED, get_file_mtime(STATE_FILE_PREV_CLOSED), default_return_type='list'))
+
+        if id_col_encerrados:
+            novos = ~chaves_dos_ids(df_encerrados_para_exibir).isin(chaves_fechadas_anteriores)
+            df_encerrados_para_exibir['Status'] = np.where(novos, "Novo", "")
+        else:
+            df_encerrados_para_exibir['Status'] = ""
+
+        # LÓGICA DE FILTRO LÍQUIDO PARA A TABELA (TAB 1)
+        if 'data_criacao_recuperada' in df_encerrados_para_exibir.columns and 'Data de Fechamento' in df_encerrados_para_exibir.columns:
+            c_date = df_encerrados_para_exibir['data_criacao_recuperada'].dt.normalize()
+            e_date = normalizar_datas(df_encerrados_para_exibir['Data de Fechamento']).dt.normalize()
+            df_encerrados_para_exibir = df_encerrados_para_exibir[c_date != e_date]
+        # ---------------------------------------------------------
+
+        is_viewing_today = False
+        if data_dt_filtro:
+            is_viewing_today = (data_dt_filtro == hoje_sp)
+
+        if is_viewing_today and id_col_encerrados:
+            df_encerrados_para_exibir = df_encerrados_para_exibir[
+                chaves_dos_ids(df_encerrados_para_exibir).isin(modelo.chaves_abertas_base)
+            ]
+            st.caption("Mostrando apenas chamados fechados HOJE que causaram redução no backlog ATUAL.")
+        elif not is_viewing_today and data_dt_filtro:
+            st.caption(f"Mostrando histórico completo de chamados fechados em {data_selecionada} (Líquido: sem Fast Kills).")
+
+        df_encerrados_para_exibir = df_encerrados_para_exibir.loc[:, ~df_encerrados_para_exibir.columns.duplicated()]
+        colunas_finais = [col for col in colunas_para_exibir_fechados if col in df_encerrados_para_exibir.columns]
+
+        if df_encerrados_para_exibir.empty:
+            if is_viewing_today:
+                st.info(f"Nenhum chamado fechado em {data_selecionada} constava no backlog atual (ou o backlog já foi atualizado).")
+            elif data_dt_filtro:
+                st.info(f"Não há registros de chamados fechados para {data_selecionada}.")
+        else:
+            colunas_desabilitadas_fixas = [
+                'ID do ticket', 'Descrição', 'Grupo Atribuído', 
+                'Dias em Aberto', 'Data de criação'
+            ]
+            colunas_editaveis_admin = [
+                'Contato', 'Observações'
+            ]
+            if can_edit_table:
+                colunas_desabilitadas_final = colunas_desabilitadas_fixas
+            else:
+                colunas_desabilitadas_final = colunas_desabilitadas_fixas + colunas_editaveis_admin
+
+            st.data_editor(
+                df_encerrados_para_exibir[colunas_finais], 
+                hide_index=True, 
+                disabled=True, 
+                use_container_width=True,
+                column_config={
+                    "Status": st.column_config.Column(width="small"),
+                    "Dias em Aberto": st.column_config.NumberColumn(
+                        "Dias em Aberto",
+                        help="Calculado: (Data Fechamento - Data Criação) - 1 dia.",
+                        format="%d" 
+                    )
+                }
+            )
+    else:
+        st.info("O arquivo de chamados encerrados do dia ainda não foi carregado.")
+
+@st.fragment
+def secao_detalhes_faixa(df_aging, can_edit_table):
+    st.selectbox("Selecione uma faixa de idade para ver os detalhes (ou clique em um card acima):", 
+                    options=ORDEM_FAIXAS, 
+                    key='faixa_selecionada',
+                    on_change=sync_ticket_data)
+
+    faixa_atual = st.session_state.faixa_selecionada
+    if not df_aging.empty:
+        filtered_df = df_aging[df_aging['Faixa de Antiguidade'] == faixa_atual].copy()
+        if not filtered_df.empty:
+            filtered_df = anexar_textos_tickets(filtered_df, f"{DATA_DIR}dados_atuais.csv")
+            if 'Data de criação' in filtered_df.columns:
+                    filtered_df['Data de criação'] = filtered_df['Data de criação'].dt.strftime('%d/%m/%Y')
+
+            def highlight_row(row):
+                return ['background-color: #fff8c4'] * len(row) if row['Contato'] else [''] * len(row)
+
+            filtered_df['Contato'] = filtered_df['ID do ticket'].apply(lambda id: str(id) in st.session_state.contacted_tickets)
+            filtered_df['Observações'] = filtered_df['ID do ticket'].apply(lambda id: st.session_state.observations.get(str(id), ''))
+
+            st.session_state.last_filtered_df = filtered_df.reset_index(drop=True)
+
+            colunas_para_exibir_renomeadas = {
+                'Contato': 'Contato',
+                'ID do ticket': 'ID do ticket',
+                'Descrição': 'Descrição',
+                'Atribuir a um grupo': 'Grupo Atribuído',
+                'Dias em Aberto': 'Dias em Aberto',
+                'Data de criação': 'Data de criação',
+                'Observações': 'Observações'
+            }
+
+            colunas_desabilitadas_fixas = [
+                'ID do ticket', 'Descrição', 'Grupo Atribuído', 
+                'Dias em Aberto', 'Data de criação'
+            ]
+            colunas_editaveis_admin = [
+                'Contato', 'Observações'
+            ]
+
+            if can_edit_table:
+                colunas_desabilitadas_final = colunas_desabilitadas_fixas
+            else:
+                colunas_desabilitadas_final = colunas_desabilitadas_fixas + colunas_editaveis_admin
+
+            st.data_editor(
+                st.session_state.last_filtered_df.rename(columns=colunas_para_exibir_renomeadas)[list(colunas_para_exibir_renomeadas.values())].style.apply(highlight_row, axis=1),
+                use_container_width=True,
+                hide_index=True,
+                disabled=colunas_desabilitadas_final, 
+                key=f'ticket_editor_{st.session_state.editor_key_counter}'
+            )
+
+            st.button(
+                "Salvar Contatos e Observações",
+                on_click=sync_ticket_data,
+                type="primary",
+                disabled=not can_edit_table 
+            )
+
+        else:
+            st.info("Não há chamados nesta categoria.")
+
+@st.fragment
+def secao_busca_grupo(df_aging):
+    lista_grupos = sorted(df_aging['Atribuir a um grupo'].dropna().unique())
+    grupo_selecionado = st.selectbox("Busca de chamados por grupo:", options=lista_grupos)
+    if grupo_selecionado:
+        resultados_busca = df_aging[df_aging['Atribuir a um grupo'] == grupo_selecionado].copy()
+        resultados_busca = anexar_textos_tickets(resultados_busca, f"{DATA_DIR}dados_atuais.csv")
+        if 'Data de criação' in resultados_busca.columns:
+            resultados_busca['Data de criação'] = resultados_busca['Data de criação'].dt.strftime('%d/%m/%Y')
+        st.write(f"Encontrados {len(resultados_busca)} chamados para o grupo '{grupo_selecionado}':")
+        colunas_para_exibir_busca = ['ID do ticket', 'Descrição', 'Dias em Aberto', 'Data de criação']
+        st.data_editor(resultados_busca[[col for col in colunas_para_exibir_busca if col in resultados_busca.columns]], use_container_width=True, hide_index=True, disabled=True)
+
+@st.fragment
+def grafico_composicao_grupos(chart_data, group_totals):
+    # O fragment reexecuta com os mesmos objetos: os rótulos são aplicados em uma cópia
+    chart_data = chart_data.copy()
+    orientation_choice = st.radio( "Orientação do Gráfico:", ["Vertical", "Horizontal"], index=0, horizontal=True )
+
+    new_labels_map = {group: f"{group} ({total})" for group, total in group_totals.items()}
+    chart_data['Atribuir a um grupo'] = chart_data['Atribuir a um grupo'].map(new_labels_map)
+    sorted_new_labels = [new_labels_map[group] for group in group_totals.index]
+    def lighten_color(hex_color, amount=0.2):
+        try:
+            hex_color = hex_color.lstrip('#')
+            h, l, s = colorsys.rgb_to_hls(*[int(hex_color[i:i+2], 16)/255.0 for i in (0, 2, 4)])
+            new_l = l + (1 - l) * amount
+            r, g, b = colorsys.hls_to_rgb(h, new_l, s)
+            return f"#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}"
+        except Exception: return hex_color
+    base_color = "#375623"
+    palette = [ lighten_color(base_color, 0.85), lighten_color(base_color, 0.70), lighten_color(base_color, 0.55), lighten_color(base_color, 0.40), lighten_color(base_color, 0.20), base_color ]
+    color_map = {faixa: color for faixa, color in zip(ORDEM_FAIXAS, palette)}
+
+    if orientation_choice == 'Horizontal':
+        num_groups = len(group_totals)
+        dynamic_height = max(500, num_groups * 30)
+        fig_stacked_bar = px.bar( chart_data, x='Quantidade', y='Atribuir a um grupo', orientation='h', color='Faixa de Antiguidade', title="Composição da Idade do Backlog por Grupo", labels={'Quantidade': 'Qtd. de Chamados', 'Atribuir a um grupo': ''}, category_orders={'Atribuir a um grupo': sorted_new_labels, 'Faixa de Antiguidade': ORDEM_FAIXAS}, color_discrete_map=color_map, text_auto=True )
+        fig_stacked_bar.update_traces(textangle=0, textfont_size=12)
+        fig_stacked_bar.update_layout(height=dynamic_height, legend_title_text='Antiguidade')
+    else:
+        fig_stacked_bar = px.bar( chart_data, x='Atribuir a um grupo', y='Quantidade', color='Faixa de Antiguidade', title="Composição da Idade do Backlog por Grupo", labels={'Quantidade': 'Qtd. de Chamados', 'Atribuir a um grupo': 'Grupo'}, category_orders={'Atribuir a um grupo': sorted_new_labels, 'Faixa de Antiguidade': ORDEM_FAIXAS}, color_discrete_map=color_map, text_auto=True )
+        fig_stacked_bar.update_traces(textangle=0, textfont_size=12)
+        fig_stacked_bar.update_layout(height=600, xaxis_title=None, xaxis_tickangle=-45, legend_title_text='Antiguidade')
+
+    st.plotly_chart(fig_stacked_bar, use_container_width=True)
+
+@st.fragment
+def aba_evolucao_semanal(modelo):
+    st.subheader("Evolução do Backlog")
+    dias_evolucao = st.slider("Ver evolução dos últimos dias:", min_value=7, max_value=365, value=7, key="slider_evolucao")
+
+    # PASSA O BACKLOG BASE PARA A FUNÇÃO DE CARREGAR DADOS (PARA RECUPERAÇÃO DE DATAS)
+    df_evolucao_tab3 = carregar_dados_evolucao(dias_evolucao, versao_historico_fechados(), versao_snapshots()) 
+
+    if not df_evolucao_tab3.empty:
+
+        df_evolucao_tab3['Data'] = pd.to_datetime(df_evolucao_tab3['Data'])
+        df_evolucao_tab3 = df_evolucao_tab3[df_evolucao_tab3['Data'].dt.dayofweek < 5].copy()
+
+        if not df_evolucao_tab3.empty:
+
+            st.info("Esta visualização combina os snapshots diários com o histórico de fechamentos.")
+
+            try:
+                latest_date_in_chart = df_evolucao_tab3['Data'].max()
+
+                agregado_agora = modelo.totais_grupo.rename_axis('Atribuir a um grupo').reset_index(name='Total Chamados')
+
+                if modelo.data_atual_str != 'N/A':
+                     date_agora = datetime.strptime(modelo.data_atual_str, '%d/%m/%Y')
+                else:
+                     date_agora = datetime.now()
+
+                agregado_agora['Data'] = pd.to_datetime(date_agora)
+
+                if not df_evolucao_tab3.empty:
+                     df_evolucao_tab3 = df_evolucao_tab3[df_evolucao_tab3['Data'].dt.normalize() != pd.Timestamp(date_agora.date())]
+
+                df_evolucao_tab3 = pd.concat([df_evolucao_tab3, agregado_agora], ignore_index=True)
+                df_evolucao_tab3 = df_evolucao_tab3.sort_values(by=['Data', 'Atribuir a um grupo'])
+                df_evolucao_tab3 = df_evolucao_tab3[~mascara_grupos(df_evolucao_tab3['Atribuir a um grupo'], 'exclusao_total')]
+
+            except Exception as e:
+                pass
+
+            df_total_abertos = df_evolucao_tab3.groupby('Data')['Total Chamados'].sum().reset_index()
+            df_total_abertos = df_total_abertos.sort_values('Data')
+            df_total_abertos['Tipo'] = 'Abertos (Backlog)'
+
+            end_date_tab3 = date.today()
+            start_date_tab3 = end_date_tab3 - timedelta(days=dias_evolucao)
+
+            df_total_fechados = pd.DataFrame()
+
+            # Só as partições dos meses da janela do gráfico são lidas
+            df_fechados_hist = filtrar_historico_encerrados(ler_historico_fechados(meses=meses_no_intervalo(start_date_tab3, end_date_tab3), excluir=COLUNAS_TEXTO_LIVRE))
+            if not df_fechados_hist.empty and 'Data de Fechamento' in df_fechados_hist.columns:
+                df_fechados_hist = df_fechados_hist[df_fechados_hist['Data de Fechamento_dt_comp'] >= pd.Timestamp(start_date_tab3)].copy()
+
+                # --- RECUPERAÇÃO DE DADOS P/ O GRÁFICO USANDO MEMÓRIA FIXA ---
+                # Se o número do dia já estiver salvo na memória, usamos ele.
+                # Caso contrário, tentamos calcular.
+
+                # Uma única junção das datas do gráfico com as métricas salvas;
+                # dias sem registro (antigos, antes da correção) ficam de fora
+                datas_unicas = df_fechados_hist['Data de Fechamento_dt_comp'].dropna().dt.normalize().unique()
+                valores_memoria = get_daily_metrics_many(datas_unicas).dropna()
+
+                # Se conseguimos recuperar da memória, usamos esses valores como fonte principal
+                if not valores_memoria.empty:
+                    df_total_fechados = valores_memoria.astype(int).rename_axis('Data').reset_index(name='Total Chamados')
+                    df_total_fechados['Tipo'] = 'Fechados'
+
+                # Se a memória estiver vazia (primeiro uso), calculamos dinamicamente com o filtro fast-kill
+                if df_total_fechados.empty:
+                    # Mesma data de criação resolvida da tabela da aba 1
+                    df_fechados_hist['dt_cri_temp'] = resolver_datas_criacao(df_fechados_hist)
+
+                    df_fechados_hist['dt_fec_temp'] = df_fechados_hist['Data de Fechamento_dt_comp'].dt.normalize()
+
+                    # FILTRO LÍQUIDO PARA O GRÁFICO: Remove Fast Kill
+                    df_fechados_hist = df_fechados_hist[df_fechados_hist['dt_cri_temp'].dt.normalize() != df_fechados_hist['dt_fec_temp']]
+
+                    counts_por_data = df_fechados_hist.groupby(df_fechados_hist['dt_fec_temp'].rename('Data de Fechamento_dt_comp')).size()
+                    df_total_fechados = counts_por_data.reset_index(name='Total Chamados')
+                    df_total_fechados.rename(columns={'Data de Fechamento_dt_comp': 'Data'}, inplace=True)
+                    df_total_fechados['Data'] = pd.to_datetime(df_total_fechados['Data'])
+                    df_total_fechados['Tipo'] = 'Fechados'
+
+            if not df_total_fechados.empty:
+                df_total_diario_combinado = pd.concat([df_total_abertos, df_total_fechados], ignore_index=True)
+            else:
+                df_total_diario_combinado = df_total_abertos
+
+            df_total_diario_combinado = df_total_diario_combinado.sort_values('Data')
+
+            df_total_diario_combinado['Data (Eixo)'] = df_total_diario_combinado['Data'].dt.strftime('%d/%m')
+            ordem_datas_total = df_total_diario_combinado['Data (Eixo)'].unique().tolist()
+
+            fig_total_evolucao = px.line(
+                df_total_diario_combinado,
+                x='Data (Eixo)',
+                y='Total Chamados',
+                color='Tipo',
+                title='Evolução Total de Chamados: Backlog Líquido vs. Fechados (Líquido)',
+                markers=True,
+                labels={"Data (Eixo)": "Data", "Total Chamados": "Total Geral de Chamados", "Tipo": "Métrica"},
+                category_orders={'Data (Eixo)': ordem_datas_total},
+                color_discrete_map={
+                    'Abertos (Backlog)': '#375623', 
+                    'Fechados': '#f28801' 
+                }
+            )
+
+            fig_total_evolucao.update_layout(height=400)
+            st.plotly_chart(fig_total_evolucao, use_container_width=True)
+
+            st.markdown("---")
+
+            st.info("Clique 2x na legenda de um grupo para isolá-lo.")
+
+            df_evolucao_tab3_sorted = df_evolucao_tab3.sort_values('Data')
+            df_evolucao_tab3_sorted['Data (Eixo)'] = df_evolucao_tab3_sorted['Data'].dt.strftime('%d/%m')
+
+            ordem_datas_grupo = df_evolucao_tab3_sorted['Data (Eixo)'].unique().tolist()
+
+            df_filtrado_display = df_evolucao_tab3_sorted.rename(columns={'Atribuir a um grupo': 'Grupo Atribuído'})
+
+            fig_evolucao_grupo = px.line(
+                df_filtrado_display,
+                x='Data (Eixo)',
+                y='Total Chamados',
+                color='Grupo Atribuído',
+                title='Evolução por Grupo (Apenas Backlog Aberto)',
+                markers=True,
+                labels={ "Data (Eixo)": "Data", "Total Chamados": "Nº de Chamados", "Grupo Atribuído": "Grupo" },
+                category_orders={'Data (Eixo)': ordem_datas_grupo}
+            )
+            fig_evolucao_grupo.update_layout(height=600)
+            st.plotly_chart(fig_evolucao_grupo, use_container_width=True)
+
+    else:
+        st.info("Ainda não há dados históricos de backlog suficientes.")
+
+@st.fragment
+def aba_report_visual(modelo):
+    st.subheader("Resumo do Backlog Atual")
+    if not modelo.df_aging.empty:
+
+        total_chamados_tab2 = len(modelo.df_aging)
+        _, col_total_tab2, _ = st.columns([2, 1.5, 2])
+        with col_total_tab2: st.markdown( f"""<div class="metric-box"><span class="label">Total de Chamados</span><span class="value">{total_chamados_tab2}</span></div>""", unsafe_allow_html=True )
+        st.markdown("---")
+        cols_tab2 = st.columns(len(ORDEM_FAIXAS))
+        for i, row in modelo.contagem_faixas.iterrows():
+            with cols_tab2[i]: st.markdown( f"""<div class="metric-box"><span class="label">{row['Faixa de Antiguidade']}</span><span class="value">{row['Quantidade']}</span></div>""", unsafe_allow_html=True )
+        st.markdown("---")
+        st.subheader("Distribuição do Backlog por Grupo")
+
+        group_totals = modelo.totais_grupo
+
+        if not group_totals.empty:
+
+            grafico_composicao_grupos(modelo.composicao_grupos, group_totals)
+
+            pareto = modelo.pareto
+            total_backlog_geral = pareto['total_chamados']
+
+            top_3_groups = group_totals.head(3)
+
+            summary_text = [f"**Análise Rápida (Princípio de Pareto):**\n"]
+            summary_text.append(f"* Nossa análise mostra que **{pareto['num_grupos']}** grupos (de um total de **{pareto['total_grupos']}**) são responsáveis por **{pareto['chamados']}** chamados, o que representa **{pareto['percentual']:.0%}** de todo o backlog (de {total_backlog_geral} chamados).\n")
+            summary_text.append(f"* Os 3 grupos de maior impacto são:\n")
+
+            list_items = []
+            for i, (group, count) in enumerate(top_3_groups.items(), 1):
+                list_items.append(f"    {i}.  **{group}** ({count} chamados)")
+            summary_text.append("\n".join(list_items))
+
+            summary_text.append(f"\n**Análise por Categoria:**\n")
+
+            total_sap, total_3n, total_outros = pareto['total_sap'], pareto['total_3n'], pareto['total_outros']
+            summary_text.append(f"* Grupos contendo 'SAP' representam **{total_sap}** chamados ({total_sap/total_backlog_geral:.0%}).")
+            summary_text.append(f"* Grupos contendo '3N' representam **{total_3n}** chamados ({total_3n/total_backlog_geral:.0%}).")
+            summary_text.append(f"* Os demais grupos (sem 'SAP' ou '3N') somam **{total_outros}** chamados ({total_outros/total_backlog_geral:.0%}).")
+
+            if (total_sap + total_3n + total_outros) != total_backlog_geral:
+                    summary_text.append(f"\n*(Nota: Pode haver sobreposição nos totais acima se um grupo contiver 'SAP' e '3N'.)*")
+
+            st.info("\n".join(summary_text))
+    else:
+        st.warning("Nenhum dado para gerar o report visual.")
+
+@st.fragment
+def aba_evolucao_aging(modelo):
+    st.subheader("Evolução do Aging do Backlog")
+
+    st.info("Esta visualização ainda está coletando dados históricos. Utilize as outras abas como referência principal por enquanto.")
+
+    try:
+        df_hist = carregar_evolucao_aging(versao_snapshots(), dias_para_analisar=90) 
+
+        hoje_data = None
+        hoje_counts_df = pd.DataFrame()
+
+        if not modelo.df_aging.empty and modelo.data_atual_str != 'N/A':
+            try:
+                hoje_data = pd.to_datetime(datetime.strptime(modelo.data_atual_str, "%d/%m/%Y").date())
+                hoje_counts_df = modelo.contagem_faixas.rename(columns={'Quantidade': 'total'}).assign(data=hoje_data)
+            except ValueError:
+                st.warning("Data atual inválida. Não foi possível carregar dados de 'hoje'.")
+                hoje_data = None
+        else:
+            st.warning("Não foi possível carregar dados de 'hoje'.")
+
+
+        if not df_hist.empty and not hoje_counts_df.empty:
+            df_combinado = pd.concat([df_hist, hoje_counts_df], ignore_index=True)
+            df_combinado = df_combinado.drop_duplicates(subset=['data', 'Faixa de Antiguidade'], keep='last')
+        elif not df_hist.empty:
+            df_combinado = df_hist.copy()
+        elif not hoje_counts_df.empty:
+            df_combinado = hoje_counts_df.copy()
+        else:
+            st.error("Não há dados históricos nem dados de hoje para a análise de aging.")
+            st.stop()
+
+        df_combinado['data'] = pd.to_datetime(df_combinado['data'])
+        df_combinado = df_combinado.sort_values(by=['data', 'Faixa de Antiguidade'])
+
+
+        cards_comparativo_aging(df_combinado, hoje_data, hoje_counts_df)
+
+        st.divider()
+
+        grafico_evolucao_aging(df_combinado)
+
+    except Exception as e:
+        st.error(f"Ocorreu um erro ao gerar a aba de Evolução Aging: {e}")
+        st.exception(e)
+
+@st.fragment
+def cards_comparativo_aging(df_combinado, hoje_data, hoje_counts_df):
+    st.markdown("##### Comparativo")
+    periodo_comp_opts = {
+        "Ontem": 1,
+        "7 dias atrás": 7,
+        "15 dias atrás": 15,
+        "30 dias atrás": 30
+    }
+    periodo_comp_selecionado = st.radio(
+        "Comparar 'Hoje' com:",
+        options=periodo_comp_opts.keys(),
+        horizontal=True,
+        key="radio_comp_periodo"
+    )
+
+    data_comparacao_final = None
+    df_comparacao_dados = pd.DataFrame()
+    data_comparacao_str = "N/A"
+
+    if hoje_data:
+        target_comp_date = hoje_data.date() - timedelta(days=periodo_comp_opts[periodo_comp_selecionado])
+        data_comparacao_encontrada, _ = find_closest_snapshot_before(target_comp_date) 
+
+        if data_comparacao_encontrada:
+            data_comparacao_final = pd.to_datetime(data_comparacao_encontrada)
+            data_comparacao_str = data_comparacao_final.strftime('%d/%m')
+            df_comparacao_dados = df_combinado[df_combinado['data'] == data_comparacao_final].copy()
+        else:
+            st.warning(f"Não foi encontrado snapshot próximo a {periodo_comp_selecionado} ({target_comp_date.strftime('%d/%m')}). A comparação pode não ser precisa.")
+
+
+    cols_linha1 = st.columns(3)
+    cols_linha2 = st.columns(3)
+    cols_map = {0: cols_linha1[0], 1: cols_linha1[1], 2: cols_linha1[2], 
+                3: cols_linha2[0], 4: cols_linha2[1], 5: cols_linha2[2]}
+
+    for i, faixa in enumerate(ORDEM_FAIXAS):
+        with cols_map[i]:
+            valor_hoje = 'N/A'
+            if not hoje_counts_df.empty:
+                valor_hoje_series = hoje_counts_df.loc[hoje_counts_df['Faixa de Antiguidade'] == faixa, 'total']
+                if not valor_hoje_series.empty:
+                    valor_hoje = int(valor_hoje_series.iloc[0])
+
+            valor_comparacao = 0
+            delta_text = "N/A"
+            delta_class = "delta-neutral"
+
+            if data_comparacao_final and not df_comparacao_dados.empty and isinstance(valor_hoje, int):
+                valor_comp_series = df_comparacao_dados.loc[df_comparacao_dados['Faixa de Antiguidade'] == faixa, 'total']
+                if not valor_comp_series.empty:
+                    valor_comparacao = int(valor_comp_series.iloc[0])
+
+                delta_abs = valor_hoje - valor_comparacao
+                delta_perc = (delta_abs / valor_comparacao) if valor_comparacao > 0 else 0
+                delta_text, delta_class = formatar_delta_card(delta_abs, delta_perc, valor_comparacao, data_comparacao_str)
+            elif isinstance(valor_hoje, int):
+                delta_text = "Sem dados para comparar"
+
+            st.markdown(f"""
+            <div class="metric-box">
+                <span class="label">{faixa}</span>
+                <span class="value">{valor_hoje}</span>
+                <span class="delta {delta_class}">{delta_text}</span>
+            </div>
+            """, unsafe_allow_html=True)
+
+@st.fragment
+def grafico_evolucao_aging(df_combinado):
+    st.markdown(f"##### Gráfico de Evolução (Últimos 7 dias)")
+
+    periodo_grafico = "Últimos 7 dias"
+    hoje_filtro_grafico = datetime.now().date()
+    data_inicio_filtro_grafico = hoje_filtro_grafico - timedelta(days=7)
+    df_filtrado_grafico = df_combinado[df_combinado['data'] >= pd.Timestamp(data_inicio_filtro_grafico)].copy()
+
+
+    if df_filtrado_grafico.empty:
+        st.warning("Não há dados para o período selecionado.")
+    else:
+        df_grafico = df_filtrado_grafico.sort_values(by='data')
+        df_grafico['Data (Eixo)'] = df_grafico['data'].dt.strftime('%d/%m')
+        ordem_datas_grafico = df_grafico['Data (Eixo)'].unique().tolist()
+
+        def lighten_color(hex_color, amount=0.2):
+            try:
+                hex_color = hex_color.lstrip('#')
+                h, l, s = colorsys.rgb_to_hls(*[int(hex_color[i:i+2], 16)/255.0 for i in (0, 2, 4)])
+                new_l = l + (1 - l) * amount
+                r, g, b = colorsys.hls_to_rgb(h, new_l, s)
+                return f"#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}"
+            except Exception: return hex_color
+        base_color = "#375623"
+        palette = [ lighten_color(base_color, 0.85), lighten_color(base_color, 0.70), lighten_color(base_color, 0.55), lighten_color(base_color, 0.40), lighten_color(base_color, 0.20), base_color ]
+        color_map = {faixa: color for faixa, color in zip(ORDEM_FAIXAS, palette)}
+
+        tipo_grafico = st.radio(
+            "Selecione o tipo de gráfico:",
+            ("Gráfico de Linha (Comparativo)", "Gráfico de Área (Composição)"),
+            horizontal=True,
+            key="radio_tipo_grafico_aging"
+        )
+
+        if tipo_grafico == "Gráfico de Linha (Comparativo)":
+            fig_aging_all = px.line(
+                df_grafico,
+                x='Data (Eixo)',
+                y='total',
+                color='Faixa de Antiguidade',
+                title='Evolução por Faixa de Antiguidade',
+                markers=True,
+                labels={"Data (Eixo)": "Data", "total": "Total Chamados", "Faixa de Antiguidade": "Faixa"},
+                category_orders={
+                    'Data (Eixo)': ordem_datas_grafico,
+                    'Faixa de Antiguidade': ORDEM_FAIXAS
+                },
+                color_discrete_map=color_map
+            )
+        else:
+            fig_aging_all = px.area(
+                df_grafico,
+                x='Data (Eixo)',
+                y='total',
+                color='Faixa de Antiguidade',
+                title='Composição da Evolução por Antiguidade',
+                markers=True,
+                labels={"Data (Eixo)": "Data", "total": "Total Chamados", "Faixa de Antiguidade": "Faixa"},
+                category_orders={
+                    'Data (Eixo)': ordem_datas_grafico,
+                    'Faixa de Antiguidade': ORDEM_FAIXAS
+                },
+                color_discrete_map=color_map
+            )
+
+        fig_aging_all.update_layout(height=500)
+        st.plotly_chart(fig_aging_all, use_container_width=True)
+
 logo_copa_b64 = get_image_as_base64(f"{DATA_DIR}logo_sidebar.png") 
 logo_belago_b64 = get_image_as_base64(f"{DATA_DIR}logo_belago.png") 
 if logo_copa_b64 and logo_belago_b64:
@@ -591,60 +1415,15 @@ if is_admin:
     if st.sidebar.button("Salvar Novos Dados no Site"):
         if uploaded_file_atual and uploaded_file_15dias:
             with st.spinner("Processando e salvando atualização completa..."):
-                if os.path.exists(STATE_FILE_PREV_CLOSED):
-                    try: os.remove(STATE_FILE_PREV_CLOSED)
-                    except Exception: pass
-
-                now_sao_paulo = datetime.now(ZoneInfo('America/Sao_Paulo'))
-                
-                content_atual_raw = process_uploaded_file(uploaded_file_atual)
+                content_atual = process_uploaded_file(uploaded_file_atual)
                 content_15dias = process_uploaded_file(uploaded_file_15dias)
                 
-                if content_atual_raw is not None and content_15dias is not None:
+                if content_atual is not None and content_15dias is not None:
                     try:
-                        # Lê já usando a padronização salva no CSV (String IO com ; e datas ISO)
-                        df_novo_atual_raw = pd.read_csv(BytesIO(content_atual_raw), sep=';', dtype=str)
-                        
-                        df_hist_fechados = read_local_csv(STATE_FILE_MASTER_CLOSED_CSV, get_file_mtime(STATE_FILE_MASTER_CLOSED_CSV))
-                        
-                        all_closed_ids_historico = set()
-                        id_col_hist = next((col for col in ['ID do ticket', 'ID do Ticket', 'ID'] if col in df_hist_fechados.columns), None)
-                        
-                        if id_col_hist and not df_hist_fechados.empty:
-                            all_closed_ids_historico = set(normalize_ids(df_hist_fechados[id_col_hist]).unique())
-
-                        id_col_atual = next((col for col in ['ID do ticket', 'ID do Ticket', 'ID'] if col in df_novo_atual_raw.columns), None)
-                        
-                        df_novo_atual_filtrado = df_novo_atual_raw 
-                        
-                        st.sidebar.info(f"Arquivo de Backlog processado. {len(df_novo_atual_filtrado)} registros encontrados.")
-                        
-                        output_atual_filtrado = StringIO()
-                        df_novo_atual_filtrado.to_csv(output_atual_filtrado, index=False, sep=';', encoding='utf-8')
-                        content_atual = output_atual_filtrado.getvalue().encode('utf-8') 
-                        
-                        save_local_file(f"{DATA_DIR}dados_atuais.csv", content_atual, is_binary=True)
-                        save_local_file(f"{DATA_DIR}dados_15_dias.csv", content_15dias, is_binary=True)
-                        
-                        today_str = now_sao_paulo.strftime('%Y-%m-%d')
-                        snapshot_path = f"{DATA_DIR}snapshots/backlog_{today_str}.csv"
-                        save_local_file(snapshot_path, content_atual, is_binary=True)
-                        
-                        data_do_upload = now_sao_paulo.date()
-                        data_arquivo_15dias = data_do_upload - timedelta(days=15)
-                        date_15_str = data_arquivo_15dias.strftime('%Y-%m-%d')
-                        
-                        snapshot_path_15 = f"{DATA_DIR}snapshots/backlog_{date_15_str}.csv"
-                        save_local_file(snapshot_path_15, content_15dias, is_binary=True)
-                        
-                        hora_atualizacao = now_sao_paulo.strftime('%H:%M')
-                        datas_referencia_content = (f"data_atual:{data_do_upload.strftime('%d/%m/%Y')}\n"
-                                                    f"data_15dias:{data_arquivo_15dias.strftime('%d/%m/%Y')}\n"
-                                                    f"hora_atualizacao:{hora_atualizacao}")
-                        save_local_file(STATE_FILE_REF_DATES, datas_referencia_content)
-                        
+                        resultado = atualizacao_completa(content_atual, content_15dias)
+                        exibir_resultado_ingestao(resultado)
                         st.sidebar.success("Arquivos salvos e histórico mantido! Recarregando...")
-                        st.cache_data.clear()
+                        obter_observador_arquivos().sincronizar(resultado.arquivos_alterados)
                         st.rerun() 
                     except Exception as e:
                         st.sidebar.error(f"Erro durante a atualização completa: {e}")
@@ -658,146 +1437,18 @@ if is_admin:
     if st.sidebar.button("Salvar Apenas Chamados Fechados"):
         if uploaded_file_fechados:
             with st.spinner("Salvando arquivo de fechados e atualizando snapshot diário..."):
-                now_sao_paulo = datetime.now(ZoneInfo('America/Sao_Paulo'))
-                
                 content_fechados = process_uploaded_file(uploaded_file_fechados)
                 if content_fechados is None:
                     st.sidebar.error("Falha ao processar o arquivo de fechados.")
                     st.stop() 
 
                 try:
-                    df_backlog_check = read_local_csv(f"{DATA_DIR}dados_atuais.csv", get_file_mtime(f"{DATA_DIR}dados_atuais.csv"))
-                    
-                    df_fechados_novo_check = pd.read_csv(BytesIO(content_fechados), sep=';', dtype=str)
-                    
-                    if not df_backlog_check.empty:
-                        id_col_bk = next((c for c in ['ID do ticket', 'ID do Ticket', 'ID'] if c in df_backlog_check.columns), None)
-                        id_col_fc = next((c for c in ['ID do ticket', 'ID do Ticket', 'ID'] if c in df_fechados_novo_check.columns), None)
-                        col_data_fechamento_check = next((c for c in ['Data de Fechamento', 'Data de Resolução'] if c in df_fechados_novo_check.columns), None)
-                        
-                        if id_col_bk and id_col_fc:
-                            if col_data_fechamento_check:
-                                # Le já formato ISO ou BR fallback
-                                df_fechados_novo_check['dt_temp_check'] = pd.to_datetime(df_fechados_novo_check[col_data_fechamento_check], errors='coerce')
-                                df_fechados_hoje_check = df_fechados_novo_check[df_fechados_novo_check['dt_temp_check'].dt.date == now_sao_paulo.date()]
-                            else:
-                                df_fechados_hoje_check = df_fechados_novo_check
-
-                            ids_bk = set(normalize_ids(df_backlog_check[id_col_bk]))
-                            ids_fc_hoje = set(normalize_ids(df_fechados_hoje_check[id_col_fc]))
-                            
-                            total_lidos_hoje = len(ids_fc_hoje)
-                            total_abatidos = len(ids_bk.intersection(ids_fc_hoje))
-                            
-                            st.toast(f"Processado! {total_lidos_hoje} chamados de HOJE lidos. {total_abatidos} impactaram o backlog.")
-                            
-                            update_daily_metrics(now_sao_paulo.strftime('%Y-%m-%d'), total_abatidos)
-
-                    save_local_file(f"{DATA_DIR}dados_fechados.csv", content_fechados, is_binary=True)
-
-                    datas_existentes = read_local_text_file(STATE_FILE_REF_DATES)
-                    data_atual_existente = datas_existentes.get('data_atual', 'N/A')
-                    data_15dias_existente = datas_existentes.get('data_15dias', 'N/A')
-                    hora_atualizacao_nova = now_sao_paulo.strftime('%H:%M')
-
-                    datas_referencia_content_novo = (f"data_atual:{data_atual_existente}\n"
-                                                       f"data_15dias:{data_15dias_existente}\n"
-                                                       f"hora_atualizacao:{hora_atualizacao_nova}")
-                    save_local_file(STATE_FILE_REF_DATES, datas_referencia_content_novo)
-                    
-                    df_fechados_novo_upload = pd.read_csv(BytesIO(content_fechados), delimiter=';', dtype=str)
-                    
-                    id_col_upload = next((col for col in ['ID do ticket', 'ID do Ticket', 'ID'] if col in df_fechados_novo_upload.columns), "ID do Ticket")
-                    if id_col_upload not in df_fechados_novo_upload.columns:
-                        raise Exception("Coluna de ID não encontrada no arquivo de fechados.")
-                    
-                    col_fechamento_upload = "Data de Fechamento" 
-                    analista_col_name_origem = "Analista atribuído"
-                    
-                    df_fechados_novo_upload[id_col_upload] = normalize_ids(df_fechados_novo_upload[id_col_upload])
-                    
-                    if col_fechamento_upload in df_fechados_novo_upload.columns:
-                        st.sidebar.info("Usando 'Data de Fechamento' do arquivo de upload.")
-                        df_fechados_novo_upload['Data de Fechamento_dt'] = pd.to_datetime(df_fechados_novo_upload[col_fechamento_upload], errors='coerce')
-                    else:
-                        st.sidebar.warning(f"Coluna '{col_fechamento_upload}' não encontrada. Usando data de referência: {data_atual_existente}")
-                        df_fechados_novo_upload['Data de Fechamento_dt'] = pd.to_datetime(data_atual_existente, format='%d/%m/%Y', errors='coerce')
-                    
-                    df_fechados_novo_upload['Data de Fechamento_str'] = df_fechados_novo_upload['Data de Fechamento_dt'].dt.strftime('%Y-%m-%d')
-                    
-                    df_historico_base = read_local_csv(STATE_FILE_MASTER_CLOSED_CSV, get_file_mtime(STATE_FILE_MASTER_CLOSED_CSV))
-                    
-                    id_col_hist = "ID do ticket"
-                    if not df_historico_base.empty:
-                        id_col_hist = next((col for col in ['ID do ticket', 'ID do Ticket', 'ID'] if col in df_historico_base.columns), "ID do ticket")
-                        df_historico_base[id_col_hist] = normalize_ids(df_historico_base[id_col_hist])
-                        
-                    previous_closed_ids = set()
-                    if not df_historico_base.empty:
-                        previous_closed_ids = set(df_historico_base[id_col_hist].dropna().unique())
-
-                    try:
-                        with open(STATE_FILE_PREV_CLOSED, 'w') as f:
-                            json.dump(list(previous_closed_ids), f)
-                    except Exception: pass
-
-                    cols_para_merge = [id_col_upload, 'Data de Fechamento_str']
-                    if analista_col_name_origem in df_fechados_novo_upload.columns:
-                        cols_para_merge.append(analista_col_name_origem)
-                        
-                    group_col_name_upload = next((col for col in ['Atribuir a um grupo', 'Grupo Atribuído', 'Grupo'] if col in df_fechados_novo_upload.columns), None)
-                    if group_col_name_upload:
-                         cols_para_merge.append(group_col_name_upload)
-
-                    col_criacao_upload = None
-                    for col in df_fechados_novo_upload.columns:
-                        if 'data de cria' in col.lower() or 'created' in col.lower() or 'aberto em' in col.lower():
-                            col_criacao_upload = col
-                            break
-                    
-                    if col_criacao_upload:
-                         df_fechados_novo_upload[col_criacao_upload] = pd.to_datetime(df_fechados_novo_upload[col_criacao_upload], errors='coerce')
-                         # Padroniza saída ISO
-                         df_fechados_novo_upload[col_criacao_upload] = df_fechados_novo_upload[col_criacao_upload].dt.strftime('%Y-%m-%d %H:%M:%S')
-
-                    col_descricao_upload = next((col for col in ['Descrição', 'Descricao', 'Description', 'Assunto', 'Summary'] if col in df_fechados_novo_upload.columns), None)
-
-                    if col_criacao_upload: cols_para_merge.append(col_criacao_upload)
-                    if col_descricao_upload: cols_para_merge.append(col_descricao_upload)
-
-                    df_lookup = df_fechados_novo_upload[cols_para_merge].drop_duplicates(subset=[id_col_upload])
-                    
-                    if analista_col_name_origem in df_lookup.columns:
-                         df_lookup[analista_col_name_origem] = df_lookup[analista_col_name_origem].astype(str).replace(r'\s+', ' ', regex=True).str.strip()
-
-                    rename_dict = {
-                        id_col_upload: id_col_hist, 
-                        'Data de Fechamento_str': 'Data de Fechamento'
-                    }
-                    if group_col_name_upload:
-                         rename_dict[group_col_name_upload] = 'Atribuir a um grupo'
-                    
-                    if col_criacao_upload: rename_dict[col_criacao_upload] = 'Data de criação'
-                    if col_descricao_upload: rename_dict[col_descricao_upload] = 'Descrição'
-                          
-                    df_lookup = df_lookup.rename(columns=rename_dict)
-                    
-                    df_lookup = df_lookup.loc[:, ~df_lookup.columns.duplicated()]
-                    if not df_historico_base.empty:
-                        df_historico_base = df_historico_base.loc[:, ~df_historico_base.columns.duplicated()]
-
-                    df_historico_final = pd.concat([df_historico_base, df_lookup], ignore_index=True)
-                    
-                    if id_col_hist in df_historico_final.columns:
-                        df_historico_final = df_historico_final.drop_duplicates(subset=[id_col_hist], keep='last')
-
-                    output_hist = StringIO()
-                    df_historico_final.to_csv(output_hist, index=False, sep=';', encoding='utf-8')
-                    
-                    save_local_file(STATE_FILE_MASTER_CLOSED_CSV, output_hist.getvalue().encode('utf-8'), is_binary=True)
-                    
+                    resultado = atualizacao_fechados(content_fechados)
+                    if resultado.compactacao_pendente:
+                        iniciar_compactacao_historico()
+                    exibir_resultado_ingestao(resultado)
                     st.sidebar.success("Arquivo de fechados adicionado ao histórico com sucesso! Recarregando...")
-                    st.cache_data.clear()
+                    obter_observador_arquivos().sincronizar(resultado.arquivos_alterados)
                     st.rerun() 
 
                 except Exception as e:
@@ -809,27 +1460,31 @@ if is_admin:
     st.sidebar.subheader("Manutenção")
     if st.sidebar.button("⚠️ LIMPAR Histórico de Fechados (Reset)"):
         try:
-            if os.path.exists(STATE_FILE_MASTER_CLOSED_CSV):
-                os.remove(STATE_FILE_MASTER_CLOSED_CSV)
-            if os.path.exists(STATE_FILE_PREV_CLOSED):
-                os.remove(STATE_FILE_PREV_CLOSED)
-            if os.path.exists(STATE_FILE_METRICS_DB):
-                os.remove(STATE_FILE_METRICS_DB)
+            resultado = limpar_historico()
             st.sidebar.success("Histórico limpo com sucesso! Recarregando...")
-            st.cache_data.clear()
+            obter_observador_arquivos().sincronizar(resultado.arquivos_alterados)
             st.rerun()
         except Exception as e:
             st.sidebar.error(f"Erro ao limpar histórico: {e}")
 
+    st.sidebar.markdown("---")
+    st.sidebar.subheader("Cache de Dados")
+    cache_quadros = obter_cache_quadros()
+    st.sidebar.caption(f"{cache_quadros.bytes_usados / 1024**2:.1f} MB em uso de {cache_quadros.orcamento_bytes / 1024**2:.0f} MB.")
+    st.sidebar.dataframe(cache_quadros.metricas(), use_container_width=True)
+
 elif password:
     st.sidebar.error("Senha incorreta.")
 
 try:
+    migrar_dados_legados()
+    obter_observador_arquivos()
+
     if 'contacted_tickets' not in st.session_state:
-        st.session_state.contacted_tickets = set(read_local_json_file(STATE_FILE_CONTACTS, default_return_type='list'))
+        st.session_state.contacted_tickets = carregar_contatos()
 
     if 'observations' not in st.session_state:
-        st.session_state.observations = read_local_json_file(STATE_FILE_OBSERVATIONS, default_return_type='dict')
+        st.session_state.observations = carregar_observacoes()
 
     if 'editor_key_counter' not in st.session_state:
         st.session_state.editor_key_counter = 0
@@ -843,916 +1498,93 @@ try:
     if "scroll" in st.query_params or "faixa" in st.query_params:
         st.query_params.clear()
 
-    mtime_atual = get_file_mtime(f"{DATA_DIR}dados_atuais.csv")
-    df_atual = read_local_csv(f"{DATA_DIR}dados_atuais.csv", mtime_atual) 
-    
-    mtime_15dias = get_file_mtime(f"{DATA_DIR}dados_15_dias.csv")
-    df_15dias = read_local_csv(f"{DATA_DIR}dados_15_dias.csv", mtime_15dias) 
-    
-    mtime_hist = get_file_mtime(STATE_FILE_MASTER_CLOSED_CSV)
-    df_historico_fechados = read_local_csv(STATE_FILE_MASTER_CLOSED_CSV, mtime_hist)
-    
-    datas_referencia = read_local_text_file(STATE_FILE_REF_DATES) 
-    
-    data_atual_str = datas_referencia.get('data_atual', 'N/A')
-    data_15dias_str = datas_referencia.get('data_15dias', 'N/A')
-    hora_atualizacao_str = datas_referencia.get('hora_atualizacao', '')
-    if df_atual.empty or df_15dias.empty: 
+    modelo = construir_modelo(versao_modelo(), datetime.now(ZoneInfo('America/Sao_Paulo')).date())
+    if modelo is not None:
+        modelo = modelo.para_execucao()
+
+    if modelo is None:
         st.warning("Ainda não há dados para exibir. Por favor, carregue os arquivos na área do administrador.")
         
     else:
-        if 'ID do ticket' in df_atual.columns:
-            df_atual['ID do ticket'] = normalize_ids(df_atual['ID do ticket'])
-
-        all_closed_ids_historico = set()
-        id_col_historico = next((col for col in ['ID do ticket', 'ID do Ticket', 'ID'] if col in df_historico_fechados.columns), None)
-        if id_col_historico and not df_historico_fechados.empty:
-            all_closed_ids_historico = set(normalize_ids(df_historico_fechados[id_col_historico]).unique())
-        
-        df_abertos = df_atual
+        df_aging = modelo.df_aging
         
-        df_abertos_base_para_reducao = df_abertos[~df_abertos['Atribuir a um grupo'].str.contains(GRUPOS_EXCLUSAO_PERMANENTE_REGEX, case=False, na=False, regex=True)].copy()
+        # Abas sob demanda: só a aba aberta é calculada e desenhada; as leituras
+        # pesadas de cada uma ficam em cache por versão dos dados, então voltar a
+        # uma aba já vista não refaz o trabalho.
+        tab1, tab2, tab3, tab4 = st.tabs(["Dashboard Completo", "Report Visual", "Evolução Semanal", "Evolução Aging"],
+                                         key="aba_ativa", on_change="rerun")
 
-        df_atual_filtrado = df_abertos_base_para_reducao.copy()
-        
-        if all_closed_ids_historico:
-            df_atual_filtrado = df_atual_filtrado[~df_atual_filtrado['ID do ticket'].isin(all_closed_ids_historico)]
-        
-        df_15dias_filtrado = df_15dias[~df_15dias['Atribuir a um grupo'].str.contains(GRUPOS_EXCLUSAO_TOTAL_REGEX, case=False, na=False, regex=True)]
-        
-        try:
-            if data_atual_str != 'N/A':
-                ref_date_obj = datetime.strptime(data_atual_str, '%d/%m/%Y')
-            else:
-                ref_date_obj = None
-        except:
-            ref_date_obj = None
+        with tab1:
+            if tab1.open:
+                if df_aging.empty:
+                    st.warning("Não há chamados em aberto para exibir nesta tabela. Se isso estiver errado, tente recarregar o Backlog Atual.")
 
-        df_aging = analisar_aging(df_atual_filtrado, reference_date=ref_date_obj)
-        
-        df_encerrados_filtrado = pd.DataFrame()
-        
-        if not df_historico_fechados.empty:
-            if 'Atribuir a um grupo' not in df_historico_fechados.columns:
-                found_col = next((col for col in ['Grupo Atribuído', 'Grupo'] if col in df_historico_fechados.columns), None)
-                if found_col:
-                    df_historico_fechados.rename(columns={found_col: 'Atribuir a um grupo'}, inplace=True)
                 else:
-                    df_historico_fechados['Atribuir a um grupo'] = 'Desconhecido'
-
-            df_encerrados_filtrado = df_historico_fechados[~df_historico_fechados['Atribuir a um grupo'].str.contains(GRUPOS_EXCLUSAO_PERMANENTE_REGEX, case=False, na=False, regex=True)]
-
-        total_fechados_display = 0
-        data_fechamento_display_str = "Hoje" 
-        
-        hoje_sp = datetime.now(ZoneInfo('America/Sao_Paulo')).date()
+                    if not modelo.grupos_aviso.empty:
+                        aviso_str_lista = [f"**Atenção:** Foram encontrados **{modelo.grupos_aviso.sum()}** chamados em grupos que deveriam estar zerados ({GRUPOS_DE_AVISO_TEXTO}):"]
+                        for grupo, contagem in modelo.grupos_aviso.items():
+                            aviso_str_lista.append(f"- **{grupo}:** {contagem} chamado(s)")
 
-        if not df_encerrados_filtrado.empty and 'Data de Fechamento' in df_encerrados_filtrado.columns:
-            if 'Data de Fechamento_dt_comp' not in df_encerrados_filtrado.columns:
-                df_encerrados_filtrado['Data de Fechamento_dt_comp'] = pd.to_datetime(df_encerrados_filtrado['Data de Fechamento'], errors='coerce')
-            
-            ultima_data_com_dados = df_encerrados_filtrado['Data de Fechamento_dt_comp'].max()
-            
-            if pd.notna(ultima_data_com_dados):
-                ultima_data_date = ultima_data_com_dados.date()
-                
-                fechados_display_df = df_encerrados_filtrado[
-                    df_encerrados_filtrado['Data de Fechamento_dt_comp'].dt.date == ultima_data_date
-                ].copy()
-                
-                if ultima_data_date == hoje_sp:
-                    data_fechamento_display_str = "HOJE"
-                else:
-                    data_fechamento_display_str = ultima_data_date.strftime('%d/%m')
+                        st.warning("\n".join(aviso_str_lista))
 
-                id_col_backlog = next((col for col in ['ID do ticket', 'ID do Ticket', 'ID'] if col in df_abertos_base_para_reducao.columns), 'ID do ticket')
-                open_ids_base = set(normalize_ids(df_abertos_base_para_reducao[id_col_backlog]).unique())
-                
-                id_col_hist = next((col for col in ['ID do ticket', 'ID do Ticket', 'ID'] if col in fechados_display_df.columns), None)
-                
-                if id_col_hist:
-                    closed_ids = set(normalize_ids(fechados_display_df[id_col_hist]).unique())
-                    total_fechados_display = len(open_ids_base.intersection(closed_ids))
-                else:
-                    total_fechados_display = 0
+                    info_messages = ["**Filtros e Regras Aplicadas:**", 
+                                    f"- Grupos contendo {GRUPOS_EXCLUSAO_PERMANENTE_TEXTO} foram desconsiderados da análise.", 
+                                    "- A contagem de dias do chamado desconsidera o dia da sua abertura (prazo -1 dia)."]
 
-        data_mais_recente_fechado_str = "" 
+                    if modelo.chamados_sem_data > 0:
+                        info_messages.append(f"- **Atenção:** {modelo.chamados_sem_data} chamados foram desconsiderados por data inválida/vazia.")
 
-        if not df_encerrados_filtrado.empty and 'Data de Fechamento' in df_encerrados_filtrado.columns:
-            try:
-                if 'Data de Fechamento_dt_comp' not in df_encerrados_filtrado.columns:
-                    df_encerrados_filtrado['Data de Fechamento_dt_comp'] = pd.to_datetime(df_encerrados_filtrado['Data de Fechamento'], errors='coerce')
-                
-                if not df_encerrados_filtrado['Data de Fechamento_dt_comp'].isnull().all():
-                    data_mais_recente_fechado_dt = df_encerrados_filtrado['Data de Fechamento_dt_comp'].max().date()
-                    data_mais_recente_fechado_str = data_mais_recente_fechado_dt.strftime('%d/%m/%Y') 
-            except Exception as e:
-                st.warning(f"Não foi possível processar datas de fechamento: {e}")
+                    st.info("\n".join(info_messages))
 
-        tab1, tab2, tab3, tab4 = st.tabs(["Dashboard Completo", "Report Visual", "Evolução Semanal", "Evolução Aging"])
+                    st.subheader("Visão Geral do Backlog Atual")
+                    texto_hora = f" (atualizado às {modelo.hora_atualizacao_str})" if modelo.hora_atualizacao_str else ""
+                    st.markdown(f"<p style='font-size: 0.9em; color: #666;'><i>Data de referência: {modelo.data_atual_str}{texto_hora}</i></p>", unsafe_allow_html=True)
 
-        with tab1:
-            
-            if df_aging.empty:
-                st.warning("Não há chamados em aberto para exibir nesta tabela. Se isso estiver errado, tente recarregar o Backlog Atual.")
-            
-            else:
-                df_para_aviso = df_atual_filtrado[
-                    df_atual_filtrado['Atribuir a um grupo'].str.contains(
-                        GRUPOS_DE_AVISO_REGEX, case=False, na=False, regex=True
-                    )
-                ]
-                
-                if not df_para_aviso.empty:
-                    total_para_aviso = len(df_para_aviso)
-                    contagem_por_grupo = df_para_aviso['Atribuir a um grupo'].value_counts()
-                    
-                    aviso_str_lista = [f"**Atenção:** Foram encontrados **{total_para_aviso}** chamados em grupos que deveriam estar zerados ({GRUPOS_DE_AVISO_TEXTO}):"]
-                    for grupo, contagem in contagem_por_grupo.items():
-                        aviso_str_lista.append(f"- **{grupo}:** {contagem} chamado(s)")
-                    
-                    st.warning("\n".join(aviso_str_lista))
-
-                info_messages = ["**Filtros e Regras Aplicadas:**", 
-                                f"- Grupos contendo {GRUPOS_EXCLUSAO_PERMANENTE_TEXTO} foram desconsiderados da análise.", 
-                                "- A contagem de dias do chamado desconsidera o dia da sua abertura (prazo -1 dia)."]
-                
-                diff_count = len(df_atual_filtrado) - len(df_aging)
-                if diff_count > 0:
-                    info_messages.append(f"- **Atenção:** {diff_count} chamados foram desconsiderados por data inválida/vazia.")
-                
-                st.info("\n".join(info_messages))
-                
-                st.subheader("Visão Geral do Backlog Atual")
-                texto_hora = f" (atualizado às {hora_atualizacao_str})" if hora_atualizacao_str else ""
-                st.markdown(f"<p style='font-size: 0.9em; color: #666;'><i>Data de referência: {data_atual_str}{texto_hora}</i></p>", unsafe_allow_html=True)
-                
-                total_chamados = len(df_aging)
+                    total_chamados = len(df_aging)
 
-                col_spacer1, col_total, col_fechados, col_spacer2 = st.columns([1, 1.5, 1.5, 1])
-                with col_total:
-                    st.markdown(f"""<div class="metric-box"><span class="label">Total de Chamados Abertos</span><span class="value">{total_chamados}</span></div>""", unsafe_allow_html=True)
-                with col_fechados:
-                    st.markdown(f"""<div class="metric-box"><span class="label">Fechados ({data_fechamento_display_str})</span><span class="value">{total_fechados_display}</span></div>""", unsafe_allow_html=True)
+                    col_spacer1, col_total, col_fechados, col_spacer2 = st.columns([1, 1.5, 1.5, 1])
+                    with col_total:
+                        st.markdown(f"""<div class="metric-box"><span class="label">Total de Chamados Abertos</span><span class="value">{total_chamados}</span></div>""", unsafe_allow_html=True)
+                    with col_fechados:
+                        st.markdown(f"""<div class="metric-box"><span class="label">Fechados ({modelo.data_fechamento_display_str})</span><span class="value">{len(modelo.chaves_fechados_recentes)}</span></div>""", unsafe_allow_html=True)
 
-                st.markdown("---")
+                    st.markdown("---")
 
-                if not df_aging.empty:
-                    aging_counts = df_aging['Faixa de Antiguidade'].value_counts().reset_index()
-                    aging_counts.columns = ['Faixa de Antiguidade', 'Quantidade']
-                    ordem_faixas = ["0-2 dias", "3-5 dias", "6-10 dias", "11-20 dias", "21-29 dias", "30+ dias"]
-                    todas_as_faixas = pd.DataFrame({'Faixa de Antiguidade': ordem_faixas})
-                    aging_counts = pd.merge(todas_as_faixas, aging_counts, on='Faixa de Antiguidade', how='left').fillna(0).astype({'Quantidade': int})
-                    aging_counts['Faixa de Antiguidade'] = pd.Categorical(aging_counts['Faixa de Antiguidade'], categories=ordem_faixas, ordered=True)
-                    aging_counts = aging_counts.sort_values('Faixa de Antiguidade')
                     if 'faixa_selecionada' not in st.session_state:
                         st.session_state.faixa_selecionada = "0-2 dias"
-                    cols = st.columns(len(ordem_faixas))
-                    for i, row in aging_counts.iterrows():
+                    cols = st.columns(len(ORDEM_FAIXAS))
+                    for i, row in modelo.contagem_faixas.iterrows():
                         with cols[i]:
                             faixa_encoded = quote(row['Faixa de Antiguidade'])
                             card_html = f"""<a href="?faixa={faixa_encoded}&scroll=true" target="_self" class="metric-box"><span class="label">{row['Faixa de Antiguidade']}</span><span class="value">{row['Quantidade']}</span></a>"""
                             st.markdown(card_html, unsafe_allow_html=True)
-                else:
-                    st.warning("Nenhum dado válido para a análise de antiguidade (verifique as datas de criação no arquivo).")
-
-                st.markdown(f"<h3>Comparativo de Backlog: Atual vs. 15 Dias Atrás <span style='font-size: 0.6em; color: #666; font-weight: normal;'>({data_15dias_str})</span></h3>", unsafe_allow_html=True)
-                df_comparativo = processar_dados_comparativos(df_atual_filtrado.copy(), df_15dias_filtrado.copy())
-                df_comparativo['Status'] = df_comparativo.apply(get_status, axis=1)
-                
-                df_comparativo = df_comparativo.rename(columns={'Atribuir a um grupo': 'Grupo'})
-                
-                df_comparativo = df_comparativo[['Grupo', '15 Dias Atrás', 'Atual', 'Diferença', 'Status']]
-                st.dataframe(df_comparativo.set_index('Grupo').style.map(lambda val: 'background-color: #ffcccc' if val > 0 else ('background-color: #ccffcc' if val < 0 else 'background-color: white'), subset=['Diferença']), use_container_width=True)
-                st.markdown("---")
-            
-            st.markdown(f"<h3>Histórico de Chamados Encerrados (Impacto no Backlog)</h3>", unsafe_allow_html=True)
-
-            data_dt_filtro = None 
-
-            if df_historico_fechados.empty:
-                st.info("O histórico de chamados encerrados ainda não possui dados. Faça uma 'Atualização Rápida' para começar a popular.")
-            elif not df_encerrados_filtrado.empty:
-                
-                df_encerrados_para_exibir = df_encerrados_filtrado.copy()
-                
-                colunas_para_exibir_fechados = ['Status', 'ID do ticket', 'Descrição']
-                
-                analista_col = next((c for c in ['Analista atribuído', 'Analista'] if c in df_encerrados_para_exibir.columns), None)
-                if analista_col: 
-                    df_encerrados_para_exibir.rename(columns={analista_col: "Analista de Resolução"}, inplace=True)
-                    colunas_para_exibir_fechados.append("Analista de Resolução")
-                
-                grupo_col = next((c for c in ['Atribuir a um grupo', 'Grupo Atribuído'] if c in df_encerrados_para_exibir.columns), None)
-                if grupo_col: 
-                    df_encerrados_para_exibir.rename(columns={grupo_col: "Grupo Atribuído"}, inplace=True)
-                    colunas_para_exibir_fechados.append("Grupo Atribuído")
-
-                col_criacao_real = None
-                for col in df_encerrados_para_exibir.columns:
-                    if 'data de cria' in col.lower() or 'created' in col.lower() or 'aberto em' in col.lower():
-                        col_criacao_real = col
-                        break
-                
-                df_encerrados_para_exibir['data_criacao_recuperada'] = pd.NaT
-
-                if col_criacao_real:
-                    # Parser ISO/BR
-                    df_encerrados_para_exibir['data_criacao_recuperada'] = pd.to_datetime(df_encerrados_para_exibir[col_criacao_real], errors='coerce')
-
-                id_col_fechado = next((col for col in ['ID do ticket', 'ID do Ticket', 'ID'] if col in df_encerrados_para_exibir.columns), None)
-                
-                # Recuperação via backlog
-                if id_col_fechado and 'df_abertos_base_para_reducao' in locals() and not df_abertos_base_para_reducao.empty:
-                    id_col_bk = next((c for c in ['ID do ticket', 'ID do Ticket', 'ID'] if c in df_abertos_base_para_reducao.columns), None)
-                    date_col_bk = next((c for c in ['Data de criação', 'Data de criaÃ§Ã£o', 'Created'] if c in df_abertos_base_para_reducao.columns), None)
-                    
-                    if id_col_bk and date_col_bk:
-                        temp_bk = df_abertos_base_para_reducao[[id_col_bk, date_col_bk]].copy()
-                        temp_bk[id_col_bk] = normalize_ids(temp_bk[id_col_bk])
-                        
-                        temp_bk['dt_valida'] = pd.to_datetime(temp_bk[date_col_bk], errors='coerce')
-                        temp_bk = temp_bk.dropna(subset=['dt_valida'])
-                        
-                        mapa_datas = dict(zip(temp_bk[id_col_bk], temp_bk['dt_valida']))
-                        
-                        def buscar_data(row):
-                            if pd.notna(row['data_criacao_recuperada']): return row['data_criacao_recuperada']
-                            meu_id = str(row[id_col_fechado]).replace('.0', '').strip()
-                            return mapa_datas.get(meu_id, pd.NaT)
-
-                        df_encerrados_para_exibir['data_criacao_recuperada'] = df_encerrados_para_exibir.apply(buscar_data, axis=1)
-                # ---------------------------------------------------------------
-
-                if 'Data de Fechamento' in df_encerrados_para_exibir.columns:
-                    try:
-                        dt_inicio = df_encerrados_para_exibir['data_criacao_recuperada'].dt.normalize()
-                        dt_fim = pd.to_datetime(df_encerrados_para_exibir['Data de Fechamento'], errors='coerce').dt.normalize()
-                        
-                        df_encerrados_para_exibir['Dias em Aberto'] = (dt_fim - dt_inicio).dt.days
-                        
-                        df_encerrados_para_exibir['Dias em Aberto'] = (df_encerrados_para_exibir['Dias em Aberto'] - 1).fillna(0).clip(lower=0).astype(int)
-                        
-                    except Exception as e:
-                        st.warning(f"Erro ao calcular datas: {e}")
-                        df_encerrados_para_exibir['Dias em Aberto'] = 0
-                else:
-                    df_encerrados_para_exibir['Dias em Aberto'] = 0
-
-                colunas_para_exibir_fechados.append('Dias em Aberto')
-
-                try:
-                    if 'Data de Fechamento_dt_comp' not in df_encerrados_para_exibir.columns:
-                        df_encerrados_para_exibir['Data de Fechamento_dt_comp'] = pd.to_datetime(df_encerrados_para_exibir['Data de Fechamento'], errors='coerce')
-
-                    unique_dates = sorted(df_encerrados_para_exibir['Data de Fechamento_dt_comp'].dropna().dt.date.unique(), reverse=True)
-                    datas_disponiveis = [d.strftime('%d/%m/%Y') for d in unique_dates]
-                    
-                    if not datas_disponiveis:
-                        st.warning("Não há datas de fechamento válidas no histórico.")
-                    else:
-                        opcoes_filtro = datas_disponiveis
-                        try:
-                            default_index = opcoes_filtro.index(data_mais_recente_fechado_str)
-                        except ValueError:
-                            default_index = 0 
-                        
-                        data_selecionada = st.selectbox(
-                            "Filtrar por Data de Fechamento:", 
-                            options=opcoes_filtro, 
-                            key="filtro_data_fechados",
-                            index=default_index 
-                        )
-                        
-                        data_dt_filtro = datetime.strptime(data_selecionada, '%d/%m/%Y').date()
-                        df_encerrados_para_exibir = df_encerrados_para_exibir[df_encerrados_para_exibir['Data de Fechamento_dt_comp'].dt.date == data_dt_filtro]
-                    
-                    df_encerrados_para_exibir['Data de Fechamento'] = df_encerrados_para_exibir['Data de Fechamento_dt_comp'].dt.strftime('%d/%m/%Y')
-                    colunas_para_exibir_fechados.append('Data de Fechamento')
-                
-                except Exception as e:
-                    st.error(f"Erro ao processar datas de fechamento: {e}")
-                
-                id_col_encerrados = next((col for col in ['ID do ticket', 'ID do Ticket', 'ID'] if col in df_encerrados_para_exibir.columns), None)
-                previous_closed_ids_loaded = set(read_local_json_file(STATE_FILE_PREV_CLOSED, default_return_type='list'))
-                
-                if id_col_encerrados:
-                    df_encerrados_para_exibir['Status'] = df_encerrados_para_exibir[id_col_encerrados].apply(
-                        lambda x: "Novo" if normalize_ids(pd.Series([x])).iloc[0] not in previous_closed_ids_loaded else ""
-                        )
-                else:
-                    df_encerrados_para_exibir['Status'] = ""
-                
-                # LÓGICA DE FILTRO LÍQUIDO PARA A TABELA (TAB 1)
-                if 'data_criacao_recuperada' in df_encerrados_para_exibir.columns and 'Data de Fechamento' in df_encerrados_para_exibir.columns:
-                    c_date = df_encerrados_para_exibir['data_criacao_recuperada'].dt.date
-                    e_date = pd.to_datetime(df_encerrados_para_exibir['Data de Fechamento'], dayfirst=True).dt.date
-                    df_encerrados_para_exibir = df_encerrados_para_exibir[c_date != e_date]
-                # ---------------------------------------------------------
-
-                is_viewing_today = False
-                if data_dt_filtro:
-                    is_viewing_today = (data_dt_filtro == hoje_sp)
-
-                if is_viewing_today and id_col_encerrados and 'open_ids_base' in locals():
-                    df_encerrados_para_exibir = df_encerrados_para_exibir[
-                        df_encerrados_para_exibir[id_col_encerrados].apply(lambda x: normalize_ids(pd.Series([x])).iloc[0] in open_ids_base)
-                    ]
-                    st.caption("Mostrando apenas chamados fechados HOJE que causaram redução no backlog ATUAL.")
-                elif not is_viewing_today and data_dt_filtro:
-                    st.caption(f"Mostrando histórico completo de chamados fechados em {data_selecionada} (Líquido: sem Fast Kills).")
-                
-                df_encerrados_para_exibir = df_encerrados_para_exibir.loc[:, ~df_encerrados_para_exibir.columns.duplicated()]
-                colunas_finais = [col for col in colunas_para_exibir_fechados if col in df_encerrados_para_exibir.columns]
-                
-                if df_encerrados_para_exibir.empty:
-                    if is_viewing_today:
-                        st.info(f"Nenhum chamado fechado em {data_selecionada} constava no backlog atual (ou o backlog já foi atualizado).")
-                    elif data_dt_filtro:
-                        st.info(f"Não há registros de chamados fechados para {data_selecionada}.")
-                else:
-                    colunas_desabilitadas_fixas = [
-                        'ID do ticket', 'Descrição', 'Grupo Atribuído', 
-                        'Dias em Aberto', 'Data de criação'
-                    ]
-                    colunas_editaveis_admin = [
-                        'Contato', 'Observações'
-                    ]
-                    if can_edit_table:
-                        colunas_desabilitadas_final = colunas_desabilitadas_fixas
-                    else:
-                        colunas_desabilitadas_final = colunas_desabilitadas_fixas + colunas_editaveis_admin
-                    
-                    st.data_editor(
-                        df_encerrados_para_exibir[colunas_finais], 
-                        hide_index=True, 
-                        disabled=True, 
-                        use_container_width=True,
-                        column_config={
-                            "Status": st.column_config.Column(width="small"),
-                            "Dias em Aberto": st.column_config.NumberColumn(
-                                "Dias em Aberto",
-                                help="Calculado: (Data Fechamento - Data Criação) - 1 dia.",
-                                format="%d" 
-                            )
-                        }
-                    )
-            else:
-                st.info("O arquivo de chamados encerrados do dia ainda não foi carregado.")
-
-            st.markdown("---")
-            st.subheader("Detalhar e Buscar Chamados")
-
-            st.selectbox("Selecione uma faixa de idade para ver os detalhes (ou clique em um card acima):", 
-                            options=ordem_faixas, 
-                            key='faixa_selecionada',
-                            on_change=sync_ticket_data)
-            
-            faixa_atual = st.session_state.faixa_selecionada
-            if not df_aging.empty:
-                filtered_df = df_aging[df_aging['Faixa de Antiguidade'] == faixa_atual].copy()
-                if not filtered_df.empty:
-                    if 'Data de criação' in filtered_df.columns:
-                            filtered_df['Data de criação'] = filtered_df['Data de criação'].dt.strftime('%d/%m/%Y')
-
-                    def highlight_row(row):
-                        return ['background-color: #fff8c4'] * len(row) if row['Contato'] else [''] * len(row)
-
-                    filtered_df['Contato'] = filtered_df['ID do ticket'].apply(lambda id: str(id) in st.session_state.contacted_tickets)
-                    filtered_df['Observações'] = filtered_df['ID do ticket'].apply(lambda id: st.session_state.observations.get(str(id), ''))
-
-                    st.session_state.last_filtered_df = filtered_df.reset_index(drop=True)
-
-                    colunas_para_exibir_renomeadas = {
-                        'Contato': 'Contato',
-                        'ID do ticket': 'ID do ticket',
-                        'Descrição': 'Descrição',
-                        'Atribuir a um grupo': 'Grupo Atribuído',
-                        'Dias em Aberto': 'Dias em Aberto',
-                        'Data de criação': 'Data de criação',
-                        'Observações': 'Observações'
-                    }
-                    
-                    colunas_desabilitadas_fixas = [
-                        'ID do ticket', 'Descrição', 'Grupo Atribuído', 
-                        'Dias em Aberto', 'Data de criação'
-                    ]
-                    colunas_editaveis_admin = [
-                        'Contato', 'Observações'
-                    ]
-                    
-                    if can_edit_table:
-                        colunas_desabilitadas_final = colunas_desabilitadas_fixas
-                    else:
-                        colunas_desabilitadas_final = colunas_desabilitadas_fixas + colunas_editaveis_admin
-                    
-                    st.data_editor(
-                        st.session_state.last_filtered_df.rename(columns=colunas_para_exibir_renomeadas)[list(colunas_para_exibir_renomeadas.values())].style.apply(highlight_row, axis=1),
-                        use_container_width=True,
-                        hide_index=True,
-                        disabled=colunas_desabilitadas_final, 
-                        key=f'ticket_editor_{st.session_state.editor_key_counter}'
-                    )
-                    
-                    st.button(
-                        "Salvar Contatos e Observações",
-                        on_click=sync_ticket_data,
-                        type="primary",
-                        disabled=not can_edit_table 
-                    )
-                    
-                else:
-                    st.info("Não há chamados nesta categoria.")
-                
-                st.subheader("Buscar Chamados por Grupo")
-                lista_grupos = sorted(df_aging['Atribuir a um grupo'].dropna().unique())
-                grupo_selecionado = st.selectbox("Busca de chamados por grupo:", options=lista_grupos)
-                if grupo_selecionado:
-                    resultados_busca = df_aging[df_aging['Atribuir a um grupo'] == grupo_selecionado].copy()
-                    if 'Data de criação' in resultados_busca.columns:
-                        resultados_busca['Data de criação'] = resultados_busca['Data de criação'].dt.strftime('%d/%m/%Y')
-                    st.write(f"Encontrados {len(resultados_busca)} chamados para o grupo '{grupo_selecionado}':")
-                    colunas_para_exibir_busca = ['ID do ticket', 'Descrição', 'Dias em Aberto', 'Data de criação']
-                    st.data_editor(resultados_busca[[col for col in colunas_para_exibir_busca if col in resultados_busca.columns]], use_container_width=True, hide_index=True, disabled=True)
-
-    with tab2:
-        st.subheader("Resumo do Backlog Atual")
-        if not df_aging.empty:
-            
-            total_chamados_tab2 = len(df_aging)
-            _, col_total_tab2, _ = st.columns([2, 1.5, 2])
-            with col_total_tab2: st.markdown( f"""<div class="metric-box"><span class="label">Total de Chamados</span><span class="value">{total_chamados_tab2}</span></div>""", unsafe_allow_html=True )
-            st.markdown("---")
-            aging_counts_tab2 = df_aging['Faixa de Antiguidade'].value_counts().reset_index()
-            aging_counts_tab2.columns = ['Faixa de Antiguidade', 'Quantidade']
-            ordem_faixas = ["0-2 dias", "3-5 dias", "6-10 dias", "11-20 dias", "21-29 dias", "30+ dias"]
-            todas_as_faixas_tab2 = pd.DataFrame({'Faixa de Antiguidade': ordem_faixas})
-            aging_counts_tab2 = pd.merge(todas_as_faixas_tab2, aging_counts_tab2, on='Faixa de Antiguidade', how='left').fillna(0).astype({'Quantidade': int})
-            aging_counts_tab2['Faixa de Antiguidade'] = pd.Categorical(aging_counts_tab2['Faixa de Antiguidade'], categories=ordem_faixas, ordered=True)
-            aging_counts_tab2 = aging_counts_tab2.sort_values('Faixa de Antiguidade')
-            cols_tab2 = st.columns(len(ordem_faixas))
-            for i, row in aging_counts_tab2.iterrows():
-                with cols_tab2[i]: st.markdown( f"""<div class="metric-box"><span class="label">{row['Faixa de Antiguidade']}</span><span class="value">{row['Quantidade']}</span></div>""", unsafe_allow_html=True )
-            st.markdown("---")
-            st.subheader("Distribuição do Backlog por Grupo")
-            
-            chart_data = df_aging.groupby(['Atribuir a um grupo', 'Faixa de Antiguidade']).size().reset_index(name='Quantidade')
-            group_totals = chart_data.groupby('Atribuir a um grupo')['Quantidade'].sum().sort_values(ascending=False)
-
-            if not group_totals.empty:
-                
-                orientation_choice = st.radio( "Orientação do Gráfico:", ["Vertical", "Horizontal"], index=0, horizontal=True )
-                
-                new_labels_map = {group: f"{group} ({total})" for group, total in group_totals.items()}
-                chart_data['Atribuir a um grupo'] = chart_data['Atribuir a um grupo'].map(new_labels_map)
-                sorted_new_labels = [new_labels_map[group] for group in group_totals.index]
-                def lighten_color(hex_color, amount=0.2):
-                    try:
-                        hex_color = hex_color.lstrip('#')
-                        h, l, s = colorsys.rgb_to_hls(*[int(hex_color[i:i+2], 16)/255.0 for i in (0, 2, 4)])
-                        new_l = l + (1 - l) * amount
-                        r, g, b = colorsys.hls_to_rgb(h, new_l, s)
-                        return f"#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}"
-                    except Exception: return hex_color
-                base_color = "#375623"
-                palette = [ lighten_color(base_color, 0.85), lighten_color(base_color, 0.70), lighten_color(base_color, 0.55), lighten_color(base_color, 0.40), lighten_color(base_color, 0.20), base_color ]
-                color_map = {faixa: color for faixa, color in zip(ordem_faixas, palette)}
-                
-                if orientation_choice == 'Horizontal':
-                    num_groups = len(group_totals)
-                    dynamic_height = max(500, num_groups * 30)
-                    fig_stacked_bar = px.bar( chart_data, x='Quantidade', y='Atribuir a um grupo', orientation='h', color='Faixa de Antiguidade', title="Composição da Idade do Backlog por Grupo", labels={'Quantidade': 'Qtd. de Chamados', 'Atribuir a um grupo': ''}, category_orders={'Atribuir a um grupo': sorted_new_labels, 'Faixa de Antiguidade': ordem_faixas}, color_discrete_map=color_map, text_auto=True )
-                    fig_stacked_bar.update_traces(textangle=0, textfont_size=12)
-                    fig_stacked_bar.update_layout(height=dynamic_height, legend_title_text='Antiguidade')
-                else:
-                    fig_stacked_bar = px.bar( chart_data, x='Atribuir a um grupo', y='Quantidade', color='Faixa de Antiguidade', title="Composição da Idade do Backlog por Grupo", labels={'Quantidade': 'Qtd. de Chamados', 'Atribuir a um grupo': 'Grupo'}, category_orders={'Atribuir a um grupo': sorted_new_labels, 'Faixa de Antiguidade': ordem_faixas}, color_discrete_map=color_map, text_auto=True )
-                    fig_stacked_bar.update_traces(textangle=0, textfont_size=12)
-                    fig_stacked_bar.update_layout(height=600, xaxis_title=None, xaxis_tickangle=-45, legend_title_text='Antiguidade')
-                
-                st.plotly_chart(fig_stacked_bar, use_container_width=True)
-
-                df_pareto = group_totals.to_frame(name='Total')
-                df_pareto['CumulativePct'] = df_pareto['Total'].cumsum() / df_pareto['Total'].sum()
-                
-                total_backlog_geral = df_pareto['Total'].sum()
-                total_grupos_geral = len(df_pareto)
-                
-                pareto_limit = 0.80
-                num_groups_for_80_pct = 1
-                if df_pareto['CumulativePct'].iloc[0] <= pareto_limit:
-                    try:
-                        groups_under_80 = df_pareto[df_pareto['CumulativePct'] <= pareto_limit]
-                        num_groups_for_80_pct = len(groups_under_80) + 1
-                    except Exception:
-                        num_groups_for_80_pct = 1 
-                
-                if num_groups_for_80_pct > total_grupos_geral:
-                    num_groups_for_80_pct = total_grupos_geral
-
-                final_pareto_groups = df_pareto.head(num_groups_for_80_pct)
-                actual_pct = final_pareto_groups.iloc[-1]['CumulativePct']
-                actual_call_count = final_pareto_groups['Total'].sum()
-                
-                top_3_groups = group_totals.head(3)
-                
-                summary_text = [f"**Análise Rápida (Princípio de Pareto):**\n"]
-                summary_text.append(f"* Nossa análise mostra que **{num_groups_for_80_pct}** grupos (de um total de **{total_grupos_geral}**) são responsáveis por **{actual_call_count}** chamados, o que representa **{actual_pct:.0%}** de todo o backlog (de {total_backlog_geral} chamados).\n")
-                summary_text.append(f"* Os 3 grupos de maior impacto são:\n")
-                
-                list_items = []
-                for i, (group, count) in enumerate(top_3_groups.items(), 1):
-                    list_items.append(f"    {i}.  **{group}** ({count} chamados)")
-                summary_text.append("\n".join(list_items))
-                
-                summary_text.append(f"\n**Análise por Categoria:**\n")
-                
-                try:
-                    total_sap = group_totals[group_totals.index.str.contains('SAP', case=False, na=False)].sum()
-                    total_3n = group_totals[group_totals.index.str.contains('3N', case=False, na=False)].sum()
-                    total_outros = group_totals[~group_totals.index.str.contains('SAP|3N', case=False, na=False)].sum()
-                    
-                    summary_text.append(f"* Grupos contendo 'SAP' representam **{total_sap}** chamados ({total_sap/total_backlog_geral:.0%}).")
-                    summary_text.append(f"* Grupos contendo '3N' representam **{total_3n}** chamados ({total_3n/total_backlog_geral:.0%}).")
-                    summary_text.append(f"* Os demais grupos (sem 'SAP' ou '3N') somam **{total_outros}** chamados ({total_outros/total_backlog_geral:.0%}).")
-                    
-                    if (total_sap + total_3n + total_outros) != total_backlog_geral:
-                            summary_text.append(f"\n*(Nota: Pode haver sobreposição nos totais acima se um grupo contiver 'SAP' e '3N'.)*")
-                
-                except Exception as e:
-                    summary_text.append(f"*Ocorreu um erro ao gerar a análise por categoria: {e}*")
-
-                st.info("\n".join(summary_text))
-        else:
-            st.warning("Nenhum dado para gerar o report visual.")
-
-    with tab3:
-        st.subheader("Evolução do Backlog")
-        dias_evolucao = st.slider("Ver evolução dos últimos dias:", min_value=7, max_value=30, value=7, key="slider_evolucao")
-
-        # PASSA O BACKLOG BASE PARA A FUNÇÃO DE CARREGAR DADOS (PARA RECUPERAÇÃO DE DATAS)
-        df_evolucao_tab3 = carregar_dados_evolucao(dias_evolucao, df_historico_fechados.copy()) 
-
-        if not df_evolucao_tab3.empty:
-
-            df_evolucao_tab3['Data'] = pd.to_datetime(df_evolucao_tab3['Data'])
-            df_evolucao_tab3 = df_evolucao_tab3[df_evolucao_tab3['Data'].dt.dayofweek < 5].copy()
 
-            if not df_evolucao_tab3.empty:
+                    st.markdown(f"<h3>Comparativo de Backlog: Atual vs. 15 Dias Atrás <span style='font-size: 0.6em; color: #666; font-weight: normal;'>({modelo.data_15dias_str})</span></h3>", unsafe_allow_html=True)
+                    st.dataframe(modelo.df_comparativo.set_index('Grupo').style.map(lambda val: 'background-color: #ffcccc' if val > 0 else ('background-color: #ccffcc' if val < 0 else 'background-color: white'), subset=['Diferença']), use_container_width=True)
+                    st.markdown("---")
 
-                st.info("Esta visualização combina os snapshots diários com o histórico de fechamentos.")
-                
-                try:
-                    latest_date_in_chart = df_evolucao_tab3['Data'].max()
-                    
-                    agregado_agora = df_aging.groupby('Atribuir a um grupo').size().reset_index(name='Total Chamados')
-                    
-                    if data_atual_str != 'N/A':
-                         date_agora = datetime.strptime(data_atual_str, '%d/%m/%Y')
-                    else:
-                         date_agora = datetime.now()
-                    
-                    agregado_agora['Data'] = pd.to_datetime(date_agora)
-                    
-                    if not df_evolucao_tab3.empty:
-                         df_evolucao_tab3 = df_evolucao_tab3[df_evolucao_tab3['Data'].dt.date != date_agora.date()]
-                    
-                    df_evolucao_tab3 = pd.concat([df_evolucao_tab3, agregado_agora], ignore_index=True)
-                    df_evolucao_tab3 = df_evolucao_tab3.sort_values(by=['Data', 'Atribuir a um grupo'])
-                    df_evolucao_tab3 = df_evolucao_tab3[~df_evolucao_tab3['Atribuir a um grupo'].str.contains(GRUPOS_EXCLUSAO_TOTAL_REGEX, case=False, na=False, regex=True)]
-                    
-                except Exception as e:
-                    pass
-
-                df_total_abertos = df_evolucao_tab3.groupby('Data')['Total Chamados'].sum().reset_index()
-                df_total_abertos = df_total_abertos.sort_values('Data')
-                df_total_abertos['Tipo'] = 'Abertos (Backlog)'
-                
-                end_date_tab3 = date.today()
-                start_date_tab3 = end_date_tab3 - timedelta(days=dias_evolucao)
-                
-                df_total_fechados = pd.DataFrame()
-                
-                if not df_encerrados_filtrado.empty and 'Data de Fechamento' in df_encerrados_filtrado.columns:
-                    df_fechados_hist = df_encerrados_filtrado.copy()
-                    
-                    col_criacao_real = None
-                    for col in df_fechados_hist.columns:
-                        if 'data de cria' in col.lower() or 'created' in col.lower() or 'aberto em' in col.lower():
-                            col_criacao_real = col
-                            break
-                    
-                    # --- RECUPERAÇÃO DE DADOS P/ O GRÁFICO USANDO MEMÓRIA FIXA ---
-                    # Se o número do dia já estiver salvo na memória, usamos ele.
-                    # Caso contrário, tentamos calcular.
-                    
-                    datas_unicas = df_fechados_hist['Data de Fechamento_dt_comp'].dt.strftime('%Y-%m-%d').unique()
-                    lista_fechados_memoria = []
-                    
-                    for dia_str in datas_unicas:
-                        # Tenta pegar do arquivo de memória
-                        valor_memoria = get_daily_metric(dia_str)
-                        
-                        if valor_memoria is not None:
-                            # Se tem na memória, usa o valor salvo
-                            lista_fechados_memoria.append({'Data': pd.to_datetime(dia_str), 'Total Chamados': valor_memoria})
-                        else:
-                            # Se não tem (dias antigos antes da correção), faz o cálculo dinâmico antigo (fast kill)
-                            # (Esse bloco é o fallback para o passado)
-                            pass 
-
-                    # Se conseguimos recuperar da memória, usamos essa lista como fonte principal
-                    if lista_fechados_memoria:
-                        df_total_fechados = pd.DataFrame(lista_fechados_memoria)
-                        df_total_fechados['Tipo'] = 'Fechados'
-                    
-                    # Se a memória estiver vazia (primeiro uso), calculamos dinamicamente com o filtro fast-kill
-                    if df_total_fechados.empty:
-                        col_criacao_real = None
-                        for col in df_fechados_hist.columns:
-                            if 'data de cria' in col.lower() or 'created' in col.lower() or 'aberto em' in col.lower():
-                                col_criacao_real = col
-                                break
-                        
-                        # --- LÓGICA DE RECUPERAÇÃO DE DATA INTELIGENTE PARA O GRÁFICO (Igual Tab 1) ---
-                        df_fechados_hist['dt_cri_temp'] = pd.NaT
-                        if col_criacao_real:
-                            # Já está padronizado no dataframe
-                            df_fechados_hist['dt_cri_temp'] = pd.to_datetime(df_fechados_hist[col_criacao_real], errors='coerce')
-
-                        # Se não achou data no histórico, busca no Backlog (df_abertos_base_para_reducao)
-                        if 'df_abertos_base_para_reducao' in locals() and not df_abertos_base_para_reducao.empty:
-                            id_col_fechado_hist = next((c for c in ['ID do ticket', 'ID do Ticket', 'ID'] if c in df_fechados_hist.columns), None)
-                            id_col_bk = next((c for c in ['ID do ticket', 'ID do Ticket', 'ID'] if c in df_abertos_base_para_reducao.columns), None)
-                            date_col_bk = next((c for c in ['Data de criação', 'Data de criaÃ§Ã£o', 'Created'] if c in df_abertos_base_para_reducao.columns), None)
-                            
-                            if id_col_fechado_hist and id_col_bk and date_col_bk:
-                                # Cria mapa
-                                temp_bk_g = df_abertos_base_para_reducao[[id_col_bk, date_col_bk]].copy()
-                                temp_bk_g[id_col_bk] = normalize_ids(temp_bk_g[id_col_bk])
-                                temp_bk_g['dt_valida'] = pd.to_datetime(temp_bk_g[date_col_bk], errors='coerce')
-                                temp_bk_g = temp_bk_g.dropna(subset=['dt_valida'])
-                                mapa_datas_g = dict(zip(temp_bk_g[id_col_bk], temp_bk_g['dt_valida']))
-                                
-                                # Preenche onde está NaT
-                                mask_nat_hist = df_fechados_hist['dt_cri_temp'].isna()
-                                df_fechados_hist.loc[mask_nat_hist, 'dt_cri_temp'] = df_fechados_hist.loc[mask_nat_hist, id_col_fechado_hist].apply(
-                                    lambda x: mapa_datas_g.get(str(x).replace('.0', '').strip(), pd.NaT)
-                                )
-                        # --------------------------------------------------------------------------------
-
-                        df_fechados_hist['dt_fec_temp'] = pd.to_datetime(df_fechados_hist['Data de Fechamento'], errors='coerce')
-                        
-                        # FILTRO LÍQUIDO PARA O GRÁFICO: Remove Fast Kill
-                        df_fechados_hist = df_fechados_hist[df_fechados_hist['dt_cri_temp'].dt.date != df_fechados_hist['dt_fec_temp'].dt.date]
-
-                        counts_por_data = df_fechados_hist.groupby(df_fechados_hist['Data de Fechamento_dt_comp'].dt.date).size()
-                        df_total_fechados = counts_por_data.reset_index(name='Total Chamados')
-                        df_total_fechados.rename(columns={'Data de Fechamento_dt_comp': 'Data'}, inplace=True)
-                        df_total_fechados['Data'] = pd.to_datetime(df_total_fechados['Data'])
-                        df_total_fechados['Tipo'] = 'Fechados'
-            
-                if not df_total_fechados.empty:
-                    df_total_diario_combinado = pd.concat([df_total_abertos, df_total_fechados], ignore_index=True)
-                else:
-                    df_total_diario_combinado = df_total_abertos
-                    
-                df_total_diario_combinado = df_total_diario_combinado.sort_values('Data')
-                
-                df_total_diario_combinado['Data (Eixo)'] = df_total_diario_combinado['Data'].dt.strftime('%d/%m')
-                ordem_datas_total = df_total_diario_combinado['Data (Eixo)'].unique().tolist()
-                
-                fig_total_evolucao = px.line(
-                    df_total_diario_combinado,
-                    x='Data (Eixo)',
-                    y='Total Chamados',
-                    color='Tipo',
-                    title='Evolução Total de Chamados: Backlog Líquido vs. Fechados (Líquido)',
-                    markers=True,
-                    labels={"Data (Eixo)": "Data", "Total Chamados": "Total Geral de Chamados", "Tipo": "Métrica"},
-                    category_orders={'Data (Eixo)': ordem_datas_total},
-                    color_discrete_map={
-                        'Abertos (Backlog)': '#375623', 
-                        'Fechados': '#f28801' 
-                    }
-                )
+                st.markdown(f"<h3>Histórico de Chamados Encerrados (Impacto no Backlog)</h3>", unsafe_allow_html=True)
 
-                fig_total_evolucao.update_layout(height=400)
-                st.plotly_chart(fig_total_evolucao, use_container_width=True)
+                secao_historico_encerrados(modelo, can_edit_table)
 
                 st.markdown("---")
+                st.subheader("Detalhar e Buscar Chamados")
 
-                st.info("Clique 2x na legenda de um grupo para isolá-lo.")
-
-                df_evolucao_tab3_sorted = df_evolucao_tab3.sort_values('Data')
-                df_evolucao_tab3_sorted['Data (Eixo)'] = df_evolucao_tab3_sorted['Data'].dt.strftime('%d/%m')
-
-                ordem_datas_grupo = df_evolucao_tab3_sorted['Data (Eixo)'].unique().tolist()
-
-                df_filtrado_display = df_evolucao_tab3_sorted.rename(columns={'Atribuir a um grupo': 'Grupo Atribuído'})
-
-                fig_evolucao_grupo = px.line(
-                    df_filtrado_display,
-                    x='Data (Eixo)',
-                    y='Total Chamados',
-                    color='Grupo Atribuído',
-                    title='Evolução por Grupo (Apenas Backlog Aberto)',
-                    markers=True,
-                    labels={ "Data (Eixo)": "Data", "Total Chamados": "Nº de Chamados", "Grupo Atribuído": "Grupo" },
-                    category_orders={'Data (Eixo)': ordem_datas_grupo}
-                )
-                fig_evolucao_grupo.update_layout(height=600)
-                st.plotly_chart(fig_evolucao_grupo, use_container_width=True)
-
-        else:
-            st.info("Ainda não há dados históricos de backlog suficientes.")
-
-    with tab4:
-        st.subheader("Evolução do Aging do Backlog")
-        
-        st.info("Esta visualização ainda está coletando dados históricos. Utilize as outras abas como referência principal por enquanto.")
-
-        try:
-            df_hist = carregar_evolucao_aging(dias_para_analisar=90) 
-
-            ordem_faixas_scaffold = ["0-2 dias", "3-5 dias", "6-10 dias", "11-20 dias", "21-29 dias", "30+ dias"]
-            hoje_data = None
-            hoje_counts_df = pd.DataFrame()
-
-            if 'df_aging' in locals() and not df_aging.empty and data_atual_str != 'N/A':
-                try:
-                    hoje_data = pd.to_datetime(datetime.strptime(data_atual_str, "%d/%m/%Y").date())
-                    hoje_counts_raw = df_aging['Faixa de Antiguidade'].value_counts().reset_index()
-                    hoje_counts_raw.columns = ['Faixa de Antiguidade', 'total']
-                    df_todas_faixas_hoje = pd.DataFrame({'Faixa de Antiguidade': ordem_faixas_scaffold})
-                    hoje_counts_df = pd.merge(
-                        df_todas_faixas_hoje,
-                        hoje_counts_raw,
-                        on='Faixa de Antiguidade',
-                        how='left'
-                    ).fillna(0)
-                    hoje_counts_df['total'] = hoje_counts_df['total'].astype(int)
-                    hoje_counts_df['data'] = hoje_data
-                except ValueError:
-                    st.warning("Data atual inválida. Não foi possível carregar dados de 'hoje'.")
-                    hoje_data = None
-            else:
-                st.warning("Não foi possível carregar dados de 'hoje'.")
-
-
-            if not df_hist.empty and not hoje_counts_df.empty:
-                df_combinado = pd.concat([df_hist, hoje_counts_df], ignore_index=True)
-                df_combinado = df_combinado.drop_duplicates(subset=['data', 'Faixa de Antiguidade'], keep='last')
-            elif not df_hist.empty:
-                df_combinado = df_hist.copy()
-            elif not hoje_counts_df.empty:
-                df_combinado = hoje_counts_df.copy()
-            else:
-                st.error("Não há dados históricos nem dados de hoje para a análise de aging.")
-                st.stop()
-
-            df_combinado['data'] = pd.to_datetime(df_combinado['data'])
-            df_combinado = df_combinado.sort_values(by=['data', 'Faixa de Antiguidade'])
-
-
-            st.markdown("##### Comparativo")
-            periodo_comp_opts = {
-                "Ontem": 1,
-                "7 dias atrás": 7,
-                "15 dias atrás": 15,
-                "30 dias atrás": 30
-            }
-            periodo_comp_selecionado = st.radio(
-                "Comparar 'Hoje' com:",
-                options=periodo_comp_opts.keys(),
-                horizontal=True,
-                key="radio_comp_periodo"
-            )
-
-            data_comparacao_final = None
-            df_comparacao_dados = pd.DataFrame()
-            data_comparacao_str = "N/A"
-
-            if hoje_data:
-                target_comp_date = hoje_data.date() - timedelta(days=periodo_comp_opts[periodo_comp_selecionado])
-                data_comparacao_encontrada, _ = find_closest_snapshot_before(hoje_data.date(), target_comp_date) 
-
-                if data_comparacao_encontrada:
-                    data_comparacao_final = pd.to_datetime(data_comparacao_encontrada)
-                    data_comparacao_str = data_comparacao_final.strftime('%d/%m')
-                    df_comparacao_dados = df_combinado[df_combinado['data'] == data_comparacao_final].copy()
-                else:
-                    st.warning(f"Não foi encontrado snapshot próximo a {periodo_comp_selecionado} ({target_comp_date.strftime('%d/%m')}). A comparação pode não ser precisa.")
-
-
-            cols_linha1 = st.columns(3)
-            cols_linha2 = st.columns(3)
-            cols_map = {0: cols_linha1[0], 1: cols_linha1[1], 2: cols_linha1[2], 
-                        3: cols_linha2[0], 4: cols_linha2[1], 5: cols_linha2[2]}
-
-            for i, faixa in enumerate(ordem_faixas_scaffold):
-                with cols_map[i]:
-                    valor_hoje = 'N/A'
-                    if not hoje_counts_df.empty:
-                        valor_hoje_series = hoje_counts_df.loc[hoje_counts_df['Faixa de Antiguidade'] == faixa, 'total']
-                        if not valor_hoje_series.empty:
-                            valor_hoje = int(valor_hoje_series.iloc[0])
-                    
-                    valor_comparacao = 0
-                    delta_text = "N/A"
-                    delta_class = "delta-neutral"
-
-                    if data_comparacao_final and not df_comparacao_dados.empty and isinstance(valor_hoje, int):
-                        valor_comp_series = df_comparacao_dados.loc[df_comparacao_dados['Faixa de Antiguidade'] == faixa, 'total']
-                        if not valor_comp_series.empty:
-                            valor_comparacao = int(valor_comp_series.iloc[0])
-                        
-                        delta_abs = valor_hoje - valor_comparacao
-                        delta_perc = (delta_abs / valor_comparacao) if valor_comparacao > 0 else 0
-                        delta_text, delta_class = formatar_delta_card(delta_abs, delta_perc, valor_comparacao, data_comparacao_str)
-                    elif isinstance(valor_hoje, int):
-                        delta_text = "Sem dados para comparar"
-
-                    st.markdown(f"""
-                    <div class="metric-box">
-                        <span class="label">{faixa}</span>
-                        <span class="value">{valor_hoje}</span>
-                        <span class="delta {delta_class}">{delta_text}</span>
-                    </div>
-                    """, unsafe_allow_html=True)
-
-            st.divider()
-
-            st.markdown(f"##### Gráfico de Evolução (Últimos 7 dias)")
-
-            periodo_grafico = "Últimos 7 dias"
-            hoje_filtro_grafico = datetime.now().date()
-            data_inicio_filtro_grafico = hoje_filtro_grafico - timedelta(days=7)
-            df_filtrado_grafico = df_combinado[df_combinado['data'].dt.date >= data_inicio_filtro_grafico].copy()
-
-
-            if df_filtrado_grafico.empty:
-                st.warning("Não há dados para o período selecionado.")
-            else:
-                df_grafico = df_filtrado_grafico.sort_values(by='data')
-                df_grafico['Data (Eixo)'] = df_grafico['data'].dt.strftime('%d/%m')
-                ordem_datas_grafico = df_grafico['Data (Eixo)'].unique().tolist()
+                secao_detalhes_faixa(df_aging, can_edit_table)
+                if not df_aging.empty:
+                    secao_busca_grupo(df_aging)
 
-                def lighten_color(hex_color, amount=0.2):
-                    try:
-                        hex_color = hex_color.lstrip('#')
-                        h, l, s = colorsys.rgb_to_hls(*[int(hex_color[i:i+2], 16)/255.0 for i in (0, 2, 4)])
-                        new_l = l + (1 - l) * amount
-                        r, g, b = colorsys.hls_to_rgb(h, new_l, s)
-                        return f"#{int(r*255):02x}{int(g*255):02x}{int(b*255):02x}"
-                    except Exception: return hex_color
-                base_color = "#375623"
-                palette = [ lighten_color(base_color, 0.85), lighten_color(base_color, 0.70), lighten_color(base_color, 0.55), lighten_color(base_color, 0.40), lighten_color(base_color, 0.20), base_color ]
-                color_map = {faixa: color for faixa, color in zip(ordem_faixas_scaffold, palette)}
-
-                tipo_grafico = st.radio(
-                    "Selecione o tipo de gráfico:",
-                    ("Gráfico de Linha (Comparativo)", "Gráfico de Área (Composição)"),
-                    horizontal=True,
-                    key="radio_tipo_grafico_aging"
-                )
+        with tab2:
+            if tab2.open:
+                aba_report_visual(modelo)
 
-                if tipo_grafico == "Gráfico de Linha (Comparativo)":
-                    fig_aging_all = px.line(
-                        df_grafico,
-                        x='Data (Eixo)',
-                        y='total',
-                        color='Faixa de Antiguidade',
-                        title='Evolução por Faixa de Antiguidade',
-                        markers=True,
-                        labels={"Data (Eixo)": "Data", "total": "Total Chamados", "Faixa de Antiguidade": "Faixa"},
-                        category_orders={
-                            'Data (Eixo)': ordem_datas_grafico,
-                            'Faixa de Antiguidade': ordem_faixas_scaffold
-                        },
-                        color_discrete_map=color_map
-                    )
-                else:
-                    fig_aging_all = px.area(
-                        df_grafico,
-                        x='Data (Eixo)',
-                        y='total',
-                        color='Faixa de Antiguidade',
-                        title='Composição da Evolução por Antiguidade',
-                        markers=True,
-                        labels={"Data (Eixo)": "Data", "total": "Total Chamados", "Faixa de Antiguidade": "Faixa"},
-                        category_orders={
-                            'Data (Eixo)': ordem_datas_grafico,
-                            'Faixa de Antiguidade': ordem_faixas_scaffold
-                        },
-                        color_discrete_map=color_map
-                    )
-                
-                fig_aging_all.update_layout(height=500)
-                st.plotly_chart(fig_aging_all, use_container_width=True)
+        with tab3:
+            if tab3.open:
+                aba_evolucao_semanal(modelo)
 
-        except Exception as e:
-            st.error(f"Ocorreu um erro ao gerar a aba de Evolução Aging: {e}")
-            st.exception(e)
+        with tab4:
+            if tab4.open:
+                aba_evolucao_aging(modelo)
 
 except Exception as e:
     st.error(f"Ocorreu um erro ao carregar os dados: {e}")
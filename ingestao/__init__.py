@@ -0,0 +1,38 @@
+"""
+Ingestão do Backlog Copa: leitura e padronização das exportações, snapshots,
+histórico de fechados, estado persistente, índices derivados e o cache de
+DataFrames que o dashboard usa para os arquivos lidos.
+
+Não depende do Streamlit: o dashboard importa daqui e a mesma ingestão roda
+pela linha de comando (``python -m ingestao``), por exemplo a partir do cron.
+"""
+
+from .arquivos import (
+    ErroLeituraCSV, get_file_mtime, ler_csv, ler_csv_tipado, ler_exportacao, processar_arquivo_enviado, salvar_arquivo,
+    serializar_csv,
+)
+from .cache import CacheQuadros, contem_caminho
+from .config import *
+from .estado import (
+    carregar_contatos, carregar_observacoes, conectar_estado, gravar_datas_referencia, ler_datas_referencia,
+    ler_json, ler_metricas_diarias, limpar_metricas_diarias, migrar_estado_json_para_sqlite,
+    salvar_alteracoes_tickets, update_daily_metrics, versao_estado,
+)
+from .historico import (
+    anexar_historico_fechados, aplicar_fechamentos, compactar_historico_fechados, filtrar_historico_encerrados,
+    iniciar_compactacao_historico, ler_fechamentos_por_ticket, ler_historico_fechados, listar_particoes_fechados,
+    meses_no_intervalo, migrar_historico_fechados_para_particoes, montar_indice_fechamento,
+    preencher_criacao_historico, versao_historico_fechados,
+)
+from .indices import atualizar_indice_aging, atualizar_indice_evolucao
+from .normalizacao import (
+    TIPO_TEXTO_LIVRE, adicionar_chave_ids, aplicar_esquema_tipado, categorizar_idade_vetorizado, chaves_dos_ids,
+    classificar_grupos, codificar_ids, coluna_data_criacao, mascara_grupos, normalizar_datas, normalize_ids,
+)
+from .pipeline import (
+    ResultadoIngestao, atualizacao_completa, atualizacao_fechados, limpar_historico, preencher_criacao_fechados,
+)
+from .snapshots import (
+    SnapshotCatalog, caminho_snapshot_colunar, carregar_snapshot, listar_snapshots, migrar_snapshots_para_parquet,
+    montar_indice_criacao, salvar_snapshot_colunar,
+)
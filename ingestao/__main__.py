@@ -0,0 +1,77 @@
+"""
+Linha de comando da ingestão, para rodar fora do dashboard (ex.: cron):
+
+    python -m ingestao completa backlog_atual.xlsx backlog_15_dias.xlsx
+    python -m ingestao fechados fechados_do_dia.csv
+    python -m ingestao indices
+    python -m ingestao criacao
+    python -m ingestao compactar
+"""
+
+import argparse
+import os
+import sys
+
+from .arquivos import ler_exportacao
+from .estado import migrar_estado_json_para_sqlite
+from .historico import compactar_historico_fechados, migrar_historico_fechados_para_particoes
+from .indices import atualizar_indice_aging, atualizar_indice_evolucao
+from .pipeline import atualizacao_completa, atualizacao_fechados, preencher_criacao_fechados
+from .snapshots import migrar_snapshots_para_parquet
+
+def _ler_exportacao(file_path):
+    with open(file_path, 'rb') as f:
+        return ler_exportacao(os.path.basename(file_path), f.read())
+
+def _exibir(resultado):
+    for mensagem in resultado.informacoes:
+        print(mensagem)
+    if resultado.resumo:
+        print(resultado.resumo)
+    for mensagem in resultado.avisos:
+        print(f"AVISO: {mensagem}", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m ingestao", description="Ingestão do Backlog Copa fora do dashboard.")
+    parser.add_argument("--diretorio", default=".", help="Raiz do projeto (onde ficam 'data/' e o banco de estado).")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    completa = subparsers.add_parser("completa", help="Atualização completa: backlog atual e de 15 dias atrás.")
+    completa.add_argument("backlog_atual")
+    completa.add_argument("backlog_15dias")
+
+    fechados = subparsers.add_parser("fechados", help="Atualização rápida: chamados fechados no dia.")
+    fechados.add_argument("arquivo_fechados")
+
+    subparsers.add_parser("indices", help="Atualiza os índices de evolução e de aging.")
+    subparsers.add_parser("criacao", help="Grava no histórico as datas de criação recuperáveis do backlog e dos snapshots.")
+    subparsers.add_parser("compactar", help="Remove do histórico as linhas substituídas.")
+
+    args = parser.parse_args(argv)
+    # Caminhos dos arquivos de entrada são resolvidos antes de mudar para a raiz do projeto
+    entradas = [os.path.abspath(getattr(args, nome)) for nome in ("backlog_atual", "backlog_15dias", "arquivo_fechados") if hasattr(args, nome)]
+    os.chdir(args.diretorio)
+
+    migrar_snapshots_para_parquet()
+    migrar_historico_fechados_para_particoes()
+    migrar_estado_json_para_sqlite()
+
+    if args.comando == "completa":
+        _exibir(atualizacao_completa(_ler_exportacao(entradas[0]), _ler_exportacao(entradas[1])))
+    elif args.comando == "fechados":
+        resultado = atualizacao_fechados(_ler_exportacao(entradas[0]))
+        _exibir(resultado)
+        # Em primeiro plano: um thread de fundo morreria com o processo, no meio da regravação
+        if resultado.compactacao_pendente:
+            compactar_historico_fechados()
+    elif args.comando == "indices":
+        atualizar_indice_evolucao()
+        atualizar_indice_aging()
+    elif args.comando == "criacao":
+        preencher_criacao_fechados()
+    elif args.comando == "compactar":
+        compactar_historico_fechados()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
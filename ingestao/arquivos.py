@@ -0,0 +1,233 @@
+import fcntl
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+
+import pandas as pd
+
+from .config import COLUNAS_USADAS, PADROES_COLUNAS_DATA
+from .normalizacao import adicionar_chave_ids, aplicar_esquema_tipado, normalizar_datas
+
+class ErroLeituraCSV(Exception):
+    """Falha ao detectar o dialeto ou ao interpretar um CSV local."""
+
+def get_file_mtime(file_path):
+    if os.path.exists(file_path):
+        return os.path.getmtime(file_path)
+    return 0
+
+def salvar_arquivo(file_path, file_content, is_binary=False):
+    directory = os.path.dirname(file_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    mode = 'wb' if is_binary else 'w'
+    encoding = None if is_binary else 'utf-8'
+    with open(file_path, mode, encoding=encoding) as f:
+        f.write(file_content)
+
+@contextmanager
+def trava_arquivo(caminho_trava):
+    """
+    Trava exclusiva entre processos e threads ('flock' no arquivo de trava). Cada uso
+    abre o arquivo de novo, então não pode ser aninhada para o mesmo arquivo.
+    """
+    os.makedirs(os.path.dirname(caminho_trava) or '.', exist_ok=True)
+    with open(caminho_trava, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def gravar_atomico(file_path, escrever):
+    """
+    Chama 'escrever(caminho_temporario)' com um temporário exclusivo no mesmo diretório
+    e troca atomicamente pelo destino; escritores concorrentes nunca dividem o temporário.
+    """
+    directory = os.path.dirname(file_path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory, suffix='.tmp', delete=False) as f:
+        temp_path = f.name
+    try:
+        escrever(temp_path)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+def gravar_parquet(df, file_path):
+    gravar_atomico(file_path, lambda temp_path: df.to_parquet(temp_path, index=False))
+
+TAMANHO_AMOSTRA_DIALETO = 64 * 1024
+
+def detectar_dialeto(amostra):
+    """Separador (';' ou ',', pela linha de cabeçalho) e encoding a partir dos primeiros bytes."""
+    if amostra.startswith(b'\xef\xbb\xbf'):
+        encoding = 'utf-8-sig'
+        texto = amostra[3:].decode('utf-8', errors='ignore')
+    else:
+        try:
+            texto = amostra.decode('utf-8')
+            encoding = 'utf-8'
+        except UnicodeDecodeError as e:
+            if e.reason == 'unexpected end of data':
+                # A amostra cortou um caractere multibyte no final
+                texto = amostra[:e.start].decode('utf-8')
+                encoding = 'utf-8'
+            else:
+                texto = amostra.decode('latin1')
+                encoding = 'latin1'
+
+    cabecalho = texto.split('\n', 1)[0]
+    contagem = {sep: cabecalho.count(sep) for sep in [';', ',']}
+    sep = max(contagem, key=contagem.get)
+    if contagem[sep] == 0:
+        raise ValueError("nenhum separador (';' ou ',') encontrado no cabeçalho")
+    return sep, encoding
+
+@lru_cache(maxsize=256)
+def detectar_dialeto_csv(file_path, file_mtime):
+    """Detecta separador e encoding pelos primeiros KB do arquivo (cache por caminho + mtime)."""
+    with open(file_path, 'rb') as f:
+        return detectar_dialeto(f.read(TAMANHO_AMOSTRA_DIALETO))
+
+def projecao_colunas(colunas=None, excluir=()):
+    """'usecols' do read_csv para a projeção pedida (nomes comparados sem espaços nas bordas)."""
+    if colunas is None and not excluir:
+        return None
+    return lambda col: (colunas is None or col.strip() in colunas) and col.strip() not in excluir
+
+def ler_csv(file_path, colunas=None, excluir=()):
+    """Lê o CSV como texto; DataFrame vazio se o arquivo não existe, ErroLeituraCSV se não é legível."""
+    if not os.path.exists(file_path):
+        return pd.DataFrame()
+
+    try:
+        sep, enc = detectar_dialeto_csv(file_path, get_file_mtime(file_path))
+    except Exception as e:
+        raise ErroLeituraCSV(f"Não foi possível ler o arquivo '{file_path}': {e}. Verifique se é um CSV válido.") from e
+
+    try:
+        # Lê como string para não deixar o pandas "pensar" demais
+        df = pd.read_csv(file_path, sep=sep, encoding=enc,
+                         dtype=str, engine='c', usecols=projecao_colunas(colunas, excluir),
+                         low_memory=False, on_bad_lines='warn')
+    except Exception as e:
+        raise ErroLeituraCSV(f"Não foi possível ler o arquivo '{file_path}' (separador '{sep}', encoding {enc}): {e}") from e
+
+    df.columns = df.columns.str.strip()
+    df = df.loc[:, ~df.columns.duplicated()]
+    df.dropna(how='all', inplace=True)
+    return df
+
+def ler_csv_tipado(file_path, colunas=None, excluir=()):
+    """Lê o CSV com IDs normalizados, chave inteira e esquema tipado."""
+    return aplicar_esquema_tipado(adicionar_chave_ids(ler_csv(file_path, colunas, excluir)))
+
+def eh_coluna_data(nome_coluna):
+    return any(p.lower() in nome_coluna.lower() for p in PADROES_COLUNAS_DATA)
+
+def coluna_exportada(nome_coluna):
+    """Colunas de uma exportação que a ingestão guarda: as usadas e as de data."""
+    nome_coluna = nome_coluna.strip()
+    return nome_coluna in COLUNAS_USADAS or (bool(nome_coluna) and eh_coluna_data(nome_coluna))
+
+def _texto_celula(valor):
+    """Mesma conversão para texto que o pd.read_excel(dtype=str) aplica às células."""
+    if valor is None or valor == '':
+        return None
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return str(valor)
+
+def ler_xlsx_streaming(conteudo, progresso=None, linhas_por_aviso=2000, manter_coluna=None):
+    """
+    Lê a primeira planilha do XLSX em modo somente leitura, linha a linha, mantendo só
+    as colunas aceitas por 'manter_coluna(nome)' (todas, se None); as demais células nem
+    são convertidas. Células de data já vêm como datetime do Excel e viram
+    datetime64 sem reinterpretar texto. 'progresso(linhas_lidas, total_estimado)' é
+    chamado a cada 'linhas_por_aviso' linhas; o total pode ser None se a planilha não o declarar.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(BytesIO(conteudo), read_only=True, data_only=True)
+    try:
+        planilha = workbook.worksheets[0]
+        total_estimado = planilha.max_row - 1 if planilha.max_row else None
+        cabecalho = [str(c).strip() if c is not None else '' for c in next(planilha.iter_rows(max_row=1, values_only=True), ())]
+        manter = [i for i, nome in enumerate(cabecalho) if manter_coluna is None or manter_coluna(nome)]
+        valores = {i: [] for i in manter}
+        lidas = 0
+        # Células à direita da última coluna mantida não são convertidas
+        for linha in planilha.iter_rows(min_row=2, max_col=max(manter, default=0) + 1, values_only=True):
+            for i in manter:
+                valores[i].append(linha[i] if i < len(linha) else None)
+            lidas += 1
+            if progresso and lidas % linhas_por_aviso == 0:
+                progresso(lidas, total_estimado)
+    finally:
+        workbook.close()
+    if progresso:
+        progresso(lidas, lidas)
+
+    colunas = {}
+    for i in manter:
+        coluna = valores.pop(i)
+        if eh_coluna_data(cabecalho[i]) and all(v is None or isinstance(v, datetime) for v in coluna):
+            colunas[cabecalho[i]] = pd.to_datetime(pd.Series(coluna, dtype=object))
+        else:
+            # Datas digitadas como texto seguem para a mesma detecção de formato do CSV
+            colunas[cabecalho[i]] = pd.Series([_texto_celula(v) for v in coluna], dtype='str')
+    return pd.DataFrame(colunas)
+
+def ler_csv_enviado(conteudo, manter_coluna=None):
+    """
+    Lê um CSV enviado direto dos bytes, com o parser C: separador pela linha de
+    cabeçalho e encoding pelos primeiros KB. Se o restante do arquivo não for UTF-8
+    válido, relê em latin1. 'manter_coluna(nome)' projeta as colunas (todas, se None).
+    """
+    sep, enc = detectar_dialeto(conteudo[:TAMANHO_AMOSTRA_DIALETO])
+    try:
+        # Lê como string para não deixar o pandas "pensar" demais
+        return pd.read_csv(BytesIO(conteudo), sep=sep, encoding=enc, dtype=str, engine='c', usecols=manter_coluna, low_memory=False)
+    except UnicodeDecodeError:
+        return pd.read_csv(BytesIO(conteudo), sep=sep, encoding='latin1', dtype=str, engine='c', usecols=manter_coluna, low_memory=False)
+
+def ler_exportacao(nome_arquivo, conteudo, progresso=None):
+    """
+    Lê uma exportação (CSV em qualquer dialeto ou XLSX) uma única vez, no DataFrame
+    normalizado de que as atualizações partem: só as colunas de 'coluna_exportada' (a
+    mesma projeção nos dois formatos), nomes sem espaços nas bordas, sem linhas vazias
+    e colunas de data em datetime64.
+    'progresso' é repassado à leitura de XLSX (ver 'ler_xlsx_streaming').
+    """
+    if nome_arquivo.endswith('.xlsx'):
+        df = ler_xlsx_streaming(conteudo, progresso, manter_coluna=coluna_exportada)
+    else:
+        df = ler_csv_enviado(conteudo, manter_coluna=coluna_exportada)
+
+    df.columns = df.columns.str.strip()
+    df.dropna(how='all', inplace=True)
+
+    # Padroniza todas as colunas de data possíveis para ISO (YYYY-MM-DD) usando input BR;
+    # as que vieram do XLSX já tipadas passam direto
+    for col in df.columns:
+        if eh_coluna_data(col):
+            # Formato detectado uma vez por coluna (BR na entrada, ISO se já processado)
+            df[col] = normalizar_datas(df[col])
+    return df
+
+def serializar_csv(df):
+    """CSV padrão da base: separador ';', UTF-8 e datas em ISO."""
+    # Salva formatado como ISO para evitar confusão futura ao reler; o CSV é
+    # codificado direto no buffer de bytes, sem uma cópia intermediária em str
+    output = BytesIO()
+    df.to_csv(output, index=False, sep=';', encoding='utf-8', date_format='%Y-%m-%d %H:%M:%S')
+    return output.getvalue()
+
+def processar_arquivo_enviado(nome_arquivo, conteudo, progresso=None):
+    """Converte uma exportação no CSV padrão da base. Retorna os bytes do CSV."""
+    return serializar_csv(ler_exportacao(nome_arquivo, conteudo, progresso))
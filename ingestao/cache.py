@@ -0,0 +1,70 @@
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# --- CACHE DE DATAFRAMES COM ORÇAMENTO EM BYTES ---
+# Backlogs, partições do histórico e snapshots ficam em um LRU do processo limitado
+# pelo tamanho real dos DataFrames (memory_usage(deep=True)). Ao carregar uma nova
+# versão (mtime) de um arquivo as anteriores saem na hora, e o LRU descarta os menos
+# usados quando o orçamento estoura; assim o servidor não acumula versões antigas.
+
+def contem_caminho(diretorio_ou_arquivo, caminho):
+    return caminho == diretorio_ou_arquivo or caminho.startswith(diretorio_ou_arquivo + os.sep)
+
+class CacheQuadros:
+    """LRU de DataFrames por (artefato, arquivo, mtime, parâmetros) com contadores por artefato."""
+
+    def __init__(self, orcamento_bytes):
+        self.orcamento_bytes = orcamento_bytes
+        self.bytes_usados = 0
+        self._itens = OrderedDict()
+        self._trava = threading.Lock()
+        self._contadores = {}
+
+    def _contador(self, artefato):
+        return self._contadores.setdefault(artefato, {'hits': 0, 'misses': 0, 'evictions': 0})
+
+    def _remover(self, chave):
+        self.bytes_usados -= self._itens.pop(chave)[1]
+        self._contador(chave[0])['evictions'] += 1
+
+    def obter(self, artefato, file_path, file_mtime, parametros, carregar):
+        """Devolve o DataFrame em cache ou chama 'carregar()'; exceções de 'carregar' não são cacheadas."""
+        chave = (artefato, file_path, file_mtime, parametros)
+        with self._trava:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self._contador(artefato)['hits'] += 1
+                # Cópia rasa: com copy-on-write, alterações do chamador não chegam ao cache
+                return self._itens[chave][0].copy(deep=False)
+            self._contador(artefato)['misses'] += 1
+        df = carregar()
+        tamanho = int(df.memory_usage(deep=True).sum())
+        with self._trava:
+            versoes_antigas = [c for c in self._itens if c[:2] == (artefato, file_path) and c[2] != file_mtime]
+            for c in versoes_antigas:
+                self._remover(c)
+            if chave not in self._itens:
+                self._itens[chave] = (df, tamanho)
+                self.bytes_usados += tamanho
+            while self.bytes_usados > self.orcamento_bytes and len(self._itens) > 1:
+                self._remover(next(iter(self._itens)))
+        return df.copy(deep=False)
+
+    def invalidar(self, caminhos):
+        """Descarta as entradas de arquivos dentro dos caminhos (arquivo ou diretório) alterados."""
+        caminhos = [os.path.normpath(c) for c in caminhos]
+        with self._trava:
+            for chave in [c for c in self._itens if any(contem_caminho(caminho, os.path.normpath(c[1])) for caminho in caminhos)]:
+                self._remover(chave)
+
+    def metricas(self):
+        """Hits, misses, evictions, entradas e bytes em uso por artefato."""
+        with self._trava:
+            linhas = {artefato: dict(contador, entradas=0, bytes=0) for artefato, contador in self._contadores.items()}
+            for (artefato, *_), (_, tamanho) in self._itens.items():
+                linhas[artefato]['entradas'] += 1
+                linhas[artefato]['bytes'] += tamanho
+        return pd.DataFrame.from_dict(linhas, orient='index').rename_axis('Artefato')
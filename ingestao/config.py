@@ -0,0 +1,63 @@
+# --- CONFIGURAÇÕES E CONSTANTES ---
+# Compartilhadas entre a ingestão (linha de comando) e o dashboard.
+# Os caminhos são relativos ao diretório de trabalho (raiz do projeto).
+
+GRUPOS_EXCLUSAO_PERMANENTE_REGEX = r'RH|Aprovadores GGM|RDM'
+GRUPOS_EXCLUSAO_PERMANENTE_TEXTO = "'RH', 'Aprovadores GGM' ou 'RDM'"
+
+GRUPOS_DE_AVISO_REGEX = r'Service Desk \(L1\)|LIQ-SUTEL'
+GRUPOS_DE_AVISO_TEXTO = "'Service Desk (L1)' ou 'LIQ-SUTEL'"
+
+GRUPOS_EXCLUSAO_TOTAL_REGEX = f"{GRUPOS_EXCLUSAO_PERMANENTE_REGEX}|{GRUPOS_DE_AVISO_REGEX}"
+
+DATA_DIR = "data/"
+SNAPSHOT_DIR = f"{DATA_DIR}snapshots"
+INDEX_DIR = f"{DATA_DIR}indices"
+INDICE_EVOLUCAO_FILE = f"{INDEX_DIR}/evolucao_grupos.parquet"
+INDICE_AGING_FILE = f"{INDEX_DIR}/aging_faixas.parquet"
+STATE_FILE_CONTACTS = "contacted_tickets.json"
+STATE_FILE_OBSERVATIONS = "ticket_observations.json"
+STATE_FILE_REF_DATES = "datas_referencia.txt"
+STATE_FILE_MASTER_CLOSED_CSV = f"{DATA_DIR}historico_fechados_master.csv"
+HISTORICO_FECHADOS_DIR = f"{DATA_DIR}historico_fechados"
+HISTORICO_FECHADOS_VERSAO = f"{HISTORICO_FECHADOS_DIR}/versao.txt"
+# Fechamento vigente de cada ticket (ID e data), mantido pelas escritas para não ler as partições
+HISTORICO_FECHAMENTOS_FILE = f"{HISTORICO_FECHADOS_DIR}/fechamentos.parquet"
+# Trava entre processos (dashboard e linha de comando) das escritas no histórico e nos índices
+TRAVA_HISTORICO_FILE = f"{HISTORICO_FECHADOS_DIR}/.trava"
+STATE_FILE_PREV_CLOSED = "previous_closed_ids.json"
+STATE_FILE_METRICS_DB = "metricas_diarias.json"
+STATE_DB_FILE = "estado_dashboard.db"
+
+BACKLOG_ATUAL_FILE = f"{DATA_DIR}dados_atuais.csv"
+BACKLOG_15DIAS_FILE = f"{DATA_DIR}dados_15_dias.csv"
+FECHADOS_DIA_FILE = f"{DATA_DIR}dados_fechados.csv"
+
+ID_COLS = ('ID do ticket', 'ID do Ticket', 'ID')
+
+# Trechos (sem diferenciar maiúsculas) que identificam colunas de data nas exportações
+PADROES_COLUNAS_DATA = (
+    'Data de criação', 'Data de criaÃ§Ã£o', 'Data de Criacao', 'Created',
+    'Aberto em', 'Criado em', 'Criação', 'Data de Abertura',
+    'Data de Fechamento', 'Data de Resolução', 'Resolved', 'Closed',
+)
+
+# Colunas que o dashboard e a ingestão leem (além das de data); a leitura das exportações (CSV e XLSX) descarta as demais
+COLUNAS_USADAS = ID_COLS + (
+    'Tipo de ticket', 'Status', 'Atribuir a um indivíduo', 'Atribuir a um grupo', 'Grupo Atribuído', 'Grupo',
+    'Analista atribuído', 'Analista', 'Descrição', 'Descricao', 'Description', 'Assunto', 'Summary', 'Detalhes',
+)
+
+# Chave inteira canônica do ticket, gravada ao lado do ID original (que segue para exibição)
+ID_CHAVE_COL = 'ID chave'
+ID_CHAVE_PREFIXO = 10**12
+
+# Esquema aplicado na carga: colunas de baixa cardinalidade viram categóricas (groupby,
+# value_counts e filtros trabalham nos códigos) e o texto livre fica em strings Arrow
+COLUNAS_CATEGORICAS = ['Atribuir a um grupo', 'Tipo de ticket', 'Status', 'Atribuir a um indivíduo', 'Analista atribuído']
+COLUNAS_TEXTO_LIVRE = ('Descrição', 'Detalhes')
+
+# Formatos aceitos nas colunas de data: ISO (como a ingestão grava) e BR dd/mm/aaaa
+FORMATOS_DATA = ('ISO8601', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y')
+
+ORDEM_FAIXAS = ["0-2 dias", "3-5 dias", "6-10 dias", "11-20 dias", "21-29 dias", "30+ dias"]
@@ -0,0 +1,172 @@
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+import pandas as pd
+
+from .arquivos import get_file_mtime
+from .config import (
+    STATE_DB_FILE, STATE_FILE_CONTACTS, STATE_FILE_METRICS_DB, STATE_FILE_OBSERVATIONS, STATE_FILE_REF_DATES,
+)
+
+def ler_json(file_path, default_return_type='dict'):
+    default_return = (default_return_type == 'dict' and {} or [])
+    if not os.path.exists(file_path):
+        return default_return
+
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+            return json.loads(content) if content else default_return
+    except Exception:
+        return default_return
+
+# --- DATAS DE REFERÊNCIA ---
+
+def ler_datas_referencia(file_path=STATE_FILE_REF_DATES):
+    if not os.path.exists(file_path):
+        return {}
+
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        dates = {}
+        for line in content.strip().split('\n'):
+            if ':' in line:
+                key, value = line.split(':', 1)
+                dates[key.strip()] = value.strip()
+        return dates
+    except Exception:
+        return {}
+
+def gravar_datas_referencia(datas, file_path=STATE_FILE_REF_DATES):
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(f"{chave}:{valor}" for chave, valor in datas.items()))
+
+# --- ESTADO PERSISTENTE (SQLITE) ---
+# Contatos, observações e métricas diárias ficam em um SQLite em modo WAL: cada
+# edição grava só as linhas alteradas e leitores não bloqueiam quem está salvando.
+
+def conectar_estado():
+    conn = sqlite3.connect(STATE_DB_FILE, timeout=10)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS contatos (
+            ticket_id TEXT PRIMARY KEY,
+            atualizado_em TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS observacoes (
+            ticket_id TEXT PRIMARY KEY,
+            observacao TEXT NOT NULL,
+            atualizado_em TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS metricas_diarias (
+            data TEXT PRIMARY KEY,
+            fechados_liquido INTEGER NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS migracoes (
+            nome TEXT PRIMARY KEY,
+            executada_em TEXT NOT NULL
+        );
+    """)
+    return conn
+
+def migrar_estado_json_para_sqlite():
+    """Migração única dos JSONs de contatos, observações e métricas para o SQLite."""
+    agora = datetime.now().isoformat()
+    conn = conectar_estado()
+    try:
+        with conn:
+            if conn.execute("SELECT 1 FROM migracoes WHERE nome = 'estado_json'").fetchone():
+                return False
+            contatos = ler_json(STATE_FILE_CONTACTS, default_return_type='list')
+            if isinstance(contatos, list):
+                conn.executemany("INSERT OR IGNORE INTO contatos (ticket_id, atualizado_em) VALUES (?, ?)",
+                                 [(str(ticket_id), agora) for ticket_id in contatos])
+            observacoes = ler_json(STATE_FILE_OBSERVATIONS, default_return_type='dict')
+            if isinstance(observacoes, dict):
+                conn.executemany("INSERT OR IGNORE INTO observacoes (ticket_id, observacao, atualizado_em) VALUES (?, ?, ?)",
+                                 [(str(ticket_id), texto or '', agora) for ticket_id, texto in observacoes.items()])
+            metricas = ler_json(STATE_FILE_METRICS_DB, default_return_type='dict')
+            if isinstance(metricas, dict):
+                conn.executemany("INSERT OR IGNORE INTO metricas_diarias (data, fechados_liquido, updated_at) VALUES (?, ?, ?)",
+                                 [(data, int(valor.get("fechados_liquido", 0)), valor.get("updated_at", agora))
+                                  for data, valor in metricas.items() if isinstance(valor, dict)])
+            conn.execute("INSERT INTO migracoes (nome, executada_em) VALUES ('estado_json', ?)", (agora,))
+        return True
+    finally:
+        conn.close()
+
+def carregar_contatos():
+    conn = conectar_estado()
+    try:
+        return {row[0] for row in conn.execute("SELECT ticket_id FROM contatos")}
+    finally:
+        conn.close()
+
+def carregar_observacoes():
+    conn = conectar_estado()
+    try:
+        return dict(conn.execute("SELECT ticket_id, observacao FROM observacoes"))
+    finally:
+        conn.close()
+
+def salvar_alteracoes_tickets(contatos_marcados=(), contatos_desmarcados=(), observacoes=None):
+    """Grava só os tickets alterados, em uma única transação."""
+    agora = datetime.now().isoformat()
+    conn = conectar_estado()
+    try:
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO contatos (ticket_id, atualizado_em) VALUES (?, ?)",
+                             [(ticket_id, agora) for ticket_id in contatos_marcados])
+            conn.executemany("DELETE FROM contatos WHERE ticket_id = ?",
+                             [(ticket_id,) for ticket_id in contatos_desmarcados])
+            conn.executemany("""
+                INSERT INTO observacoes (ticket_id, observacao, atualizado_em) VALUES (?, ?, ?)
+                ON CONFLICT(ticket_id) DO UPDATE SET observacao = excluded.observacao, atualizado_em = excluded.atualizado_em
+            """, [(ticket_id, texto or '', agora) for ticket_id, texto in (observacoes or {}).items()])
+    finally:
+        conn.close()
+
+# --- MÉTRICAS DIÁRIAS ---
+
+def update_daily_metrics(date_str, closed_count):
+    """Salva o número de fechados do dia no banco de estado."""
+    try:
+        conn = conectar_estado()
+        try:
+            with conn:
+                conn.execute("""
+                    INSERT INTO metricas_diarias (data, fechados_liquido, updated_at) VALUES (?, ?, ?)
+                    ON CONFLICT(data) DO UPDATE SET fechados_liquido = excluded.fechados_liquido, updated_at = excluded.updated_at
+                """, (date_str, int(closed_count), datetime.now().isoformat()))
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"Erro ao salvar métricas: {e}")
+
+def versao_estado():
+    """Versão do banco de estado: no modo WAL as escritas tocam primeiro o arquivo '-wal'."""
+    return max(get_file_mtime(STATE_DB_FILE), get_file_mtime(f"{STATE_DB_FILE}-wal"))
+
+def ler_metricas_diarias():
+    """Fechados líquidos por dia (índice datetime64)."""
+    conn = conectar_estado()
+    try:
+        df_metricas = pd.read_sql_query("SELECT data, fechados_liquido FROM metricas_diarias", conn)
+    finally:
+        conn.close()
+    metricas = pd.Series(df_metricas['fechados_liquido'].values, index=pd.to_datetime(df_metricas['data'], errors='coerce'), dtype='float64')
+    return metricas[metricas.index.notna()].groupby(level=0).last()
+
+def limpar_metricas_diarias():
+    conn = conectar_estado()
+    try:
+        with conn:
+            conn.execute("DELETE FROM metricas_diarias")
+    finally:
+        conn.close()
@@ -0,0 +1,301 @@
+import csv
+import logging
+import os
+import re
+import threading
+from contextlib import nullcontext
+from datetime import datetime
+
+import pandas as pd
+
+from .arquivos import (
+    ErroLeituraCSV, get_file_mtime, gravar_atomico, gravar_parquet, ler_csv, ler_csv_tipado, trava_arquivo,
+)
+from .config import (
+    HISTORICO_FECHADOS_DIR, HISTORICO_FECHADOS_VERSAO, HISTORICO_FECHAMENTOS_FILE, ID_COLS,
+    STATE_FILE_MASTER_CLOSED_CSV, TRAVA_HISTORICO_FILE,
+)
+from .normalizacao import (
+    chaves_dos_ids, codificar_ids, coluna_data_criacao, mascara_grupos, normalizar_datas, normalize_ids,
+)
+
+logger = logging.getLogger(__name__)
+
+# --- HISTÓRICO DE FECHADOS (PARTIÇÕES MENSAIS) ---
+# Cada mês de 'Data de Fechamento' fica em um CSV próprio e a Atualização Rápida só
+# acrescenta linhas no fim das partições. O upsert por ID é resolvido na leitura
+# (vale o registro mais recente de 'Registrado em') e, em segundo plano, pela
+# compactação, que apaga as linhas substituídas. O arquivo de versão só muda em
+# escritas lógicas, então a compactação não invalida índices derivados.
+
+# As escritas tomam a trava de arquivo 'TRAVA_HISTORICO_FILE': o dashboard (e seus threads
+# de fundo) e a linha de comando rodada pelo cron gravam as mesmas partições.
+# Ao lado delas, 'HISTORICO_FECHAMENTOS_FILE' guarda só ID, data de fechamento e grupo vigentes
+# de cada ticket: a Atualização Rápida, o índice de evolução e o modelo do dashboard leem
+# dele, não do histórico.
+
+def caminho_particao_fechados(mes):
+    return f"{HISTORICO_FECHADOS_DIR}/fechados_{mes}.csv"
+
+def listar_particoes_fechados():
+    """Retorna {mes: caminho} das partições existentes, em ordem de mês."""
+    try:
+        arquivos = os.listdir(HISTORICO_FECHADOS_DIR)
+    except FileNotFoundError:
+        return {}
+    particoes = {}
+    for file_name in arquivos:
+        match = re.fullmatch(r"fechados_(\d{4}-\d{2}|sem-data)\.csv", file_name)
+        if match:
+            particoes[match.group(1)] = os.path.join(HISTORICO_FECHADOS_DIR, file_name)
+    return dict(sorted(particoes.items()))
+
+def meses_particao(datas_fechamento):
+    """Chave de partição ('AAAA-MM' ou 'sem-data') de cada data de fechamento."""
+    datas = normalizar_datas(datas_fechamento)
+    return datas.dt.strftime('%Y-%m').fillna('sem-data')
+
+def meses_no_intervalo(inicio, fim):
+    return list(pd.period_range(inicio, fim, freq='M').strftime('%Y-%m'))
+
+def versao_historico_fechados():
+    return get_file_mtime(HISTORICO_FECHADOS_VERSAO)
+
+def _registrar_nova_versao_historico():
+    os.makedirs(HISTORICO_FECHADOS_DIR, exist_ok=True)
+    with open(HISTORICO_FECHADOS_VERSAO, 'w', encoding='utf-8') as f:
+        f.write(datetime.now().isoformat())
+
+def _gravar_particao(df_particao, file_path):
+    gravar_atomico(file_path, lambda temp_path: df_particao.to_csv(temp_path, index=False, sep=';', encoding='utf-8'))
+
+def _ler_particao(file_path, file_mtime, excluir=()):
+    return ler_csv_tipado(file_path, excluir=excluir)
+
+def ler_historico_fechados(meses=None, excluir=(), leitor=_ler_particao, falhas=None):
+    """
+    Lê o histórico de fechados aplicando o upsert por ID.
+    Com 'meses', só as partições desses meses são lidas; um ticket fechado de novo
+    em outro mês pode aparecer nas duas até a próxima compactação. 'excluir' evita
+    materializar colunas (ex.: texto livre) que o chamador não usa e
+    'leitor(caminho, mtime, excluir)' permite ao dashboard ler as partições em cache.
+    Uma partição ilegível fica de fora e vai para o log; seu mês é acrescentado à lista
+    'falhas', quando informada, para o chamador avisar que o histórico está incompleto.
+    """
+    particoes = listar_particoes_fechados()
+    if meses is not None:
+        particoes = {mes: path for mes, path in particoes.items() if mes in meses}
+    frames = []
+    for mes, path in particoes.items():
+        try:
+            frames.append(leitor(path, get_file_mtime(path), tuple(excluir)))
+        except ErroLeituraCSV as e:
+            logger.error("Partição '%s' do histórico de fechados ignorada: %s", mes, e)
+            if falhas is not None:
+                falhas.append(mes)
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return pd.DataFrame()
+    df_hist = pd.concat(frames, ignore_index=True)
+    if 'Registrado em' in df_hist.columns:
+        df_hist = df_hist.sort_values('Registrado em', kind='stable', na_position='first')
+    if 'ID do ticket' in df_hist.columns:
+        df_hist = df_hist.drop_duplicates(subset=['ID do ticket'], keep='last')
+    return df_hist.reset_index(drop=True)
+
+COLUNAS_FECHAMENTOS = ['ID do ticket', 'Data de Fechamento', 'Atribuir a um grupo']
+COLUNAS_GRUPO_HISTORICO = ('Atribuir a um grupo', 'Grupo Atribuído', 'Grupo')
+
+def _ler_particao_fechamentos(file_path, file_mtime, excluir=()):
+    df = ler_csv(file_path, colunas=COLUNAS_FECHAMENTOS + list(COLUNAS_GRUPO_HISTORICO) + ['Registrado em'])
+    # Partições migradas do CSV mestre podem trazer o grupo com outro nome
+    col_grupo = next((col for col in COLUNAS_GRUPO_HISTORICO if col in df.columns), None)
+    if col_grupo and col_grupo != 'Atribuir a um grupo':
+        df = df.rename(columns={col_grupo: 'Atribuir a um grupo'})
+    return df.loc[:, ~df.columns.duplicated()]
+
+def _reconstruir_fechamentos():
+    falhas = []
+    df_fechamentos = ler_historico_fechados(leitor=_ler_particao_fechamentos, falhas=falhas)
+    if falhas:
+        # Gravado incompleto, o índice seria tomado como em dia até a próxima escrita
+        raise ErroLeituraCSV(f"Partições ilegíveis no histórico de fechados: {', '.join(falhas)}")
+    return df_fechamentos.reindex(columns=COLUNAS_FECHAMENTOS)
+
+def _fechamentos_gravados():
+    """Fechamentos gravados, ou None se estão defasados em relação ao histórico ou em formato antigo."""
+    if not get_file_mtime(HISTORICO_FECHAMENTOS_FILE) >= versao_historico_fechados() > 0:
+        return None
+    df_fechamentos = pd.read_parquet(HISTORICO_FECHAMENTOS_FILE)
+    return df_fechamentos if list(df_fechamentos.columns) == COLUNAS_FECHAMENTOS else None
+
+def aplicar_fechamentos(df_fechamentos, df_novos):
+    """Upsert dos fechamentos: as linhas novas substituem as do mesmo ticket."""
+    df_novos = df_novos.reindex(columns=COLUNAS_FECHAMENTOS).drop_duplicates(subset=['ID do ticket'], keep='last')
+    df_mantidos = df_fechamentos[~df_fechamentos['ID do ticket'].isin(df_novos['ID do ticket'])]
+    return pd.concat([df_mantidos, df_novos], ignore_index=True)
+
+def ler_fechamentos_por_ticket(com_trava=True):
+    """
+    Fechamento vigente (data e grupo) de cada ticket; refeito a partir das partições se estiver defasado.
+    'com_trava=False' quando o chamador já tem a trava do histórico (ela não é reentrante).
+    """
+    df_fechamentos = _fechamentos_gravados()
+    if df_fechamentos is not None:
+        return df_fechamentos
+    if not listar_particoes_fechados():
+        return pd.DataFrame(columns=COLUNAS_FECHAMENTOS, dtype=object)
+    with trava_arquivo(TRAVA_HISTORICO_FILE) if com_trava else nullcontext():
+        df_fechamentos = _reconstruir_fechamentos()
+        gravar_parquet(df_fechamentos, HISTORICO_FECHAMENTOS_FILE)
+    return df_fechamentos
+
+def anexar_historico_fechados(df_novos):
+    """
+    Acrescenta as linhas ao fim das partições mensais, sem reescrever o histórico.
+    Retorna as versões do histórico (anterior, gravada) desta escrita, ou (None, None) se
+    não havia o que gravar.
+    """
+    if df_novos.empty:
+        return None, None
+    df_novos = df_novos.copy()
+    df_novos['Registrado em'] = datetime.now().isoformat()
+    meses = meses_particao(df_novos['Data de Fechamento'])
+    with trava_arquivo(TRAVA_HISTORICO_FILE):
+        versao_anterior = versao_historico_fechados()
+        df_fechamentos = _fechamentos_gravados()
+        for mes, df_mes in df_novos.groupby(meses, sort=True):
+            file_path = caminho_particao_fechados(mes)
+            if os.path.exists(file_path):
+                with open(file_path, 'r', encoding='utf-8', newline='') as f:
+                    cabecalho = next(csv.reader(f, delimiter=';'), [])
+                if set(df_mes.columns) <= set(cabecalho):
+                    df_mes.reindex(columns=cabecalho).to_csv(file_path, mode='a', header=False, index=False, sep=';', encoding='utf-8')
+                    continue
+                # Colunas novas: a partição precisa ser reescrita com o novo cabeçalho
+                df_existente = pd.read_csv(file_path, sep=';', dtype=str, encoding='utf-8')
+                df_mes = pd.concat([df_existente, df_mes], ignore_index=True)
+            _gravar_particao(df_mes, file_path)
+        _registrar_nova_versao_historico()
+        # Gravado depois da versão: o mtime maior marca os fechamentos como em dia
+        if df_fechamentos is not None:
+            df_fechamentos = aplicar_fechamentos(df_fechamentos, df_novos)
+        else:
+            df_fechamentos = _reconstruir_fechamentos()
+        gravar_parquet(df_fechamentos, HISTORICO_FECHAMENTOS_FILE)
+        versao_gravada = versao_historico_fechados()
+    return versao_anterior, versao_gravada
+
+def compactar_historico_fechados():
+    """Remove das partições as linhas substituídas por um registro mais novo do mesmo ticket."""
+    with trava_arquivo(TRAVA_HISTORICO_FILE):
+        particoes = listar_particoes_fechados()
+        frames = []
+        colunas_particao = {}
+        for mes, file_path in particoes.items():
+            df_particao = pd.read_csv(file_path, sep=';', dtype=str, encoding='utf-8')
+            colunas_particao[mes] = list(df_particao.columns)
+            df_particao['_particao'] = mes
+            frames.append(df_particao)
+        if not frames:
+            return
+        df_hist = pd.concat(frames, ignore_index=True)
+        if 'ID do ticket' not in df_hist.columns:
+            return
+        ordem = df_hist.sort_values('Registrado em', kind='stable', na_position='first') if 'Registrado em' in df_hist.columns else df_hist
+        manter = ~ordem.duplicated(subset=['ID do ticket'], keep='last')
+        df_compactado = ordem[manter].sort_index()
+        for mes, file_path in particoes.items():
+            original = df_hist[df_hist['_particao'] == mes]
+            restante = df_compactado[df_compactado['_particao'] == mes]
+            if len(restante) == len(original):
+                continue
+            if restante.empty:
+                os.remove(file_path)
+            else:
+                _gravar_particao(restante[colunas_particao[mes]], file_path)
+
+def iniciar_compactacao_historico():
+    threading.Thread(target=compactar_historico_fechados, name="compactacao-historico-fechados", daemon=True).start()
+
+def migrar_historico_fechados_para_particoes():
+    """Migração única do antigo 'historico_fechados_master.csv' para as partições mensais."""
+    if not os.path.exists(STATE_FILE_MASTER_CLOSED_CSV):
+        return False
+    with trava_arquivo(TRAVA_HISTORICO_FILE):
+        # Reverificado com a trava: outro processo (dashboard ou linha de comando) pode ter migrado antes
+        if listar_particoes_fechados() or not os.path.exists(STATE_FILE_MASTER_CLOSED_CSV):
+            return False
+        df_master = ler_csv(STATE_FILE_MASTER_CLOSED_CSV)
+        if not df_master.empty:
+            id_col = next((col for col in ID_COLS if col in df_master.columns), None)
+            if id_col:
+                df_master = df_master.rename(columns={id_col: 'ID do ticket'})
+                df_master['ID do ticket'] = normalize_ids(df_master['ID do ticket'])
+            if 'Data de Fechamento' not in df_master.columns:
+                df_master['Data de Fechamento'] = None
+            df_master['Registrado em'] = datetime.fromtimestamp(get_file_mtime(STATE_FILE_MASTER_CLOSED_CSV)).isoformat()
+            for mes, df_mes in df_master.groupby(meses_particao(df_master['Data de Fechamento']), sort=True):
+                _gravar_particao(df_mes, caminho_particao_fechados(mes))
+            _registrar_nova_versao_historico()
+        os.replace(STATE_FILE_MASTER_CLOSED_CSV, f"{STATE_FILE_MASTER_CLOSED_CSV}.migrado")
+    return True
+
+def filtrar_historico_encerrados(df_historico):
+    """Garante a coluna de grupo, remove os grupos de exclusão permanente e tipa a data de fechamento."""
+    if df_historico.empty:
+        return pd.DataFrame()
+    if 'Atribuir a um grupo' not in df_historico.columns:
+        found_col = next((col for col in ['Grupo Atribuído', 'Grupo'] if col in df_historico.columns), None)
+        if found_col:
+            df_historico = df_historico.rename(columns={found_col: 'Atribuir a um grupo'})
+        else:
+            df_historico = df_historico.assign(**{'Atribuir a um grupo': 'Desconhecido'})
+    df_encerrados = df_historico[~mascara_grupos(df_historico['Atribuir a um grupo'], 'exclusao_permanente')].copy()
+    if 'Data de Fechamento' in df_encerrados.columns:
+        df_encerrados['Data de Fechamento_dt_comp'] = normalizar_datas(df_encerrados['Data de Fechamento'])
+    return df_encerrados
+
+def montar_indice_fechamento(df_hist):
+    """
+    Mapa chave do ticket -> primeira data de fechamento.
+    Permite descartar de um snapshot os tickets já fechados com um único lookup vetorizado.
+    """
+    id_col_hist = next((col for col in ID_COLS if col in df_hist.columns), None)
+    if not id_col_hist or df_hist.empty or 'Data de Fechamento' not in df_hist.columns:
+        return pd.Series(dtype='datetime64[ns]')
+    # Garante que lê a data corretamente do histórico
+    datas_fechamento = normalizar_datas(df_hist['Data de Fechamento']).dt.normalize()
+    df_indice = pd.DataFrame({'Chave': chaves_dos_ids(df_hist), 'Data de Fechamento_dt': datas_fechamento})
+    df_indice = df_indice.dropna(subset=['Data de Fechamento_dt'])
+    return df_indice.groupby('Chave')['Data de Fechamento_dt'].min()
+
+def preencher_criacao_historico(indice_criacao):
+    """Grava nas partições as datas de criação que faltavam e que o índice conhece."""
+    with trava_arquivo(TRAVA_HISTORICO_FILE):
+        for file_path in listar_particoes_fechados().values():
+            df_particao = pd.read_csv(file_path, sep=';', dtype=str, encoding='utf-8')
+            if 'ID do ticket' not in df_particao.columns:
+                continue
+            col_criacao = coluna_data_criacao(df_particao) or 'Data de criação'
+            if col_criacao not in df_particao.columns:
+                df_particao[col_criacao] = None
+            faltando = df_particao[col_criacao].isna()
+            if not faltando.any():
+                continue
+            recuperadas = pd.Series(codificar_ids(df_particao.loc[faltando, 'ID do ticket']), index=df_particao.index[faltando]).map(indice_criacao).dropna()
+            if recuperadas.empty:
+                continue
+            df_particao.loc[recuperadas.index, col_criacao] = recuperadas.dt.strftime('%Y-%m-%d %H:%M:%S')
+            _gravar_particao(df_particao, file_path)
+
+def limpar_historico_fechados():
+    """Apaga o histórico (partições e CSV mestre antigo)."""
+    if os.path.exists(STATE_FILE_MASTER_CLOSED_CSV):
+        os.remove(STATE_FILE_MASTER_CLOSED_CSV)
+    with trava_arquivo(TRAVA_HISTORICO_FILE):
+        # O arquivo de trava fica: apagado com a trava tomada, outro processo travaria um arquivo novo
+        for file_name in os.listdir(HISTORICO_FECHADOS_DIR):
+            file_path = os.path.join(HISTORICO_FECHADOS_DIR, file_name)
+            if file_path != TRAVA_HISTORICO_FILE:
+                os.remove(file_path)
@@ -0,0 +1,207 @@
+import os
+
+import pandas as pd
+
+from .arquivos import get_file_mtime, gravar_parquet, trava_arquivo
+from .config import ID_CHAVE_COL, INDICE_AGING_FILE, INDICE_EVOLUCAO_FILE, ORDEM_FAIXAS, TRAVA_HISTORICO_FILE
+from .historico import ler_fechamentos_por_ticket, montar_indice_fechamento, versao_historico_fechados
+from .normalizacao import categorizar_idade_vetorizado, chaves_dos_ids, mascara_grupos
+from .snapshots import SnapshotCatalog, carregar_snapshot, listar_snapshots
+
+# --- ÍNDICES PERSISTENTES DOS SNAPSHOTS ---
+# Tabelas Parquet com um resumo por snapshot (contagem por grupo e faixas de aging),
+# recalculadas só para as datas cujo snapshot ou histórico mudou.
+
+def contar_snapshot_por_grupo(csv_path, file_date, fechamento_por_ticket, df_snapshot=None):
+    """
+    Conta os chamados abertos por grupo no snapshot, sem os já fechados até a data dele.
+    'df_snapshot' (o frame tipado já em memória) evita reler o arquivo.
+    """
+    if df_snapshot is None:
+        df_snapshot = carregar_snapshot(csv_path, ['ID do ticket', ID_CHAVE_COL, 'Atribuir a um grupo'])
+    if df_snapshot.empty or 'Atribuir a um grupo' not in df_snapshot.columns:
+        return pd.DataFrame(columns=['Atribuir a um grupo', 'Total Chamados'])
+    df_snapshot_filtrado = df_snapshot[~mascara_grupos(df_snapshot['Atribuir a um grupo'], 'exclusao_total')]
+    if 'ID do ticket' in df_snapshot_filtrado.columns and not fechamento_por_ticket.empty:
+        # O snapshot colunar já guarda a chave inteira (os gravados antes dela são codificados aqui)
+        data_fechamento = chaves_dos_ids(df_snapshot_filtrado).map(fechamento_por_ticket)
+        df_snapshot_filtrado = df_snapshot_filtrado[~(data_fechamento <= pd.Timestamp(file_date))]
+    contagem = df_snapshot_filtrado.groupby('Atribuir a um grupo', observed=True).size().reset_index(name='Total Chamados')
+    contagem['Atribuir a um grupo'] = contagem['Atribuir a um grupo'].astype(str)
+    return contagem
+
+def calcular_faixas_snapshot(csv_path, file_date, df_snapshot=None):
+    """Histograma das seis faixas de antiguidade do snapshot, na data do próprio snapshot."""
+    if df_snapshot is None:
+        df_snapshot = carregar_snapshot(csv_path, ['Atribuir a um grupo', 'Data de criação'])
+    if df_snapshot.empty or 'Data de criação' not in df_snapshot.columns:
+        return pd.DataFrame()
+    df_filtrado = df_snapshot[~mascara_grupos(df_snapshot['Atribuir a um grupo'], 'exclusao_total')]
+    # A data de criação já vem tipada (datetime64) do snapshot colunar
+    df_final = df_filtrado.dropna(subset=['Data de criação'])
+    snapshot_date_dt = pd.to_datetime(file_date)
+    data_criacao_normalizada = df_final['Data de criação'].dt.normalize()
+    dias_calculados = (snapshot_date_dt - data_criacao_normalizada).dt.days - 1
+    dias_em_aberto_corrigido = (dias_calculados).clip(lower=0)
+    faixas_antiguidade = categorizar_idade_vetorizado(dias_em_aberto_corrigido)
+    contagem_faixas = pd.Series(faixas_antiguidade).value_counts().reset_index()
+    contagem_faixas.columns = ['Faixa de Antiguidade', 'total']
+    df_todas_faixas = pd.DataFrame({'Faixa de Antiguidade': ORDEM_FAIXAS})
+    contagem_completa = pd.merge(df_todas_faixas, contagem_faixas, on='Faixa de Antiguidade', how='left').fillna(0)
+    contagem_completa['total'] = contagem_completa['total'].astype(int)
+    contagem_completa['data'] = snapshot_date_dt
+    return contagem_completa
+
+def ler_indice_parquet(file_path):
+    if not os.path.exists(file_path):
+        return pd.DataFrame()
+    return pd.read_parquet(file_path)
+
+# Sessões do dashboard e a linha de comando atualizam os mesmos índices: a leitura, a
+# mescla e a gravação acontecem sob a trava do histórico, que também impede que uma
+# escrita no histórico ocorra no meio da recontagem. Sem pendências, o índice é só lido.
+
+def _planejar_indice_evolucao(snapshots, historico_alterado_desde, versoes_historico, forcar_datas):
+    """Lê o índice e separa as datas a recalcular, as que só mudam de versão e as removidas."""
+    mtime_hist = versao_historico_fechados()
+    versao_anterior, versao_gravada = versoes_historico
+    # Outra escrita depois da do chamador pode afetar qualquer data: aí nada é só restampado
+    pode_restampar = historico_alterado_desde is not None and versao_gravada == mtime_hist
+    indice = ler_indice_parquet(INDICE_EVOLUCAO_FILE)
+
+    estado = {}
+    if not indice.empty:
+        for row in indice.drop_duplicates(subset=['Data'])[['Data', 'mtime_snapshot', 'mtime_historico']].itertuples(index=False):
+            estado[row.Data.date()] = (row.mtime_snapshot, row.mtime_historico)
+
+    recalcular = []
+    restampar = False
+    for file_date, csv_path in snapshots:
+        mtime_snap = get_file_mtime(csv_path)
+        atual = estado.get(file_date)
+        if atual is None or atual[0] != mtime_snap or file_date in forcar_datas:
+            recalcular.append((file_date, csv_path, mtime_snap))
+        elif atual[1] != mtime_hist:
+            if pode_restampar and atual[1] == versao_anterior and file_date < historico_alterado_desde:
+                restampar = True
+            else:
+                recalcular.append((file_date, csv_path, mtime_snap))
+    removidas = set(estado) - {file_date for file_date, _ in snapshots}
+    return indice, mtime_hist, recalcular, restampar, removidas
+
+def atualizar_indice_evolucao(
+    historico_alterado_desde=None, versoes_historico=(None, None), forcar_datas=(), catalogo=None, quadros=None,
+):
+    """
+    Mantém a tabela persistente com a contagem por grupo de cada snapshot.
+    Uma data só é recalculada quando o snapshot muda (mtime) ou quando o histórico
+    de fechados muda de forma que pode afetá-la; nos demais casos a tabela é apenas lida.
+    Com 'historico_alterado_desde', snapshots anteriores a essa data apenas registram a
+    nova versão do histórico, pois fechamentos posteriores não os afetam; isso só vale para
+    as datas contadas na versão de logo antes da escrita e enquanto a versão vigente for a
+    gravada por ela ('versoes_historico', o retorno de 'anexar_historico_fechados'), já que
+    qualquer outra versão pode conter alterações de outra escrita.
+    'quadros' ({data: frame tipado}) fornece snapshots recém-gravados sem relê-los do disco.
+    """
+    quadros = quadros or {}
+    snapshots = (catalogo or SnapshotCatalog(listar_snapshots())).todos()
+    plano = (snapshots, historico_alterado_desde, versoes_historico, forcar_datas)
+    indice, _, recalcular, restampar, removidas = _planejar_indice_evolucao(*plano)
+    if not recalcular and not restampar and not removidas:
+        return indice
+
+    with trava_arquivo(TRAVA_HISTORICO_FILE):
+        # Replanejado com a trava: outra sessão ou a linha de comando pode já ter atualizado o índice
+        indice, mtime_hist, recalcular, restampar, removidas = _planejar_indice_evolucao(*plano)
+        if not recalcular and not restampar and not removidas:
+            return indice
+
+        if recalcular:
+            fechamento_por_ticket = montar_indice_fechamento(ler_fechamentos_por_ticket(com_trava=False))
+        else:
+            fechamento_por_ticket = pd.Series(dtype='datetime64[ns]')
+        novos = []
+        for file_date, csv_path, mtime_snap in recalcular:
+            try:
+                contagem = contar_snapshot_por_grupo(csv_path, file_date, fechamento_por_ticket, quadros.get(file_date))
+            except Exception as e:
+                # Sem linha no índice a data continua pendente e é tentada de novo na próxima leitura
+                print(f"Erro ao indexar snapshot '{csv_path}': {e}")
+                continue
+            if contagem.empty:
+                # Linha marcadora: a data está indexada, mas não tem chamados
+                contagem = pd.DataFrame({'Atribuir a um grupo': [None], 'Total Chamados': [0]})
+            contagem['Data'] = pd.to_datetime(file_date)
+            contagem['mtime_snapshot'] = mtime_snap
+            novos.append(contagem)
+
+        datas_descartadas = [pd.to_datetime(d) for d in removidas | {f[0] for f in recalcular}]
+        if not indice.empty:
+            indice = indice[~indice['Data'].isin(datas_descartadas)]
+        indice = pd.concat([indice] + novos, ignore_index=True) if novos else indice
+        if indice.columns.empty:
+            # Não havia índice e nenhum snapshot pôde ser indexado: nada a gravar
+            return indice
+        indice['Total Chamados'] = indice['Total Chamados'].astype(int)
+        indice['mtime_historico'] = mtime_hist
+        indice = indice[['Data', 'Atribuir a um grupo', 'Total Chamados', 'mtime_snapshot', 'mtime_historico']]
+        gravar_parquet(indice, INDICE_EVOLUCAO_FILE)
+    return indice
+
+def _planejar_indice_aging(snapshots, forcar_datas):
+    """Lê o índice e separa as datas a recalcular e as removidas."""
+    indice = ler_indice_parquet(INDICE_AGING_FILE)
+    estado = {}
+    if not indice.empty:
+        estado = dict(zip(indice['data'].dt.date, indice['mtime_snapshot']))
+    recalcular = [
+        (file_date, csv_path, get_file_mtime(csv_path)) for file_date, csv_path in snapshots
+        if estado.get(file_date) != get_file_mtime(csv_path) or file_date in forcar_datas
+    ]
+    removidas = set(estado) - {file_date for file_date, _ in snapshots}
+    return indice, recalcular, removidas
+
+def atualizar_indice_aging(forcar_datas=(), catalogo=None, quadros=None):
+    """
+    Mantém a tabela persistente com as faixas de antiguidade de cada snapshot.
+    O aging de um snapshot só depende do próprio arquivo, então uma data só é
+    recalculada quando o snapshot correspondente muda (mtime).
+    'quadros' ({data: frame tipado}) fornece snapshots recém-gravados sem relê-los do disco.
+    """
+    quadros = quadros or {}
+    snapshots = (catalogo or SnapshotCatalog(listar_snapshots())).todos()
+    indice, recalcular, removidas = _planejar_indice_aging(snapshots, forcar_datas)
+    if not recalcular and not removidas:
+        return indice
+
+    with trava_arquivo(TRAVA_HISTORICO_FILE):
+        # Replanejado com a trava: outra sessão ou a linha de comando pode já ter atualizado o índice
+        indice, recalcular, removidas = _planejar_indice_aging(snapshots, forcar_datas)
+        if not recalcular and not removidas:
+            return indice
+
+        novos = []
+        for file_date, csv_path, mtime_snap in recalcular:
+            try:
+                contagem = calcular_faixas_snapshot(csv_path, file_date, quadros.get(file_date))
+            except Exception as e:
+                # Sem linha no índice a data continua pendente e é tentada de novo na próxima leitura
+                print(f"Erro ao indexar aging do snapshot '{csv_path}': {e}")
+                continue
+            if contagem.empty:
+                # Linha marcadora: a data está indexada, mas o snapshot não tem dados válidos
+                contagem = pd.DataFrame({'Faixa de Antiguidade': [None], 'total': [0], 'data': [pd.to_datetime(file_date)]})
+            contagem['mtime_snapshot'] = mtime_snap
+            novos.append(contagem)
+
+        datas_descartadas = [pd.to_datetime(d) for d in removidas | {f[0] for f in recalcular}]
+        if not indice.empty:
+            indice = indice[~indice['data'].isin(datas_descartadas)]
+        indice = pd.concat([indice] + novos, ignore_index=True) if novos else indice
+        if indice.columns.empty:
+            # Não havia índice e nenhum snapshot pôde ser indexado: nada a gravar
+            return indice
+        indice['total'] = indice['total'].astype(int)
+        indice = indice.sort_values('data', kind='stable')[['Faixa de Antiguidade', 'total', 'data', 'mtime_snapshot']]
+        gravar_parquet(indice, INDICE_AGING_FILE)
+    return indice
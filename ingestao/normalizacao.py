@@ -0,0 +1,147 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from .config import (
+    COLUNAS_CATEGORICAS, COLUNAS_TEXTO_LIVRE, FORMATOS_DATA, GRUPOS_DE_AVISO_REGEX,
+    GRUPOS_EXCLUSAO_PERMANENTE_REGEX, ID_CHAVE_COL, ID_CHAVE_PREFIXO, ID_COLS,
+)
+
+TIPO_TEXTO_LIVRE = pd.StringDtype('pyarrow', na_value=np.nan)
+
+# --- DATAS ---
+
+def detectar_formato_data(textos, tamanho_amostra=200):
+    """Escolhe, a partir de uma amostra, o formato explícito que interpreta a coluna."""
+    amostra = textos.dropna()
+    amostra = amostra[amostra != ''].head(tamanho_amostra)
+    if amostra.empty:
+        return None
+    melhor_formato, melhor_validos = None, 0
+    for formato in FORMATOS_DATA:
+        validos = pd.to_datetime(amostra, format=formato, errors='coerce').notna().sum()
+        if validos == len(amostra):
+            return formato
+        if validos > melhor_validos:
+            melhor_formato, melhor_validos = formato, validos
+    return melhor_formato
+
+def normalizar_datas(valores):
+    """
+    Converte uma coluna de datas para datetime64 com o formato detectado uma única vez.
+    Valores que não seguem o formato dominante (colunas mistas ISO/BR) são relidos
+    apenas nos formatos restantes; o que não casar com nenhum vira NaT.
+    """
+    if pd.api.types.is_datetime64_any_dtype(valores):
+        return valores
+    valores = pd.Series(valores)
+    textos = valores.astype('string').str.strip()
+    formato = detectar_formato_data(textos)
+    if formato is None:
+        return pd.Series(pd.NaT, index=valores.index, dtype='datetime64[ns]')
+    datas = pd.to_datetime(textos, format=formato, errors='coerce')
+    pendentes = datas.isna() & textos.notna() & (textos != '')
+    for formato_alternativo in FORMATOS_DATA:
+        if not pendentes.any():
+            break
+        if formato_alternativo == formato:
+            continue
+        datas[pendentes] = pd.to_datetime(textos[pendentes], format=formato_alternativo, errors='coerce')
+        pendentes = datas.isna() & textos.notna() & (textos != '')
+    return datas
+
+def coluna_data_criacao(df):
+    return next((col for col in df.columns if 'data de cria' in col.lower() or 'created' in col.lower() or 'aberto em' in col.lower()), None)
+
+def categorizar_idade_vetorizado(dias_series):
+    condicoes = [
+        dias_series >= 30, (dias_series >= 21) & (dias_series <= 29),
+        (dias_series >= 11) & (dias_series <= 20), (dias_series >= 6) & (dias_series <= 10),
+        (dias_series >= 3) & (dias_series <= 5), (dias_series >= 0) & (dias_series <= 2)
+    ]
+    opcoes = ["30+ dias", "21-29 dias", "11-20 dias", "6-10 dias", "3-5 dias", "0-2 dias"]
+    return np.select(condicoes, opcoes, default="Erro de Categoria")
+
+# --- IDS ---
+
+def normalize_ids(series):
+    if series.empty:
+        return series
+    return series.astype(str).str.replace(r'\.0$', '', regex=True).str.strip()
+
+def codificar_ids(ids):
+    """
+    Converte IDs em chaves int64: 'PREFIXO-NUMERO' (ex.: '100-91154') vira
+    prefixo * 10**12 + número e IDs só numéricos viram o próprio número.
+    Formatos fora desse padrão, inclusive números com zeros à esquerda ou prefixo
+    zero (que colidiriam com a forma sem eles), recebem um hash negativo estável.
+    """
+    ids = normalize_ids(pd.Series(ids, dtype=object))
+    chaves = np.zeros(len(ids), dtype='int64')
+    if ids.empty:
+        return chaves
+    partes = ids.str.extract(r'^(?:([1-9]\d{0,5})-)?([1-9]\d{0,11}|0)$')
+    numerico = partes[1].notna().to_numpy()
+    prefixo = partes[0].fillna('0')[numerico].astype('int64').to_numpy()
+    numero = partes[1][numerico].astype('int64').to_numpy()
+    chaves[numerico] = prefixo * ID_CHAVE_PREFIXO + numero
+    if not numerico.all():
+        hashes = pd.util.hash_array(ids[~numerico].to_numpy(dtype=object))
+        chaves[~numerico] = -(hashes >> np.uint64(1)).astype('int64') - 1
+    return chaves
+
+def adicionar_chave_ids(df):
+    """Normaliza a coluna de ID (se houver) e acrescenta a chave inteira correspondente."""
+    id_col = next((col for col in ID_COLS if col in df.columns), None)
+    if id_col is None or df.empty:
+        return df
+    df[id_col] = normalize_ids(df[id_col])
+    df[ID_CHAVE_COL] = codificar_ids(df[id_col])
+    return df
+
+def chaves_dos_ids(df):
+    """Chaves do DataFrame, reaproveitando a coluna calculada na ingestão quando existir."""
+    if ID_CHAVE_COL in df.columns:
+        return df[ID_CHAVE_COL]
+    id_col = next((col for col in ID_COLS if col in df.columns), None)
+    if id_col is None:
+        return pd.Series(dtype='int64', index=df.index)
+    return pd.Series(codificar_ids(df[id_col]), index=df.index)
+
+# --- ESQUEMA TIPADO ---
+
+def aplicar_esquema_tipado(df):
+    for col in COLUNAS_CATEGORICAS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    for col in COLUNAS_TEXTO_LIVRE:
+        if col in df.columns:
+            df[col] = df[col].astype(TIPO_TEXTO_LIVRE)
+    return df
+
+# --- CLASSIFICAÇÃO DE GRUPOS ---
+# As regras de exclusão/aviso são avaliadas uma vez por nome de grupo distinto e os
+# DataFrames são filtrados pelo código categórico do grupo, sem regex por linha.
+
+@lru_cache(maxsize=64)
+def classificar_grupos(nomes_grupos):
+    """Tabela de dimensão dos grupos: uma linha por nome, com as flags de cada regra."""
+    grupos = pd.Series(nomes_grupos, dtype=object)
+    exclusao_permanente = grupos.str.contains(GRUPOS_EXCLUSAO_PERMANENTE_REGEX, case=False, na=False, regex=True).to_numpy(dtype=bool)
+    aviso = grupos.str.contains(GRUPOS_DE_AVISO_REGEX, case=False, na=False, regex=True).to_numpy(dtype=bool)
+    return pd.DataFrame({
+        'exclusao_permanente': exclusao_permanente,
+        'aviso': aviso,
+        'exclusao_total': exclusao_permanente | aviso,
+    }, index=pd.Index(nomes_grupos, dtype=object))
+
+def mascara_grupos(grupos, regra):
+    """Máscara da regra ('exclusao_permanente', 'aviso' ou 'exclusao_total') para cada linha, via código do grupo."""
+    categorias = grupos if isinstance(grupos.dtype, pd.CategoricalDtype) else grupos.astype('category')
+    nomes = categorias.cat.categories
+    if len(nomes) == 0:
+        return pd.Series(False, index=grupos.index)
+    flags = classificar_grupos(tuple(nomes.astype(str)))[regra].to_numpy()
+    codigos = categorias.cat.codes.to_numpy()
+    return pd.Series(np.where(codigos >= 0, flags[codigos], False), index=grupos.index)
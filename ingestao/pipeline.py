@@ -0,0 +1,251 @@
+import json
+import os
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+from .arquivos import ler_csv, salvar_arquivo, serializar_csv
+from .config import (
+    BACKLOG_15DIAS_FILE, BACKLOG_ATUAL_FILE, COLUNAS_TEXTO_LIVRE, FECHADOS_DIA_FILE, HISTORICO_FECHADOS_DIR, ID_COLS,
+    INDICE_AGING_FILE, INDICE_EVOLUCAO_FILE, SNAPSHOT_DIR, STATE_DB_FILE, STATE_FILE_PREV_CLOSED, STATE_FILE_REF_DATES,
+)
+from .estado import gravar_datas_referencia, ler_datas_referencia, limpar_metricas_diarias, update_daily_metrics
+from .historico import (
+    anexar_historico_fechados, ler_fechamentos_por_ticket, limpar_historico_fechados, preencher_criacao_historico,
+)
+from .indices import atualizar_indice_aging, atualizar_indice_evolucao
+from .normalizacao import chaves_dos_ids, codificar_ids, coluna_data_criacao, normalizar_datas, normalize_ids
+from .snapshots import caminho_snapshot_colunar, listar_snapshots, montar_indice_criacao, salvar_snapshot_colunar
+
+# --- PIPELINES DE INGESTÃO ---
+# Recebem o DataFrame já normalizado por 'ler_exportacao' (cada upload é lido uma
+# única vez) e gravam a partir dele backlog, snapshots, histórico, índices e a
+# métrica do dia. São chamados pelos botões do dashboard e pela linha de comando
+# ('python -m ingestao'), sem depender do Streamlit.
+
+FUSO_HORARIO = ZoneInfo('America/Sao_Paulo')
+
+@dataclass
+class ResultadoIngestao:
+    """
+    Mensagens produzidas por uma ingestão, para o dashboard ou a linha de comando exibirem,
+    e os caminhos gravados, para que o dashboard invalide só os caches que dependem deles.
+    'compactacao_pendente' indica que o histórico ficou com linhas substituídas: o dashboard
+    compacta em segundo plano e a linha de comando antes de sair.
+    """
+    informacoes: list = field(default_factory=list)
+    avisos: list = field(default_factory=list)
+    resumo: str = None
+    arquivos_alterados: list = field(default_factory=list)
+    compactacao_pendente: bool = False
+
+def _salvar(resultado, file_path, conteudo):
+    salvar_arquivo(file_path, conteudo, is_binary=True)
+    resultado.informacoes.append(f"Arquivo '{file_path}' salvo localmente.")
+    resultado.arquivos_alterados.append(file_path)
+
+def atualizacao_completa(df_atual, df_15dias, agora=None):
+    """Grava o backlog atual e o de 15 dias, seus snapshots do dia e atualiza os índices."""
+    agora = agora or datetime.now(FUSO_HORARIO)
+    resultado = ResultadoIngestao()
+    if os.path.exists(STATE_FILE_PREV_CLOSED):
+        try: os.remove(STATE_FILE_PREV_CLOSED)
+        except Exception: pass
+        resultado.arquivos_alterados.append(STATE_FILE_PREV_CLOSED)
+
+    resultado.informacoes.append(f"Arquivo de Backlog processado. {len(df_atual)} registros encontrados.")
+
+    # Cada upload é serializado uma vez; os mesmos bytes vão para o backlog e para o snapshot
+    conteudo_atual = serializar_csv(df_atual)
+    conteudo_15dias = serializar_csv(df_15dias)
+    _salvar(resultado, BACKLOG_ATUAL_FILE, conteudo_atual)
+    _salvar(resultado, BACKLOG_15DIAS_FILE, conteudo_15dias)
+
+    data_do_upload = agora.date()
+    data_arquivo_15dias = data_do_upload - timedelta(days=15)
+    # Frames tipados dos snapshots gravados: os índices são calculados deles, sem reler o disco
+    quadros = {}
+    for file_date, df_snapshot, conteudo in ((data_do_upload, df_atual, conteudo_atual), (data_arquivo_15dias, df_15dias, conteudo_15dias)):
+        snapshot_path = f"{SNAPSHOT_DIR}/backlog_{file_date.strftime('%Y-%m-%d')}.csv"
+        _salvar(resultado, snapshot_path, conteudo)
+        quadros[file_date] = salvar_snapshot_colunar(df_snapshot, caminho_snapshot_colunar(snapshot_path))
+
+    gravar_datas_referencia({
+        'data_atual': data_do_upload.strftime('%d/%m/%Y'),
+        'data_15dias': data_arquivo_15dias.strftime('%d/%m/%Y'),
+        'hora_atualizacao': agora.strftime('%H:%M'),
+    })
+    resultado.arquivos_alterados.extend([SNAPSHOT_DIR, STATE_FILE_REF_DATES, INDICE_EVOLUCAO_FILE, INDICE_AGING_FILE])
+
+    try:
+        atualizar_indice_evolucao(forcar_datas=tuple(quadros), quadros=quadros)
+        atualizar_indice_aging(forcar_datas=tuple(quadros), quadros=quadros)
+    except Exception as e:
+        resultado.avisos.append(f"Os índices de evolução serão recalculados na próxima leitura: {e}")
+    return resultado
+
+def _registrar_fechados_do_dia(df_fechados, agora, resultado):
+    """Conta os fechados de hoje que estavam no backlog e grava a métrica diária."""
+    # Do backlog só interessam os IDs
+    df_backlog = ler_csv(BACKLOG_ATUAL_FILE, colunas=ID_COLS)
+    if df_backlog.empty:
+        return
+    id_col_bk = next((c for c in ID_COLS if c in df_backlog.columns), None)
+    id_col_fc = next((c for c in ID_COLS if c in df_fechados.columns), None)
+    if not (id_col_bk and id_col_fc):
+        return
+    col_data_fechamento = next((c for c in ['Data de Fechamento', 'Data de Resolução'] if c in df_fechados.columns), None)
+    if col_data_fechamento:
+        # Le já formato ISO ou BR fallback
+        datas_fechamento = normalizar_datas(df_fechados[col_data_fechamento]).dt.normalize()
+        df_fechados_hoje = df_fechados[datas_fechamento == pd.Timestamp(agora.date())]
+    else:
+        df_fechados_hoje = df_fechados
+
+    chaves_fc_hoje = pd.unique(codificar_ids(df_fechados_hoje[id_col_fc]))
+    total_lidos_hoje = len(chaves_fc_hoje)
+    total_abatidos = int(np.isin(chaves_fc_hoje, chaves_dos_ids(df_backlog).to_numpy()).sum())
+    resultado.resumo = f"Processado! {total_lidos_hoje} chamados de HOJE lidos. {total_abatidos} impactaram o backlog."
+    update_daily_metrics(agora.strftime('%Y-%m-%d'), total_abatidos)
+    resultado.arquivos_alterados.append(STATE_DB_FILE)
+
+def _indice_criacao():
+    return montar_indice_criacao([path for _, path in listar_snapshots()], ler_csv(BACKLOG_ATUAL_FILE, excluir=COLUNAS_TEXTO_LIVRE))
+
+def _completar_criacao(df_lookup):
+    """Data de criação dos fechados que vieram sem ela, recuperada do backlog atual ou dos snapshots."""
+    datas = df_lookup.get('Data de criação')
+    faltando = datas.isna() if datas is not None else pd.Series(True, index=df_lookup.index)
+    if not faltando.any():
+        return df_lookup
+    recuperadas = chaves_dos_ids(df_lookup[faltando]).map(_indice_criacao()).dropna()
+    if recuperadas.empty:
+        return df_lookup
+    if datas is None:
+        df_lookup['Data de criação'] = None
+    df_lookup.loc[recuperadas.index, 'Data de criação'] = recuperadas.dt.strftime('%Y-%m-%d %H:%M:%S')
+    return df_lookup
+
+def atualizacao_fechados(df_fechados, agora=None):
+    """
+    Atualização rápida: registra a métrica do dia, grava o arquivo de fechados e
+    acrescenta os chamados ao histórico, recontando só os snapshots afetados.
+    """
+    agora = agora or datetime.now(FUSO_HORARIO)
+    resultado = ResultadoIngestao()
+    _registrar_fechados_do_dia(df_fechados, agora, resultado)
+
+    _salvar(resultado, FECHADOS_DIA_FILE, serializar_csv(df_fechados))
+    # Cópia rasa (copy-on-write): as colunas derivadas abaixo não alteram o frame do chamador
+    df_fechados_upload = df_fechados.copy(deep=False)
+
+    datas_existentes = ler_datas_referencia()
+    data_atual_existente = datas_existentes.get('data_atual', 'N/A')
+    gravar_datas_referencia({
+        'data_atual': data_atual_existente,
+        'data_15dias': datas_existentes.get('data_15dias', 'N/A'),
+        'hora_atualizacao': agora.strftime('%H:%M'),
+    })
+    resultado.arquivos_alterados.append(STATE_FILE_REF_DATES)
+
+    id_col_upload = next((col for col in ID_COLS if col in df_fechados_upload.columns), "ID do Ticket")
+    if id_col_upload not in df_fechados_upload.columns:
+        raise Exception("Coluna de ID não encontrada no arquivo de fechados.")
+
+    col_fechamento_upload = "Data de Fechamento"
+    analista_col_name_origem = "Analista atribuído"
+
+    df_fechados_upload[id_col_upload] = normalize_ids(df_fechados_upload[id_col_upload])
+
+    if col_fechamento_upload in df_fechados_upload.columns:
+        resultado.informacoes.append("Usando 'Data de Fechamento' do arquivo de upload.")
+        df_fechados_upload['Data de Fechamento_dt'] = normalizar_datas(df_fechados_upload[col_fechamento_upload])
+    else:
+        resultado.avisos.append(f"Coluna '{col_fechamento_upload}' não encontrada. Usando data de referência: {data_atual_existente}")
+        df_fechados_upload['Data de Fechamento_dt'] = pd.to_datetime(data_atual_existente, format='%d/%m/%Y', errors='coerce')
+
+    df_fechados_upload['Data de Fechamento_str'] = df_fechados_upload['Data de Fechamento_dt'].dt.strftime('%Y-%m-%d')
+
+    # Só ID, data e grupo de fechamento vigentes de cada ticket: o histórico em si não é lido
+    df_fechamentos = ler_fechamentos_por_ticket()
+
+    # As partições do histórico sempre gravam o ID normalizado em 'ID do ticket'
+    id_col_hist = "ID do ticket"
+
+    previous_closed_ids = set(df_fechamentos[id_col_hist].dropna().unique())
+
+    try:
+        with open(STATE_FILE_PREV_CLOSED, 'w') as f:
+            json.dump(list(previous_closed_ids), f)
+        resultado.arquivos_alterados.append(STATE_FILE_PREV_CLOSED)
+    except Exception: pass
+
+    cols_para_merge = [id_col_upload, 'Data de Fechamento_str']
+    if analista_col_name_origem in df_fechados_upload.columns:
+        cols_para_merge.append(analista_col_name_origem)
+
+    group_col_name_upload = next((col for col in ['Atribuir a um grupo', 'Grupo Atribuído', 'Grupo'] if col in df_fechados_upload.columns), None)
+    if group_col_name_upload:
+        cols_para_merge.append(group_col_name_upload)
+
+    col_criacao_upload = coluna_data_criacao(df_fechados_upload)
+    if col_criacao_upload:
+        # Padroniza saída ISO
+        df_fechados_upload[col_criacao_upload] = normalizar_datas(df_fechados_upload[col_criacao_upload]).dt.strftime('%Y-%m-%d %H:%M:%S')
+
+    col_descricao_upload = next((col for col in ['Descrição', 'Descricao', 'Description', 'Assunto', 'Summary'] if col in df_fechados_upload.columns), None)
+
+    if col_criacao_upload: cols_para_merge.append(col_criacao_upload)
+    if col_descricao_upload: cols_para_merge.append(col_descricao_upload)
+
+    df_lookup = df_fechados_upload[cols_para_merge].drop_duplicates(subset=[id_col_upload])
+
+    if analista_col_name_origem in df_lookup.columns:
+        df_lookup[analista_col_name_origem] = df_lookup[analista_col_name_origem].astype(str).replace(r'\s+', ' ', regex=True).str.strip()
+
+    rename_dict = {
+        id_col_upload: id_col_hist,
+        'Data de Fechamento_str': 'Data de Fechamento'
+    }
+    if group_col_name_upload: rename_dict[group_col_name_upload] = 'Atribuir a um grupo'
+    if col_criacao_upload: rename_dict[col_criacao_upload] = 'Data de criação'
+    if col_descricao_upload: rename_dict[col_descricao_upload] = 'Descrição'
+
+    df_lookup = df_lookup.rename(columns=rename_dict)
+    df_lookup = df_lookup.loc[:, ~df_lookup.columns.duplicated()]
+    df_lookup = _completar_criacao(df_lookup)
+
+    # Append-only: as linhas vão para o fim da partição do mês de fechamento
+    versoes_historico = anexar_historico_fechados(df_lookup)
+    resultado.arquivos_alterados.extend([HISTORICO_FECHADOS_DIR, INDICE_EVOLUCAO_FILE])
+
+    substituidos = df_fechamentos[df_fechamentos[id_col_hist].isin(df_lookup[id_col_hist])]
+    resultado.compactacao_pendente = not substituidos.empty
+
+    # Só snapshots a partir da menor data de fechamento alterada precisam ser recontados
+    datas_alteradas = pd.concat([normalizar_datas(df_lookup['Data de Fechamento']), normalizar_datas(substituidos['Data de Fechamento'])])
+    historico_alterado_desde = datas_alteradas.min()
+    try:
+        atualizar_indice_evolucao(
+            historico_alterado_desde=historico_alterado_desde.date() if pd.notna(historico_alterado_desde) else None,
+            versoes_historico=versoes_historico,
+        )
+    except Exception as e:
+        resultado.avisos.append(f"O índice de evolução será recalculado na próxima leitura: {e}")
+    return resultado
+
+def preencher_criacao_fechados():
+    """Grava nas partições do histórico as datas de criação que o backlog ou os snapshots conhecem."""
+    preencher_criacao_historico(_indice_criacao())
+    return ResultadoIngestao(arquivos_alterados=[HISTORICO_FECHADOS_DIR])
+
+def limpar_historico():
+    """Reset: apaga o histórico de fechados, a lista de fechados anteriores e as métricas diárias."""
+    limpar_historico_fechados()
+    if os.path.exists(STATE_FILE_PREV_CLOSED):
+        os.remove(STATE_FILE_PREV_CLOSED)
+    limpar_metricas_diarias()
+    return ResultadoIngestao(arquivos_alterados=[HISTORICO_FECHADOS_DIR, STATE_FILE_PREV_CLOSED, STATE_DB_FILE])
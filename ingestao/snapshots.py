@@ -0,0 +1,151 @@
+import os
+import re
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+from .arquivos import ErroLeituraCSV, get_file_mtime, gravar_parquet, ler_csv
+from .config import ID_CHAVE_COL, SNAPSHOT_DIR
+from .normalizacao import (
+    adicionar_chave_ids, aplicar_esquema_tipado, chaves_dos_ids, coluna_data_criacao, normalizar_datas,
+)
+
+# --- SNAPSHOTS COLUNARES (PARQUET) ---
+# O CSV continua sendo a fonte gravada pelo upload; o Parquet ao lado dele guarda
+# as mesmas linhas com colunas tipadas para que as abas de evolução leiam apenas
+# as colunas de que precisam, sem reprocessar o texto livre de 'Detalhes'.
+
+def caminho_snapshot_colunar(csv_path):
+    return os.path.splitext(csv_path)[0] + '.parquet'
+
+def salvar_snapshot_colunar(df_snapshot, parquet_path):
+    """
+    Grava o snapshot em Parquet com ID, colunas categóricas, texto Arrow e data de criação
+    tipados. Retorna o DataFrame tipado gravado, para quem quiser indexá-lo sem relê-lo.
+    """
+    df = df_snapshot.copy()
+    df.columns = df.columns.str.strip()
+
+    renomear = {}
+    id_col = next((col for col in ['ID do ticket', 'ID do Ticket', 'ID'] if col in df.columns), None)
+    if id_col: renomear[id_col] = 'ID do ticket'
+    date_col = next((col for col in ['Data de criação', 'Data de criaÃ§Ã£o', 'Data de Criacao'] if col in df.columns), None)
+    if date_col: renomear[date_col] = 'Data de criação'
+    df = df.rename(columns=renomear)
+    df = df.loc[:, ~df.columns.duplicated()]
+
+    df = aplicar_esquema_tipado(adicionar_chave_ids(df))
+    if 'Data de criação' in df.columns:
+        df['Data de criação'] = normalizar_datas(df['Data de criação'])
+
+    # Leituras do dashboard também convertem snapshots: cada escrita usa o próprio temporário
+    gravar_parquet(df, parquet_path)
+    return df
+
+def ler_snapshot_colunar(parquet_path, file_mtime, colunas):
+    colunas_existentes = [col for col in colunas if col in pq.read_schema(parquet_path).names]
+    if not colunas_existentes:
+        return pd.DataFrame()
+    return pd.read_parquet(parquet_path, columns=colunas_existentes)
+
+def carregar_snapshot(csv_path, colunas, leitor=ler_snapshot_colunar):
+    """
+    Lê apenas as colunas pedidas do snapshot, convertendo o CSV para Parquet se necessário.
+    'leitor(parquet_path, mtime, colunas)' permite ao dashboard usar uma leitura em cache.
+    """
+    parquet_path = caminho_snapshot_colunar(csv_path)
+    if get_file_mtime(parquet_path) < get_file_mtime(csv_path):
+        try:
+            df_csv = ler_csv(csv_path)
+        except ErroLeituraCSV as e:
+            print(e)
+            return pd.DataFrame()
+        if df_csv.empty:
+            return pd.DataFrame()
+        salvar_snapshot_colunar(df_csv, parquet_path)
+    return leitor(parquet_path, get_file_mtime(parquet_path), tuple(colunas))
+
+def migrar_snapshots_para_parquet():
+    """Migração única: gera o Parquet de todo snapshot CSV que ainda não tem um."""
+    try:
+        arquivos = [f for f in os.listdir(SNAPSHOT_DIR) if f.startswith('backlog_') and f.endswith('.csv')]
+    except FileNotFoundError:
+        return 0
+    convertidos = 0
+    for file_name in arquivos:
+        csv_path = os.path.join(SNAPSHOT_DIR, file_name)
+        parquet_path = caminho_snapshot_colunar(csv_path)
+        if get_file_mtime(parquet_path) >= get_file_mtime(csv_path):
+            continue
+        try:
+            df_csv = ler_csv(csv_path)
+            if not df_csv.empty:
+                salvar_snapshot_colunar(df_csv, parquet_path)
+                convertidos += 1
+        except Exception as e:
+            print(f"Erro ao migrar snapshot '{csv_path}': {e}")
+    return convertidos
+
+def montar_indice_criacao(caminhos_snapshots, df_backlog, leitor=ler_snapshot_colunar):
+    """Mapa chave do ticket -> data de criação, a partir do backlog atual e dos snapshots."""
+    colunas = ['ID do ticket', ID_CHAVE_COL, 'Data de criação']
+    frames = [carregar_snapshot(path, colunas, leitor) for path in caminhos_snapshots]
+    col_criacao_backlog = coluna_data_criacao(df_backlog)
+    if col_criacao_backlog:
+        frames.append(pd.DataFrame({ID_CHAVE_COL: chaves_dos_ids(df_backlog), 'Data de criação': normalizar_datas(df_backlog[col_criacao_backlog])}))
+    frames = [
+        pd.DataFrame({'Chave': chaves_dos_ids(df), 'Data de criação': normalizar_datas(df['Data de criação'])})
+        for df in frames if not df.empty and 'Data de criação' in df.columns
+    ]
+    if not frames:
+        return pd.Series(dtype='datetime64[ns]')
+    df_indice = pd.concat(frames, ignore_index=True).dropna(subset=['Data de criação'])
+    return df_indice.groupby('Chave')['Data de criação'].min()
+
+# --- CATÁLOGO DE SNAPSHOTS ---
+
+def listar_snapshots():
+    """Retorna [(data, caminho)] de todos os snapshots CSV, em ordem crescente de data."""
+    try:
+        local_files = os.listdir(SNAPSHOT_DIR)
+    except FileNotFoundError:
+        return []
+    snapshots = []
+    for file_name in local_files:
+        match = re.fullmatch(r"backlog_(\d{4}-\d{2}-\d{2})\.csv", file_name)
+        if match:
+            try:
+                file_date = datetime.strptime(match.group(1), "%Y-%m-%d").date()
+            except ValueError:
+                continue
+            snapshots.append((file_date, os.path.join(SNAPSHOT_DIR, file_name)))
+    snapshots.sort(key=lambda x: x[0])
+    return snapshots
+
+class SnapshotCatalog:
+    """Datas dos snapshots em ordem crescente, com buscas por busca binária."""
+
+    def __init__(self, snapshots):
+        self.datas = [file_date for file_date, _ in snapshots]
+        self.caminhos = [file_path for _, file_path in snapshots]
+
+    def __len__(self):
+        return len(self.datas)
+
+    def todos(self):
+        return list(zip(self.datas, self.caminhos))
+
+    def no_intervalo(self, inicio, fim):
+        """Snapshots com data em [inicio, fim]."""
+        i = bisect_left(self.datas, inicio)
+        j = bisect_right(self.datas, fim)
+        return list(zip(self.datas[i:j], self.caminhos[i:j]))
+
+    def mais_proximo_ate(self, data_alvo, data_minima=None):
+        """Snapshot mais recente com data <= data_alvo (e >= data_minima, se informada)."""
+        i = bisect_right(self.datas, data_alvo) - 1
+        if i < 0 or (data_minima is not None and self.datas[i] < data_minima):
+            return None, None
+        return self.datas[i], self.caminhos[i]
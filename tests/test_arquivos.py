@@ -0,0 +1,44 @@
+import pytest
+
+from ingestao.arquivos import (
+    TAMANHO_AMOSTRA_DIALETO, detectar_dialeto, detectar_dialeto_csv, get_file_mtime, ler_csv,
+)
+
+
+def test_detectar_dialeto_separador_pelo_cabecalho():
+    assert detectar_dialeto(b'ID do ticket;Grupo\n100-1;A\n') == (';', 'utf-8')
+    # Vírgulas nos dados não contam: só a linha de cabeçalho decide
+    assert detectar_dialeto(b'ID do ticket,Grupo\r\n100-1,"A; B; C"\r\n') == (',', 'utf-8')
+
+
+def test_detectar_dialeto_bom_utf8():
+    assert detectar_dialeto('\ufeffID do ticket;Descrição\n'.encode('utf-8')) == (';', 'utf-8-sig')
+
+
+def test_detectar_dialeto_latin1():
+    assert detectar_dialeto('ID do ticket;Descrição\n'.encode('latin1')) == (';', 'latin1')
+
+
+def test_detectar_dialeto_amostra_corta_caractere_multibyte():
+    amostra = 'ID do ticket;Descrição\n100-1;ação'.encode('utf-8')[:-1]
+    assert detectar_dialeto(amostra) == (';', 'utf-8')
+
+
+def test_detectar_dialeto_sem_separador():
+    with pytest.raises(ValueError):
+        detectar_dialeto(b'apenas uma coluna\n1\n')
+
+
+def test_detectar_dialeto_csv_le_so_o_inicio_do_arquivo(tmp_path):
+    # Um byte latin1 depois da amostra não muda o encoding detectado
+    caminho = tmp_path / 'backlog.csv'
+    caminho.write_bytes(b'ID do ticket,Grupo\n' + b'100-1,A\n' * (TAMANHO_AMOSTRA_DIALETO // 8) + 'ç'.encode('latin1'))
+    assert detectar_dialeto_csv(str(caminho), get_file_mtime(str(caminho))) == (',', 'utf-8')
+
+
+def test_ler_csv_usa_o_dialeto_detectado(tmp_path):
+    caminho = tmp_path / 'fechados.csv'
+    caminho.write_bytes('ID do ticket,Descrição \n100-1,manutenção\n'.encode('latin1'))
+    df = ler_csv(str(caminho))
+    assert df.columns.tolist() == ['ID do ticket', 'Descrição']
+    assert df.iloc[0].tolist() == ['100-1', 'manutenção']
@@ -0,0 +1,88 @@
+import os
+
+import pandas as pd
+import pytest
+
+from ingestao.cache import CacheQuadros
+
+
+def quadro(linhas=100):
+    return pd.DataFrame({'valor': range(linhas)})
+
+
+TAMANHO = int(quadro().memory_usage(deep=True).sum())
+
+
+def carregar(df, chamadas):
+    def carregar_e_contar():
+        chamadas.append(1)
+        return df
+    return carregar_e_contar
+
+
+def test_hit_nao_recarrega():
+    cache, chamadas = CacheQuadros(10 * TAMANHO), []
+    cache.obter('csv', 'data/a.csv', 1, None, carregar(quadro(), chamadas))
+    cache.obter('csv', 'data/a.csv', 1, None, carregar(quadro(), chamadas))
+    assert len(chamadas) == 1
+    assert cache.metricas().loc['csv', ['hits', 'misses', 'entradas', 'bytes']].tolist() == [1, 1, 1, TAMANHO]
+
+
+def test_orcamento_descarta_o_menos_usado():
+    cache, chamadas = CacheQuadros(2 * TAMANHO), []
+    cache.obter('csv', 'data/a.csv', 1, None, carregar(quadro(), chamadas))
+    cache.obter('csv', 'data/b.csv', 1, None, carregar(quadro(), chamadas))
+    # O hit em 'a' o torna o mais recente: quem sai ao estourar o orçamento é 'b'
+    cache.obter('csv', 'data/a.csv', 1, None, carregar(quadro(), chamadas))
+    cache.obter('csv', 'data/c.csv', 1, None, carregar(quadro(), chamadas))
+    assert cache.bytes_usados == 2 * TAMANHO
+    assert [chave[1] for chave in cache._itens] == ['data/a.csv', 'data/c.csv']
+    assert cache.metricas().loc['csv', 'evictions'] == 1
+
+
+def test_quadro_maior_que_o_orcamento_fica_sozinho():
+    cache = CacheQuadros(TAMANHO // 2)
+    cache.obter('csv', 'data/a.csv', 1, None, quadro)
+    cache.obter('snapshot', 'data/b.parquet', 1, None, quadro)
+    assert [chave[1] for chave in cache._itens] == ['data/b.parquet']
+
+
+def test_nova_versao_do_arquivo_descarta_as_antigas():
+    cache = CacheQuadros(10 * TAMANHO)
+    cache.obter('csv', 'data/a.csv', 1, ('x',), quadro)
+    cache.obter('csv', 'data/a.csv', 1, ('y',), quadro)
+    cache.obter('csv', 'data/a.csv', 2, ('x',), quadro)
+    assert list(cache._itens) == [('csv', 'data/a.csv', 2, ('x',))]
+    assert cache.bytes_usados == TAMANHO
+
+
+def test_erro_ao_carregar_nao_fica_em_cache():
+    cache = CacheQuadros(10 * TAMANHO)
+
+    def falhar():
+        raise OSError('arquivo em uso')
+    with pytest.raises(OSError):
+        cache.obter('csv', 'data/a.csv', 1, None, falhar)
+    assert cache.bytes_usados == 0
+    assert len(cache.obter('csv', 'data/a.csv', 1, None, quadro)) == 100
+
+
+def test_invalidar_por_arquivo_ou_diretorio():
+    cache = CacheQuadros(10 * TAMANHO)
+    for caminho in ['data/a.csv', 'data/snapshots/b.parquet', 'data/snapshots_antigos/c.parquet']:
+        cache.obter('csv', caminho, 1, None, quadro)
+    cache.invalidar([os.path.join('data', 'snapshots')])
+    assert [chave[1] for chave in cache._itens] == ['data/a.csv', 'data/snapshots_antigos/c.parquet']
+    cache.invalidar(['data/a.csv'])
+    assert [chave[1] for chave in cache._itens] == ['data/snapshots_antigos/c.parquet']
+    assert cache.bytes_usados == TAMANHO
+
+
+def test_alteracao_do_chamador_nao_chega_ao_cache():
+    cache = CacheQuadros(10 * TAMANHO)
+    df = cache.obter('csv', 'data/a.csv', 1, None, quadro)
+    df['nova'] = 1
+    df.loc[0, 'valor'] = -1
+    em_cache = cache.obter('csv', 'data/a.csv', 1, None, quadro)
+    assert em_cache.columns.tolist() == ['valor']
+    assert em_cache.loc[0, 'valor'] == 0
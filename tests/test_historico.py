@@ -0,0 +1,91 @@
+import os
+
+import pandas as pd
+import pytest
+
+from ingestao.config import HISTORICO_FECHAMENTOS_FILE
+from ingestao.historico import (
+    anexar_historico_fechados, compactar_historico_fechados, ler_fechamentos_por_ticket, ler_historico_fechados,
+    listar_particoes_fechados, versao_historico_fechados,
+)
+
+
+@pytest.fixture(autouse=True)
+def pasta_de_dados(tmp_path, monkeypatch):
+    # Os caminhos do histórico são relativos à raiz do dashboard
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'data').mkdir()
+
+
+def fechados(*linhas, **extras):
+    df = pd.DataFrame(linhas, columns=['ID do ticket', 'Data de Fechamento', 'Atribuir a um grupo'])
+    return df.assign(**extras)
+
+
+def vigentes(df):
+    return dict(zip(df['ID do ticket'], df['Data de Fechamento']))
+
+
+def test_anexar_particiona_por_mes_e_retorna_as_versoes():
+    assert anexar_historico_fechados(fechados()) == (None, None)
+    anterior, gravada = anexar_historico_fechados(fechados(('100-1', '2025-10-30', 'G1'), ('100-2', '2025-11-02', 'G2')))
+    assert anterior == 0
+    assert gravada == versao_historico_fechados() > 0
+    assert list(listar_particoes_fechados()) == ['2025-10', '2025-11']
+
+
+def test_upsert_entre_meses_vale_o_registro_mais_recente():
+    anexar_historico_fechados(fechados(('100-1', '2025-10-30', 'G1'), ('100-2', '2025-11-02', 'G2')))
+    versao_anterior = versao_historico_fechados()
+    # O 100-1 foi reaberto e fechado de novo no mês seguinte
+    assert anexar_historico_fechados(fechados(('100-1', '2025-11-05', 'G3')))[0] == versao_anterior
+
+    df_hist = ler_historico_fechados()
+    assert len(df_hist) == 2
+    assert vigentes(df_hist) == {'100-1': '2025-11-05', '100-2': '2025-11-02'}
+    assert df_hist.set_index('ID do ticket').loc['100-1', 'Atribuir a um grupo'] == 'G3'
+    # Lendo só o mês antigo, o registro substituído aparece até a compactação
+    assert vigentes(ler_historico_fechados(meses=['2025-10'])) == {'100-1': '2025-10-30'}
+    # O índice lateral acompanha o upsert sem reler as partições
+    assert vigentes(ler_fechamentos_por_ticket()) == vigentes(df_hist)
+
+
+def test_compactacao_remove_substituidos_sem_mudar_a_versao():
+    anexar_historico_fechados(fechados(('100-1', '2025-10-30', 'G1'), ('100-2', '2025-11-02', 'G2')))
+    anexar_historico_fechados(fechados(('100-1', '2025-11-05', 'G3')))
+    versao = versao_historico_fechados()
+    antes = ler_historico_fechados()
+
+    compactar_historico_fechados()
+
+    # A partição de outubro só tinha a linha substituída e deixa de existir
+    assert list(listar_particoes_fechados()) == ['2025-11']
+    assert len(pd.read_csv(listar_particoes_fechados()['2025-11'], sep=';')) == 2
+    # Categorias de partições diferentes viram texto na concatenação: compara os valores
+    assert ler_historico_fechados().astype(str).to_dict('records') == antes.astype(str).to_dict('records')
+    assert versao_historico_fechados() == versao
+    assert ler_historico_fechados(meses=['2025-10']).empty
+
+
+def test_colunas_novas_reescrevem_a_particao():
+    anexar_historico_fechados(fechados(('100-1', '2025-11-01', 'G1')))
+    anexar_historico_fechados(fechados(('100-2', '2025-11-03', 'G2'), Descrição='impressora'))
+    df_hist = ler_historico_fechados().set_index('ID do ticket')
+    assert df_hist.loc['100-2', 'Descrição'] == 'impressora'
+    assert pd.isna(df_hist.loc['100-1', 'Descrição'])
+
+
+def test_indice_lateral_defasado_e_refeito():
+    anexar_historico_fechados(fechados(('100-1', '2025-11-01', 'G1')))
+    os.remove(HISTORICO_FECHAMENTOS_FILE)
+    assert vigentes(ler_fechamentos_por_ticket()) == {'100-1': '2025-11-01'}
+    assert os.path.exists(HISTORICO_FECHAMENTOS_FILE)
+
+
+def test_particao_ilegivel_fica_de_fora_e_e_informada():
+    anexar_historico_fechados(fechados(('100-1', '2025-11-01', 'G1')))
+    with open('data/historico_fechados/fechados_2025-10.csv', 'wb') as f:
+        f.write(b'ID do ticket;Data de Fechamento\n"100-9;2025-10-01\n')
+    falhas = []
+    assert vigentes(ler_historico_fechados(falhas=falhas)) == {'100-1': '2025-11-01'}
+    assert falhas == ['2025-10']
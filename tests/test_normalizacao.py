@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from ingestao.config import ID_CHAVE_PREFIXO
+from ingestao.normalizacao import chaves_dos_ids, codificar_ids, detectar_formato_data, normalizar_datas
+
+
+def test_codificar_ids_prefixo_e_numero():
+    chaves = codificar_ids(['100-91154', '7-1', '123456'])
+    assert chaves.tolist() == [100 * ID_CHAVE_PREFIXO + 91154, 7 * ID_CHAVE_PREFIXO + 1, 123456]
+    assert chaves.dtype == np.int64
+
+
+def test_codificar_ids_normaliza_antes():
+    # IDs lidos como float pelo Excel ('91154.0') e com espaços nas bordas
+    assert codificar_ids([' 100-91154 ', '91154.0']).tolist() == [100 * ID_CHAVE_PREFIXO + 91154, 91154]
+
+
+def test_codificar_ids_hash_para_formato_livre():
+    chaves = codificar_ids(['INC-0042', 'abc', 'INC-0042'])
+    assert (chaves < 0).all()
+    assert chaves[0] == chaves[2]
+    assert chaves[0] != chaves[1]
+    # O hash é estável entre chamadas (as chaves são gravadas nos snapshots)
+    assert codificar_ids(['INC-0042'])[0] == chaves[0]
+
+
+def test_codificar_ids_sem_colisao_entre_formatos():
+    ids = [
+        '123', '0-123', '0123', '00-123',
+        '100-91154', '100-091154', '100000000091154', '0100-91154',
+        '1-0', str(ID_CHAVE_PREFIXO), '0',
+    ]
+    chaves = codificar_ids(ids)
+    assert len(set(chaves.tolist())) == len(ids)
+
+
+def test_codificar_ids_vazio():
+    assert codificar_ids([]).tolist() == []
+
+
+def test_chaves_dos_ids_reaproveita_coluna_da_ingestao():
+    df = pd.DataFrame({'ID do ticket': ['100-1'], 'ID chave': [42]})
+    assert chaves_dos_ids(df).tolist() == [42]
+    df_sem_chave = pd.DataFrame({'ID do Ticket': ['100-1', '5']}, index=[10, 20])
+    assert chaves_dos_ids(df_sem_chave).to_dict() == {10: 100 * ID_CHAVE_PREFIXO + 1, 20: 5}
+
+
+def test_detectar_formato_data_amostra_uniforme():
+    assert detectar_formato_data(pd.Series(['2025-11-06', '2025-11-07 08:00:00'])) == 'ISO8601'
+    assert detectar_formato_data(pd.Series(['05/11/2025 10:30:00', '06/11/2025 11:00:00'])) == '%d/%m/%Y %H:%M:%S'
+
+
+def test_detectar_formato_data_amostra_mista_fica_com_o_dominante():
+    amostra = pd.Series(['05/11/2025', '2025-11-06', '07/11/2025', None, ''])
+    assert detectar_formato_data(amostra) == '%d/%m/%Y'
+
+
+def test_detectar_formato_data_sem_valores():
+    assert detectar_formato_data(pd.Series([None, ''], dtype=object)) is None
+
+
+def test_normalizar_datas_mistura_br_e_iso():
+    valores = pd.Series(
+        ['05/11/2025', '2025-11-06', '06/11/2025 10:30:00', '2025-11-06 08:00:00', ' 01/02/2025 ', '', None, 'lixo'],
+        index=list('abcdefgh'),
+    )
+    datas = normalizar_datas(valores)
+    assert datas.index.tolist() == list('abcdefgh')
+    assert datas.iloc[:5].tolist() == [
+        pd.Timestamp('2025-11-05'), pd.Timestamp('2025-11-06'), pd.Timestamp('2025-11-06 10:30'),
+        pd.Timestamp('2025-11-06 08:00'), pd.Timestamp('2025-02-01'),
+    ]
+    assert datas.iloc[5:].isna().all()
+
+
+def test_normalizar_datas_br_e_dia_primeiro_mesmo_em_minoria():
+    # Datas ambíguas (dia <= 12) em uma coluna majoritariamente ISO continuam dia/mês
+    valores = pd.Series(['2025-03-10', '2025-03-11', '2025-03-12', '02/03/2025'])
+    assert normalizar_datas(valores).iloc[-1] == pd.Timestamp('2025-03-02')
+
+
+def test_normalizar_datas_preserva_coluna_ja_tipada():
+    datas = pd.Series(pd.to_datetime(['2025-11-06']))
+    assert normalizar_datas(datas) is datas
+
+
+def test_normalizar_datas_sem_formato_reconhecido():
+    datas = normalizar_datas(pd.Series(['abc', None]))
+    assert pd.api.types.is_datetime64_any_dtype(datas)
+    assert datas.isna().all()
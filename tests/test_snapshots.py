@@ -0,0 +1,58 @@
+from datetime import date
+
+import pytest
+
+from ingestao.snapshots import SnapshotCatalog, listar_snapshots
+
+
+@pytest.fixture
+def catalogo():
+    return SnapshotCatalog([
+        (date(2025, 11, 3), 'data/snapshots/backlog_2025-11-03.csv'),
+        (date(2025, 11, 5), 'data/snapshots/backlog_2025-11-05.csv'),
+        (date(2025, 11, 6), 'data/snapshots/backlog_2025-11-06.csv'),
+        (date(2025, 11, 10), 'data/snapshots/backlog_2025-11-10.csv'),
+    ])
+
+
+def test_no_intervalo_inclui_as_pontas(catalogo):
+    datas = [file_date for file_date, _ in catalogo.no_intervalo(date(2025, 11, 5), date(2025, 11, 10))]
+    assert datas == [date(2025, 11, 5), date(2025, 11, 6), date(2025, 11, 10)]
+
+
+def test_no_intervalo_entre_snapshots_e_fora_da_faixa(catalogo):
+    assert [d for d, _ in catalogo.no_intervalo(date(2025, 11, 4), date(2025, 11, 5))] == [date(2025, 11, 5)]
+    assert catalogo.no_intervalo(date(2025, 11, 7), date(2025, 11, 9)) == []
+    assert catalogo.no_intervalo(date(2025, 12, 1), date(2025, 12, 31)) == []
+    assert catalogo.no_intervalo(date(2025, 11, 10), date(2025, 11, 1)) == []
+
+
+def test_mais_proximo_ate(catalogo):
+    assert catalogo.mais_proximo_ate(date(2025, 11, 6)) == (date(2025, 11, 6), 'data/snapshots/backlog_2025-11-06.csv')
+    assert catalogo.mais_proximo_ate(date(2025, 11, 9))[0] == date(2025, 11, 6)
+    assert catalogo.mais_proximo_ate(date(2026, 1, 1))[0] == date(2025, 11, 10)
+    assert catalogo.mais_proximo_ate(date(2025, 11, 2)) == (None, None)
+
+
+def test_mais_proximo_ate_respeita_data_minima(catalogo):
+    assert catalogo.mais_proximo_ate(date(2025, 11, 9), data_minima=date(2025, 11, 6))[0] == date(2025, 11, 6)
+    assert catalogo.mais_proximo_ate(date(2025, 11, 9), data_minima=date(2025, 11, 7)) == (None, None)
+
+
+def test_catalogo_vazio():
+    catalogo = SnapshotCatalog([])
+    assert len(catalogo) == 0
+    assert catalogo.no_intervalo(date(2025, 1, 1), date(2025, 12, 31)) == []
+    assert catalogo.mais_proximo_ate(date(2025, 11, 6)) == (None, None)
+
+
+def test_listar_snapshots_ordena_e_ignora_nomes_invalidos(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pasta = tmp_path / 'data' / 'snapshots'
+    pasta.mkdir(parents=True)
+    for nome in ['backlog_2025-11-10.csv', 'backlog_2025-11-03.csv', 'backlog_2025-02-30.csv',
+                 'backlog_2025-11-05.parquet', 'outro_2025-11-04.csv']:
+        (pasta / nome).write_text('ID do ticket;Grupo\n')
+    catalogo = SnapshotCatalog(listar_snapshots())
+    assert catalogo.datas == [date(2025, 11, 3), date(2025, 11, 10)]
+    assert catalogo.todos()[0] == (date(2025, 11, 3), 'data/snapshots/backlog_2025-11-03.csv')